@@ -0,0 +1,146 @@
+import time
+from bisect import bisect_left, insort
+from collections import Counter, deque
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class SlidingWindowCounter:
+    """
+    Event counts per key over a trailing time window, bucketed by
+    `bucket_seconds`. Adds and expiry are O(1) per bucket; totals and
+    per-key counts are maintained as running sums.
+
+    Keys are also kept ranked by count in a sorted list, updated as each
+    count changes, so top() is a slice. Keys must be mutually orderable;
+    ties rank by key.
+    """
+
+    def __init__(self, window_seconds: float, bucket_seconds: float = 60):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        # Bucket ids in ascending order, and the per-key counts of each
+        self._order: deque = deque()
+        self._buckets: Dict[int, Counter] = {}
+        self._counts: Counter = Counter()
+        self._total = 0
+        # (-count, key), highest count first
+        self._ranking: List[Tuple[int, Hashable]] = []
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def _rerank(self, key: Hashable, old: int, new: int):
+        ranking = self._ranking
+        if old:
+            del ranking[bisect_left(ranking, (-old, key))]
+        if new:
+            insort(ranking, (-new, key))
+
+    def _cutoff(self, now: float) -> int:
+        # Oldest bucket that still overlaps the window
+        return self._bucket(now - self.window_seconds)
+
+    def add(
+        self, ts: float, key: Hashable = None, n: int = 1, now: Optional[float] = None
+    ):
+        now = time.time() if now is None else now
+        b = self._bucket(ts)
+        if b < self._cutoff(now):
+            return
+        bucket = self._buckets.get(b)
+        if bucket is None:
+            bucket = self._buckets[b] = Counter()
+            if not self._order or b > self._order[-1]:
+                self._order.append(b)
+            else:
+                # Late event for a bucket we have not seen; rare
+                self._order.insert(bisect_left(self._order, b), b)
+        bucket[key] += n
+        old = self._counts[key]
+        self._counts[key] = old + n
+        self._rerank(key, old, old + n)
+        self._total += n
+        self.expire(now)
+
+    def expire(self, now: Optional[float] = None):
+        cutoff = self._cutoff(time.time() if now is None else now)
+        while self._order and self._order[0] < cutoff:
+            bucket = self._buckets.pop(self._order.popleft())
+            for key, n in bucket.items():
+                old = self._counts[key]
+                left = old - n
+                if left > 0:
+                    self._counts[key] = left
+                else:
+                    del self._counts[key]
+                    left = 0
+                self._rerank(key, old, left)
+                self._total -= n
+
+    def total(self, now: Optional[float] = None) -> int:
+        self.expire(now)
+        return self._total
+
+    def counts(self, now: Optional[float] = None) -> Dict[Hashable, int]:
+        self.expire(now)
+        return dict(self._counts)
+
+    def top(self, k: int, now: Optional[float] = None) -> List[Tuple[Hashable, int]]:
+        """Top k keys by count, highest first"""
+        self.expire(now)
+        return [(key, -count) for count, key in self._ranking[:k]]
+
+
+class RunningWindowSum:
+    """Sum of the last `size` values with O(1) push"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: deque = deque(maxlen=size)
+        self.total = 0.0
+        self._pushes = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self._pushes += 1
+        # Shed floating-point drift from the running subtraction
+        if self._pushes % self.size == 0:
+            self.total = float(sum(self.values))
+
+
+class ThreatAggregates:
+    """
+    Incrementally maintained inputs of /threat_score and /leaderboard:
+    the weighted score and high-severity count of the last `recent_size`
+    alerts, a 1-hour alert counter and a 24-hour per-symbol counter.
+    """
+
+    def __init__(self, score_fn: Callable[[Dict], float], recent_size: int = 100):
+        self.score_fn = score_fn
+        self.recent_scores = RunningWindowSum(recent_size)
+        self.recent_high_severity = RunningWindowSum(recent_size)
+        self.last_hour = SlidingWindowCounter(3600)
+        self.last_day_by_symbol = SlidingWindowCounter(86400)
+
+    def add(self, alert: Dict, ts: float):
+        self.recent_scores.push(self.score_fn(alert))
+        self.recent_high_severity.push(1 if alert.get("severity_level", 1) >= 3 else 0)
+        self.last_hour.add(ts)
+        self.last_day_by_symbol.add(ts, alert["symbol"])
+
+    def threat(self, now: Optional[float] = None) -> Dict:
+        return {
+            "recent_score": self.recent_scores.total,
+            "recent_alerts": len(self.recent_scores),
+            "high_severity_alerts": int(round(self.recent_high_severity.total)),
+            "alerts_last_hour": self.last_hour.total(now),
+        }
+
+    def leaderboard(self, limit: int, now: Optional[float] = None):
+        return self.last_day_by_symbol.top(limit, now)
@@ -0,0 +1,263 @@
+import datetime
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    and_,
+    or_,
+    select,
+)
+
+from alert_store import to_naive_utc
+
+metadata = MetaData()
+
+alerts_table = Table(
+    "alerts",
+    metadata,
+    Column("id", String(64), primary_key=True),
+    Column("symbol", String(64), nullable=False),
+    Column("source_handle", String(128), nullable=False, default=""),
+    # Lower-cased copies so case-insensitive filters can use the indexes
+    Column("symbol_key", String(64), nullable=False),
+    Column("handle_key", String(128), nullable=False),
+    Column("severity_level", Integer, nullable=False, default=0),
+    Column("manipulation_confidence", Float, nullable=False, default=0.0),
+    Column("reason", String(256)),
+    # Naive UTC, matching the created_at strings on alert records
+    Column("created_at", DateTime, nullable=False),
+    Column("payload", JSON, nullable=False),
+)
+
+Index("ix_alerts_created_at", alerts_table.c.created_at, alerts_table.c.id)
+Index(
+    "ix_alerts_symbol_created_at",
+    alerts_table.c.symbol_key,
+    alerts_table.c.created_at,
+    alerts_table.c.id,
+)
+Index(
+    "ix_alerts_handle_created_at",
+    alerts_table.c.handle_key,
+    alerts_table.c.created_at,
+    alerts_table.c.id,
+)
+
+
+class AlertRepository:
+    """Alert table access on a SQLAlchemy engine (Postgres or SQLite)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def create_schema(self):
+        metadata.create_all(self.engine)
+
+    @staticmethod
+    def to_row(alert: Dict) -> Dict:
+        handle = alert.get("source_handle") or ""
+        return {
+            "id": alert["id"],
+            "symbol": alert["symbol"],
+            "source_handle": handle,
+            "symbol_key": alert["symbol"].lower(),
+            "handle_key": handle.lower(),
+            "severity_level": int(alert.get("severity_level", 0)),
+            "manipulation_confidence": float(alert.get("manipulation_confidence", 0)),
+            "reason": (alert.get("reason") or "")[:256],
+            "created_at": to_naive_utc(alert["created_at"]),
+            "payload": alert,
+        }
+
+    def insert_many(self, alerts: List[Dict]):
+        if not alerts:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(alerts_table.insert(), [self.to_row(a) for a in alerts])
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(alerts_table.c.payload).where(alerts_table.c.id == alert_id)
+            ).first()
+        return row[0] if row else None
+
+    def query(
+        self,
+        symbol: Optional[str] = None,
+        handle: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+        limit: int = 100,
+        before: Optional[Tuple[datetime.datetime, str]] = None,
+    ) -> List[Dict]:
+        """Newest first, paginated by a (created_at, id) keyset cursor"""
+        t = alerts_table.c
+        conditions = []
+        if symbol:
+            conditions.append(t.symbol_key == symbol.lower())
+        if handle:
+            conditions.append(t.handle_key == handle.lower())
+        if start is not None:
+            conditions.append(t.created_at >= start)
+        if end is not None:
+            conditions.append(t.created_at <= end)
+        if before is not None:
+            created_at, alert_id = before
+            conditions.append(
+                or_(
+                    t.created_at < created_at,
+                    and_(t.created_at == created_at, t.id < alert_id),
+                )
+            )
+
+        stmt = (
+            select(t.payload)
+            .where(*conditions)
+            .order_by(t.created_at.desc(), t.id.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.execute(stmt)]
+
+    def load_since(self, start: datetime.datetime, limit: int = 100000) -> List[Dict]:
+        """Alerts created since start, oldest first, for warming the memory store"""
+        t = alerts_table.c
+        stmt = (
+            select(t.payload)
+            .where(t.created_at >= start)
+            .order_by(t.created_at.desc(), t.id.desc())
+            .limit(limit)
+        )
+        with self.engine.connect() as conn:
+            rows = [row[0] for row in conn.execute(stmt)]
+        rows.reverse()
+        return rows
+
+
+class AlertWriter:
+    """
+    Background thread that drains submitted alerts into the database in
+    batches of up to `batch_size`, or every `flush_interval` seconds,
+    whichever comes first. submit() never blocks the caller. A batch the
+    database rejects is retried row by row, so one bad alert costs only
+    itself.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        repo: AlertRepository,
+        batch_size: int = 200,
+        flush_interval: float = 0.25,
+        max_queue: int = 100000,
+    ):
+        self.repo = repo
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried_batches = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="alert-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, alert: Dict) -> bool:
+        try:
+            self._queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self):
+        """Block until everything submitted so far has been written"""
+        self._queue.join()
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _write(self, batch: List[Dict]):
+        try:
+            self.repo.insert_many(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            print(f"Alert persistence error: {e}")
+            self._write_rows(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_rows(self, batch: List[Dict]):
+        # The batch rolled back as a whole; write its rows one by one so only
+        # the bad ones (duplicate ids, unserializable payloads) are dropped
+        self.retried_batches += 1
+        for alert in batch:
+            try:
+                self.repo.insert_many([alert])
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Alert persistence error for {alert.get('id')}: {e}")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                return
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retried_batches": self.retried_batches,
+        }
@@ -0,0 +1,340 @@
+import datetime
+import itertools
+import json
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+def to_epoch(value) -> float:
+    """Epoch seconds for an ISO string or datetime; naive values are UTC"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def to_naive_utc(value) -> datetime.datetime:
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bar_key(alert: Dict) -> str:
+    """
+    Symbol, interval and bar an alert was raised on. Detection reruns on a
+    bar (watcher polls, /fetch_live, other workers) raise the same alert
+    again; every store keeps only the first.
+    """
+    bar = alert.get("time") or alert["id"]
+    return f"{alert['symbol'].lower()}|{alert.get('interval') or ''}|{bar}"
+
+
+def encode_cursor(alert: Dict) -> str:
+    """Keyset cursor for the position just after this alert"""
+    return f"{to_naive_utc(alert['created_at']).isoformat()}|{alert['id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, str]:
+    created_at, alert_id = cursor.split("|", 1)
+    return to_naive_utc(created_at), alert_id
+
+
+class TimeIndex:
+    """
+    Alert ids ordered by (creation time, id). Alerts almost always arrive in
+    time order, so adds are appends; range queries are two bisects. Entries
+    before `head` have been evicted and are compacted away lazily, which
+    makes dropping the oldest entry O(1) amortized.
+    """
+
+    __slots__ = ("keys", "head")
+
+    # Sorts after every id, so (end, _MAX_ID) bounds all keys at time end
+    _MAX_ID = chr(0x10FFFF)
+
+    def __init__(self):
+        self.keys: List[Tuple[float, str]] = []
+        self.head = 0
+
+    def __len__(self):
+        return len(self.keys) - self.head
+
+    def __iter__(self) -> Iterator[Tuple[float, str]]:
+        return itertools.islice(self.keys, self.head, None)
+
+    def add(self, ts: float, alert_id: str):
+        key = (ts, alert_id)
+        if len(self.keys) == self.head or key >= self.keys[-1]:
+            self.keys.append(key)
+        else:
+            insort(self.keys, key, lo=self.head)
+
+    def oldest(self) -> Optional[Tuple[float, str]]:
+        return self.keys[self.head] if len(self.keys) > self.head else None
+
+    def popleft(self) -> Tuple[float, str]:
+        key = self.keys[self.head]
+        self.head += 1
+        if self.head == len(self.keys):
+            self.keys.clear()
+            self.head = 0
+        elif self.head >= 1024 and self.head * 2 >= len(self.keys):
+            del self.keys[: self.head]
+            self.head = 0
+        return key
+
+    def tail(self, n: int) -> List[Tuple[float, str]]:
+        if n <= 0:
+            return []
+        return self.keys[max(self.head, len(self.keys) - n) :]
+
+    def bounds(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        before: Optional[Tuple[float, str]] = None,
+    ):
+        """
+        Index range [lo, hi) of entries with start <= ts <= end, and strictly
+        before the (ts, id) keyset cursor if one is given
+        """
+        lo = (
+            self.head
+            if start is None
+            else bisect_left(self.keys, (start,), lo=self.head)
+        )
+        hi = (
+            len(self.keys)
+            if end is None
+            else bisect_right(self.keys, (end, self._MAX_ID), lo=self.head)
+        )
+        if before is not None:
+            hi = min(hi, bisect_left(self.keys, before, lo=self.head))
+        return lo, hi
+
+    def count(self, start: Optional[float] = None, end: Optional[float] = None) -> int:
+        lo, hi = self.bounds(start, end)
+        return max(0, hi - lo)
+
+
+class AlertSpill:
+    """Append-only spill file of evicted alerts, one compact JSON record per line"""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        self.written = 0
+
+    def write(self, alert: Dict):
+        self._file.write(json.dumps(alert, separators=(",", ":"), default=str))
+        self._file.write("\n")
+        self.written += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._pending = 0
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class AlertStore:
+    """
+    In-memory alert store with an id hash index, per-symbol and per-handle
+    time indexes and a global time index. created_at is parsed once on
+    insert and kept as epoch seconds.
+
+    Retention is bounded by `max_alerts` and `max_age_seconds`; the oldest
+    alerts are evicted in O(1) each and, given a spill, appended to disk.
+    Age expiry runs on reads as well as on add(), so alerts do not outlive
+    the age limit while no new ones arrive. An alert whose id or bar_key is
+    already stored is dropped.
+    """
+
+    def __init__(
+        self,
+        max_alerts: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        spill: Optional[AlertSpill] = None,
+    ):
+        self.max_alerts = max_alerts
+        self.max_age_seconds = max_age_seconds
+        self.spill = spill
+        self.evicted = 0
+        self.duplicates = 0
+
+        self._by_id: Dict[str, Dict] = {}
+        self._epoch: Dict[str, float] = {}
+        self._timeline = TimeIndex()
+        self._by_symbol: Dict[str, TimeIndex] = {}
+        self._by_handle: Dict[str, TimeIndex] = {}
+        # Display form of each symbol as first seen, keyed by lower case
+        self._symbol_names: Dict[str, str] = {}
+        self._bars: Set[str] = set()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Alerts oldest first"""
+        return (self._by_id[k[1]] for k in self._timeline)
+
+    def add(self, alert: Dict) -> bool:
+        """Index an alert; False if its id or bar is already stored"""
+        alert_id = alert["id"]
+        bar = bar_key(alert)
+        if alert_id in self._by_id or bar in self._bars:
+            self.duplicates += 1
+            return False
+        self._bars.add(bar)
+        ts = to_epoch(alert["created_at"])
+        self._by_id[alert_id] = alert
+        self._epoch[alert_id] = ts
+        self._timeline.add(ts, alert_id)
+
+        symbol = alert["symbol"].lower()
+        self._symbol_names.setdefault(symbol, alert["symbol"])
+        self._by_symbol.setdefault(symbol, TimeIndex()).add(ts, alert_id)
+        handle = (alert.get("source_handle") or "").lower()
+        self._by_handle.setdefault(handle, TimeIndex()).add(ts, alert_id)
+
+        self.expire()
+        return True
+
+    def _evict_oldest(self):
+        ts, alert_id = self._timeline.popleft()
+        alert = self._by_id.pop(alert_id)
+        del self._epoch[alert_id]
+        self._bars.discard(bar_key(alert))
+
+        # The globally oldest alert is also the oldest in its own indexes
+        symbol = alert["symbol"].lower()
+        index = self._by_symbol[symbol]
+        index.popleft()
+        if not index:
+            del self._by_symbol[symbol]
+            del self._symbol_names[symbol]
+        handle = (alert.get("source_handle") or "").lower()
+        index = self._by_handle[handle]
+        index.popleft()
+        if not index:
+            del self._by_handle[handle]
+
+        self.evicted += 1
+        if self.spill is not None:
+            self.spill.write(alert)
+
+    def expire(self, now: Optional[float] = None):
+        """Evict alerts beyond the count limit or older than the age limit"""
+        if self.max_alerts is not None:
+            while len(self._timeline) > self.max_alerts:
+                self._evict_oldest()
+        if self.max_age_seconds is not None:
+            cutoff = (time.time() if now is None else now) - self.max_age_seconds
+            oldest = self._timeline.oldest()
+            while oldest is not None and oldest[0] < cutoff:
+                self._evict_oldest()
+                oldest = self._timeline.oldest()
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        self.expire()
+        return self._by_id.get(alert_id)
+
+    def epoch(self, alert_id: str) -> float:
+        return self._epoch[alert_id]
+
+    def query(
+        self,
+        symbol: Optional[str] = None,
+        handle: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: int = 100,
+        before: Optional[Tuple[float, str]] = None,
+    ) -> List[Dict]:
+        """
+        Most recent alerts first matching all given filters. `before` is a
+        (created epoch, id) keyset cursor: only older alerts are returned.
+        """
+        self.expire()
+        index = self._timeline
+        check_symbol = check_handle = None
+        if symbol is not None or handle is not None:
+            sym_index = (
+                self._by_symbol.get(symbol.lower(), TimeIndex())
+                if symbol is not None
+                else None
+            )
+            handle_index = (
+                self._by_handle.get(handle.lower(), TimeIndex())
+                if handle is not None
+                else None
+            )
+            # Walk the smaller index and check the other filter per record
+            if handle_index is None or (
+                sym_index is not None and len(sym_index) <= len(handle_index)
+            ):
+                index = sym_index
+                check_handle = handle.lower() if handle is not None else None
+            else:
+                index = handle_index
+                check_symbol = symbol.lower() if symbol is not None else None
+
+        lo, hi = index.bounds(start, end, before)
+        # bounds() is already offset past evicted entries
+        keys = index.keys
+        result = []
+        for i in range(hi - 1, lo - 1, -1):
+            if len(result) >= limit:
+                break
+            alert = self._by_id[keys[i][1]]
+            if check_symbol is not None and alert["symbol"].lower() != check_symbol:
+                continue
+            if (
+                check_handle is not None
+                and (alert.get("source_handle") or "").lower() != check_handle
+            ):
+                continue
+            result.append(alert)
+        return result
+
+    def recent(self, n: int) -> List[Dict]:
+        """The last n alerts, oldest first"""
+        self.expire()
+        return [self._by_id[k[1]] for k in self._timeline.tail(n)]
+
+    def count_since(self, start: float) -> int:
+        self.expire()
+        return self._timeline.count(start)
+
+    def symbol_counts(self, start: Optional[float] = None) -> Dict[str, int]:
+        """Alert count per symbol since start, one bisect per symbol"""
+        self.expire()
+        counts = {}
+        for key, index in self._by_symbol.items():
+            n = index.count(start)
+            if n:
+                counts[self._symbol_names[key]] = n
+        return counts
+
+    def stats(self) -> Dict:
+        self.expire()
+        return {
+            "backend": "memory",
+            "alerts": len(self._by_id),
+            "evicted": self.evicted,
+            "duplicates": self.duplicates,
+            "spilled": self.spill.written if self.spill is not None else 0,
+        }
@@ -0,0 +1,240 @@
+import os
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# One fixed-size record per bar; epoch seconds are the exchange-local bar
+# time read as UTC, matching the datetime strings the API returns
+BAR_FIELDS = [
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<i8"),
+]
+# Bytes per record, known without importing numpy
+BAR_SIZE = sum(int(fmt[2:]) for _, fmt in BAR_FIELDS)
+
+
+@lru_cache(maxsize=None)
+def bar_dtype() -> "np.dtype":
+    """numpy dtype of BAR_FIELDS; numpy is imported with the first bar read"""
+    import numpy as np
+
+    return np.dtype(BAR_FIELDS)
+
+
+# File names keep tickers such as M&M.NSE intact
+_UNSAFE_RE = re.compile(r"[^A-Z0-9&_.-]")
+
+
+def bars_from_values(values: List[Dict]) -> "np.ndarray":
+    """Structured bars from oldest-first Twelve Data bar dicts"""
+    import numpy as np
+
+    bars = np.empty(len(values), dtype=bar_dtype())
+    if not values:
+        return bars
+    bars["ts"] = np.array(
+        [v["datetime"] for v in values], dtype="datetime64[s]"
+    ).astype("<i8")
+    for field in ("open", "high", "low", "close"):
+        bars[field] = [float(v.get(field) or v["close"]) for v in values]
+    bars["volume"] = [int(float(v.get("volume") or 0)) for v in values]
+    return bars
+
+
+def bars_from_closes(
+    timestamps: List[str], closes: List[float], volumes: List[float]
+) -> "np.ndarray":
+    """Structured bars when only closes are known; open, high and low = close"""
+    import numpy as np
+
+    bars = np.empty(len(closes), dtype=bar_dtype())
+    bars["ts"] = np.array(timestamps, dtype="datetime64[s]").astype("<i8")
+    for field in ("open", "high", "low", "close"):
+        bars[field] = closes
+    bars["volume"] = volumes
+    return bars
+
+
+def values_from_bars(bars: "np.ndarray", daily: bool = False) -> List[Dict]:
+    """Inverse of bars_from_values; daily bars get date-only datetimes"""
+    import numpy as np
+
+    stamps = bars["ts"].astype("datetime64[s]")
+    if daily:
+        datetimes = np.datetime_as_string(stamps.astype("datetime64[D]"))
+    else:
+        datetimes = np.char.replace(np.datetime_as_string(stamps), "T", " ")
+    return [
+        {
+            "datetime": str(dt),
+            "open": str(o),
+            "high": str(h),
+            "low": str(lo),
+            "close": str(c),
+            "volume": str(v),
+        }
+        for dt, o, h, lo, c, v in zip(
+            datetimes,
+            bars["open"].tolist(),
+            bars["high"].tolist(),
+            bars["low"].tolist(),
+            bars["close"].tolist(),
+            bars["volume"].tolist(),
+        )
+    ]
+
+
+class BarSeries:
+    """
+    Bars of one symbol and interval in an append-only file of BAR_FIELDS
+    records. Reads are slices of a read-only memory map, so they cost no
+    copy and no resident memory beyond the pages actually touched.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        mode = "r+b" if os.path.exists(path) else "w+b"
+        self._file = open(path, mode)
+        size = os.fstat(self._file.fileno()).st_size
+        self._count = size // BAR_SIZE
+        if size % BAR_SIZE:
+            # A write torn by a crash; drop the partial record
+            self._file.truncate(self._count * BAR_SIZE)
+        self._map: Optional["np.ndarray"] = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def modified(self) -> float:
+        """Epoch seconds of the last write, i.e. when the bars were fetched"""
+        return os.fstat(self._file.fileno()).st_mtime
+
+    def last_ts(self) -> Optional[int]:
+        return int(self.view()["ts"][-1]) if self._count else None
+
+    def append(self, bars: "np.ndarray") -> int:
+        """
+        Append bars newer than the last stored one; a bar at the last stored
+        time replaces it (it may still have been forming). Returns the
+        number of bars written.
+        """
+        last = self.last_ts()
+        if last is not None:
+            bars = bars[bars["ts"] >= last]
+        if not len(bars):
+            return 0
+        offset = self._count
+        if last is not None and bars["ts"][0] == last:
+            offset -= 1
+        self._file.seek(offset * BAR_SIZE)
+        self._file.write(bars.astype(bar_dtype(), copy=False).tobytes())
+        self._file.flush()
+        self._count = offset + len(bars)
+        return len(bars)
+
+    def view(self) -> "np.ndarray":
+        """All stored bars, oldest first, as a read-only memory-mapped array"""
+        import numpy as np
+
+        if not self._count:
+            return np.empty(0, dtype=bar_dtype())
+        if self._map is None or len(self._map) != self._count:
+            # Earlier maps stay valid for readers still holding them
+            self._map = np.memmap(
+                self.path, dtype=bar_dtype(), mode="r", shape=(self._count,)
+            )
+        return self._map
+
+    def tail(self, n: int) -> "np.ndarray":
+        return self.view()[-n:] if n > 0 else self.view()[:0]
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None):
+        """Bars with start <= ts < end, found by binary search on ts"""
+        bars = self.view()
+        lo = 0 if start is None else bars["ts"].searchsorted(start, "left")
+        hi = len(bars) if end is None else bars["ts"].searchsorted(end, "left")
+        return bars[lo:hi]
+
+    def close(self):
+        self._map = None
+        if not self._file.closed:
+            self._file.close()
+
+
+class BarStore:
+    """
+    Per-symbol, per-interval bar history on disk under `root`, one
+    BarSeries file each. At most `max_open` files are kept open, least
+    recently used closed first.
+    """
+
+    def __init__(self, root: str, max_open: int = 256):
+        self.root = root
+        self.max_open = max_open
+        os.makedirs(root, exist_ok=True)
+        self._open: "OrderedDict[Tuple[str, str], BarSeries]" = OrderedDict()
+
+        self.appended = 0
+
+    def _path(self, symbol: str, interval: str) -> str:
+        name = _UNSAFE_RE.sub("_", symbol.upper())
+        return os.path.join(self.root, f"{name}__{interval}.bars")
+
+    def exists(self, symbol: str, interval: str) -> bool:
+        key = (symbol.upper(), interval)
+        return key in self._open or os.path.exists(self._path(symbol, interval))
+
+    def symbols(self, interval: str) -> List[str]:
+        """Symbols with stored bars for interval"""
+        suffix = f"__{interval}.bars"
+        return sorted(
+            f[: -len(suffix)] for f in os.listdir(self.root) if f.endswith(suffix)
+        )
+
+    def series(self, symbol: str, interval: str) -> BarSeries:
+        key = (symbol.upper(), interval)
+        series = self._open.get(key)
+        if series is None:
+            series = self._open[key] = BarSeries(self._path(symbol, interval))
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)[1].close()
+        else:
+            self._open.move_to_end(key)
+        return series
+
+    def append(self, symbol: str, interval: str, bars: "np.ndarray") -> int:
+        written = self.series(symbol, interval).append(bars)
+        self.appended += written
+        return written
+
+    def tail(self, symbol: str, interval: str, n: int) -> "np.ndarray":
+        if not self.exists(symbol, interval):
+            import numpy as np
+
+            return np.empty(0, dtype=bar_dtype())
+        return self.series(symbol, interval).tail(n)
+
+    def close(self):
+        while self._open:
+            self._open.popitem()[1].close()
+
+    def stats(self) -> Dict:
+        files = [f for f in os.listdir(self.root) if f.endswith(".bars")]
+        size = sum(os.path.getsize(os.path.join(self.root, f)) for f in files)
+        return {
+            "root": self.root,
+            "series": len(files),
+            "open": len(self._open),
+            "bars": size // BAR_SIZE,
+            "bytes": size,
+            "appended": self.appended,
+        }
@@ -0,0 +1,584 @@
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import uuid
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+QUICK_SIZES = (1000, 10000)
+# Spawn to first /health answer; autoscaled workers must serve within this
+STARTUP_BUDGET_MS = 1500.0
+
+# Benchmarks run against the in-process app without external services:
+# mock market data, no database, ML in threads and no alert eviction
+BENCH_ENV = {
+    "TWELVEDATA_API_KEY": "",
+    "DATABASE_URL": "",
+    "CPU_POOL_KIND": "thread",
+    "ALERT_MAX_COUNT": str(2 * DEFAULT_SIZES[-1]),
+    "ALERT_SPILL_PATH": "",
+    "BAR_STORE_DIR": "",
+    "WATCHLIST": "",
+    "WARMUP": "0",
+}
+
+
+def load_app():
+    """Import the API module with the benchmark environment"""
+    for key, value in BENCH_ENV.items():
+        os.environ[key] = value
+    import main
+
+    return main
+
+
+def seed_all(seed: int):
+    # The mock generators draw from the global random and NumPy generators
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def synthetic_bars(main, periods: int, seed: int):
+    """Reproducible (timestamps, prices, volumes) from the mock-data path"""
+    seed_all(seed)
+    return main.generate_mock_bars(periods)
+
+
+def synthetic_messages(main, count: int, seed: int) -> List[str]:
+    """Reproducible mix of pump and ordinary messages from the social simulator"""
+    seed_all(seed)
+    symbols = ["RELIANCE.NSE", "TCS.NSE", "INFY.NSE", "HDFCBANK.NSE", "ITC.NSE"]
+    messages: List[str] = []
+    for level in itertools.cycle(("low", "medium", "high")):
+        for signal in main.generate_social_signals(random.choice(symbols), level):
+            messages.append(signal["message"])
+        if len(messages) >= count:
+            return messages[:count]
+
+
+def synthetic_alerts(main, count: int, seed: int, span_hours: float = 23):
+    """
+    Alerts shaped like build_alert output, oldest first and spread evenly
+    over the last span_hours so that the whole batch stays within retention
+    """
+    seed_all(seed)
+    symbols = [f"SYM{i:03d}.NSE" for i in range(200)]
+    handles = ["pump_signals_vip", "unknown_handle_123", "market_insider_pro"]
+    reasons = list(main.THREAT_WEIGHTS)
+    start = datetime.datetime.utcnow() - datetime.timedelta(hours=span_hours)
+    step = span_hours * 3600 / max(count, 1)
+    metadata = {"ewma_zscore": 3.1, "volume_ratio": 4.2, "momentum_score": 1.5}
+    for i in range(count):
+        created = start + datetime.timedelta(seconds=i * step)
+        yield {
+            "id": str(uuid.UUID(int=random.getrandbits(128))),
+            "symbol": random.choice(symbols),
+            "interval": "1min",
+            "price": round(random.uniform(100, 3000), 2),
+            "volume": random.randint(10000, 500000),
+            "time": created.isoformat(),
+            "reason": random.choice(reasons),
+            "severity_level": random.randint(1, 4),
+            "manipulation_confidence": round(random.uniform(10, 95), 1),
+            "source_handle": random.choice(handles),
+            "trust_score": random.randint(5, 95),
+            "registered": False,
+            "risk_level": "High",
+            "ml_score": 0.1,
+            "ml_flag": False,
+            "social_signals_count": 3,
+            "trigger_message": "",
+            "created_at": created.isoformat(),
+            # Shared between records to keep a million alerts within memory
+            "analysis_metadata": metadata,
+        }
+
+
+# Run in a fresh interpreter; argv[1] is the parent's time.time() at spawn
+_STARTUP_SCRIPT = """
+import asyncio, json, sys, time
+
+spawned = float(sys.argv[1])
+start = time.perf_counter()
+import main
+
+imported = time.perf_counter()
+
+
+async def boot():
+    import httpx
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://b") as c:
+            (await c.get("/health")).raise_for_status()
+            health = time.time() - spawned
+            while not main.warmup_state["done"]:
+                await asyncio.sleep(0.01)
+            return health, time.time() - spawned
+
+
+health, warm = asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - start) * 1e3,
+    "first_health_ms": health * 1e3,
+    "warm_ms": warm * 1e3,
+}))
+"""
+
+
+def startup_benchmark(runs: int, budget_ms: float = STARTUP_BUDGET_MS) -> Dict:
+    """
+    Cold start of the API in fresh interpreters: importing main, the first
+    /health answer and the end of the background warm-up, all medians
+    """
+    env = {**os.environ, **BENCH_ENV, "WARMUP": "1"}
+    samples: List[Dict] = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", _STARTUP_SCRIPT, str(time.time())],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    result: Dict = {"runs": runs}
+    for key in ("import_ms", "first_health_ms", "warm_ms"):
+        result[key] = round(statistics.median(s[key] for s in samples), 1)
+    result["budget_ms"] = budget_ms
+    result["within_budget"] = result["first_health_ms"] <= budget_ms
+    return result
+
+
+def measure(fn: Callable, repeat: int = 5) -> Dict:
+    """Per-call timings of fn, timeit-style: calls per run sized to ~0.2s"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    per_call = [t / number for t in timer.repeat(repeat, number)]
+    median = statistics.median(per_call)
+    return {
+        "calls": number * repeat,
+        "min_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(median * 1e6, 3),
+        "ops_per_second": round(1 / median, 1) if median else None,
+    }
+
+
+def micro_benchmarks(main, seed: int, repeat: int) -> Dict[str, Dict]:
+    import ml_scoring
+    from scan import score_matrix
+    from resample import MultiTimeframeDetector
+    from streaming import StreamingAnomalyDetector
+
+    timestamps, prices, volumes = synthetic_bars(main, 200, seed)
+    messages = itertools.cycle(synthetic_messages(main, 500, seed))
+    handles = itertools.cycle([f"handle_{i}" for i in range(1000)])
+
+    detector = StreamingAnomalyDetector(window=60, span=12)
+    detector.sync(timestamps, prices, volumes)
+    bar = itertools.cycle(zip(prices, volumes))
+
+    def detector_update():
+        price, volume = next(bar)
+        detector.update(price, volume)
+
+    frames = MultiTimeframeDetector()
+    minutes = itertools.count(0, 60)
+
+    def timeframes_update():
+        price, volume = next(bar)
+        frames.update(next(minutes), price, price, price, price, volume)
+
+    P = np.array([synthetic_bars(main, 60, seed + i)[1] for i in range(500)])
+    V = np.array([synthetic_bars(main, 60, seed + i)[2] for i in range(500)])
+    model_key = ("BENCH.NSE", "1min")
+    ml_scoring.compute_ml_isolation_forest(prices, volumes, model_key)
+
+    cases = {
+        "compute_ewma_anomaly": lambda: main.compute_ewma_anomaly(prices, span=12),
+        "compute_volume_anomaly": lambda: main.compute_volume_anomaly(volumes),
+        "compute_price_momentum_anomaly": lambda: main.compute_price_momentum_anomaly(
+            prices
+        ),
+        "streaming_detector_update": detector_update,
+        "multi_timeframe_update": timeframes_update,
+        "score_matrix_500x60": lambda: score_matrix(P, V, span=12),
+        "compute_ml_isolation_forest": lambda: ml_scoring.compute_ml_isolation_forest(
+            prices, volumes
+        ),
+        "compute_ml_isolation_forest_cached": (
+            lambda: ml_scoring.compute_ml_isolation_forest(prices, volumes, model_key)
+        ),
+        "analyze_sentiment_and_manipulation": (
+            lambda: main.analyze_sentiment_and_manipulation(next(messages))
+        ),
+        "extract_manipulation_keywords": (
+            lambda: main.extract_manipulation_keywords(next(messages))
+        ),
+        "extract_entities": lambda: main.extract_entities(next(messages)),
+        "compute_trust": lambda: main.compute_trust(next(handles), next(messages)),
+        "score_trust_cached": lambda: main.score_trust("pump_signals_vip", "buy now"),
+        "classify_risk": lambda: main.classify_risk(3.2, 4.1, True, []),
+        "near_duplicates_add": lambda: main.near_duplicates.add(
+            next(messages), ["TCS"]
+        ),
+    }
+    results = {}
+    for name, fn in cases.items():
+        results[name] = measure(fn, repeat)
+        print(f"  {name}: {results[name]['median_us']} us", file=sys.stderr)
+    return results
+
+
+async def load_test(
+    client, path: str, params: Optional[Dict], requests: int, concurrency: int
+) -> Dict:
+    """Latency percentiles of `requests` calls issued `concurrency` at a time"""
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(n: int):
+        nonlocal errors
+        for _ in range(n):
+            start = time.perf_counter()
+            res = await client.get(path, params=params)
+            latencies.append(time.perf_counter() - start)
+            if res.status_code >= 400:
+                errors += 1
+
+    per_worker = max(1, requests // concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    ordered = sorted(latencies)
+
+    def pct(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e3, 3)
+
+    return {
+        "requests": len(ordered),
+        "concurrency": concurrency,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1e3, 3),
+        "requests_per_second": round(len(ordered) / elapsed, 1),
+        "errors": errors,
+    }
+
+
+async def endpoint_benchmarks(
+    main, sizes: List[int], seed: int, requests: int, concurrency: int
+) -> Dict:
+    import httpx
+
+    # Endpoints whose cost does not depend on the number of stored alerts
+    static = {
+        "/health": None,
+        "/social_analysis": {"symbol": "RELIANCE.NSE"},
+        "/fetch_live": {"symbol": "RELIANCE.NSE"},
+        "/scan": {"symbols": ",".join(f"SYM{i:03d}.NSE" for i in range(50))},
+    }
+    # Endpoints that read the alert store, measured at every size
+    by_size = {
+        "/alerts": {"limit": 100},
+        "/alerts?symbol": {"symbol": "SYM007.NSE", "limit": 100},
+        "/alerts?since_hours": {"since_hours": 1, "limit": 100},
+        "/threat_score": None,
+        "/leaderboard": None,
+    }
+
+    results: Dict = {"static": {}, "by_alert_count": {}}
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for name, params in static.items():
+                # Detection endpoints run the ML model; fewer calls keep it short
+                n = requests if name in ("/health", "/social_analysis") else 20
+                results["static"][name] = await load_test(
+                    client, name, params, n, min(concurrency, n)
+                )
+                print(
+                    f"  {name}: {results['static'][name]['p50_ms']} ms", file=sys.stderr
+                )
+
+            alerts = synthetic_alerts(main, max(sizes), seed)
+            stored = 0
+            for size in sorted(sizes):
+                start = time.perf_counter()
+                for alert in itertools.islice(alerts, size - stored):
+                    main.record_alert(alert, persist=False)
+                stored = size
+                fill = time.perf_counter() - start
+                level = results["by_alert_count"][str(size)] = {
+                    "alerts_stored": len(main.alerts),
+                    "insert_us_per_alert": round(fill / size * 1e6, 3),
+                }
+                for name, params in by_size.items():
+                    path = name.split("?")[0]
+                    level[name] = await load_test(
+                        client, path, params, requests, concurrency
+                    )
+                    print(
+                        f"  {size} alerts {name}: {level[name]['p50_ms']} ms",
+                        file=sys.stderr,
+                    )
+    return results
+
+
+def _state_worker(path: str, alerts: List[Dict], barrier, results):
+    """One worker process of shared_state_check"""
+    os.environ.update({"STATE_BACKEND": "sqlite", "STATE_PATH": path})
+    main = load_app()
+    barrier.wait()
+    start = time.perf_counter()
+    for alert in alerts:
+        main.record_alert(alert)
+    elapsed = time.perf_counter() - start
+    added = len(alerts) - main.alerts.duplicates
+    # Read only once every worker has written everything
+    barrier.wait()
+
+    async def views():
+        import httpx
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://b") as c:
+            threat = (await c.get("/threat_score")).json()
+            threat["details"]["assessment_time"] = None
+            board = (await c.get("/leaderboard")).json()
+            ids = [a["id"] for a in (await c.get("/alerts?limit=100000")).json()]
+            return threat, board, ids
+
+    threat, board, ids = asyncio.run(views())
+    results.put(
+        {
+            "added": added,
+            "seconds": elapsed,
+            "threat_score": threat,
+            "leaderboard": board,
+            "alert_ids": ids,
+        }
+    )
+
+
+def shared_state_check(main, workers: int, count: int, seed: int) -> Dict:
+    """
+    Several worker processes on one STATE_BACKEND=sqlite file. Each alert
+    is raised by two workers under different ids, as when every worker
+    watches the same symbols; all must store it once and then return the
+    same /alerts, /threat_score and /leaderboard.
+    """
+    alerts = list(synthetic_alerts(main, count, seed))
+    shares: List[List[Dict]] = [[] for _ in range(workers)]
+    for i, alert in enumerate(alerts):
+        for w in {i % workers, (i + 1) % workers}:
+            shares[w].append({**alert, "id": str(uuid.uuid4())})
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        barrier = ctx.Barrier(workers)
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=_state_worker, args=(path, share, barrier, results))
+            for share in shares
+        ]
+        for proc in procs:
+            proc.start()
+        outputs = [results.get(timeout=600) for _ in procs]
+        for proc in procs:
+            proc.join()
+
+    first = outputs[0]
+    consistent = all(
+        out[k] == first[k]
+        for out in outputs
+        for k in ("threat_score", "leaderboard", "alert_ids")
+    )
+    written = sum(len(share) for share in shares)
+    return {
+        "workers": workers,
+        "alerts": count,
+        "writes": written,
+        "stored": sum(out["added"] for out in outputs),
+        "insert_us_per_alert": round(
+            max(out["seconds"] for out in outputs) / written * 1e6, 3
+        ),
+        "consistent": consistent and len(first["alert_ids"]) == count,
+    }
+
+
+def metadata(seed: int) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    import sklearn
+    import pandas as pd
+
+    return {
+        "commit": commit or None,
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "seed": seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def _flatten(report: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in report.items():
+        if key == "meta":
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+# Metrics where a higher value is an improvement; all other timings are costs
+_HIGHER_IS_BETTER = ("ops_per_second", "requests_per_second")
+_COMPARED = ("median_us", "p50_ms", "p95_ms", "p99_ms", "insert_us_per_alert")
+_COMPARED += ("import_ms", "first_health_ms", "warm_ms")
+
+
+def compare(old: Dict, new: Dict, threshold: float = 10.0) -> List[Dict]:
+    """
+    Relative change of every latency metric present in both reports;
+    regressions are changes for the worse beyond threshold percent
+    """
+    before, after = _flatten(old), _flatten(new)
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        metric = key.rsplit(".", 1)[-1]
+        if metric not in _COMPARED + _HIGHER_IS_BETTER or not before[key]:
+            continue
+        change = (after[key] - before[key]) / before[key] * 100
+        worse = -change if metric in _HIGHER_IS_BETTER else change
+        rows.append(
+            {
+                "metric": key,
+                "before": before[key],
+                "after": after[key],
+                "change_percent": round(change, 1),
+                "regression": worse > threshold,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None):
+    """Benchmark detection functions and API endpoints, or compare two runs"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("-o", "--output", help="write the JSON report here")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sizes", help="alert store sizes, e.g. 1000,10000")
+    parser.add_argument("--quick", action="store_true", help="small sizes, fewer runs")
+    parser.add_argument(
+        "--only", choices=("startup", "micro", "endpoints", "shared-state")
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="processes for the shared-state check"
+    )
+    parser.add_argument(
+        "--startup-budget",
+        type=float,
+        default=STARTUP_BUDGET_MS,
+        help="milliseconds from spawn to the first /health answer",
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, encoding="utf-8") as f:
+                reports.append(json.load(f))
+        rows = compare(*reports, threshold=args.threshold)
+        for row in rows:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(
+                f"{row['metric']:<60} {row['before']:>12} {row['after']:>12} "
+                f"{row['change_percent']:>+8.1f}%{flag}"
+            )
+        sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+    sizes = (
+        [int(s) for s in args.sizes.split(",") if s.strip()]
+        if args.sizes
+        else list(QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    )
+    repeat = 3 if args.quick else 5
+    requests = min(args.requests, 50) if args.quick else args.requests
+
+    app = load_app()
+    report: Dict = {"meta": metadata(args.seed)}
+    if args.only in (None, "startup"):
+        print("startup", file=sys.stderr)
+        startup = report["startup"] = startup_benchmark(repeat, args.startup_budget)
+        print(
+            f"  first /health: {startup['first_health_ms']} ms"
+            f" (budget {startup['budget_ms']} ms)",
+            file=sys.stderr,
+        )
+    if args.only in (None, "micro"):
+        print("micro-benchmarks", file=sys.stderr)
+        report["micro"] = micro_benchmarks(app, args.seed, repeat)
+    if args.only in (None, "endpoints"):
+        print("endpoints", file=sys.stderr)
+        report["endpoints"] = asyncio.run(
+            endpoint_benchmarks(app, sizes, args.seed, requests, args.concurrency)
+        )
+
+    if args.only in (None, "shared-state"):
+        print("shared state", file=sys.stderr)
+        shared = report["shared_state"] = shared_state_check(
+            app, args.workers, 1000 if args.quick else 10000, args.seed
+        )
+        print(f"  consistent: {shared['consistent']}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if "shared_state" in report and not report["shared_state"]["consistent"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+class StreamClosed(Exception):
+    """The subscriber fell too far behind and was disconnected"""
+
+
+class Subscription:
+    """
+    One connected client. Events queue up to `max_queue`; when a slow client
+    lets the queue fill, the oldest events are dropped, and after
+    `max_dropped` drops the subscription is closed.
+    """
+
+    def __init__(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        max_queue: int = 256,
+        max_dropped: int = 1000,
+    ):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.max_dropped = max_dropped
+        self.dropped = 0
+        self.closed = False
+        self.set_symbols(symbols)
+
+    def set_symbols(self, symbols: Optional[Iterable[str]]):
+        cleaned = {s.strip().upper() for s in (symbols or []) if s and s.strip()}
+        # None means every symbol
+        self.symbols: Optional[Set[str]] = cleaned or None
+
+    def wants(self, symbol: Optional[str]) -> bool:
+        return symbol is None or self.symbols is None or symbol.upper() in self.symbols
+
+    def offer(self, message: Tuple[str, str]):
+        if self.closed:
+            return
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                self.dropped += 1
+                if self.dropped > self.max_dropped:
+                    self.closed = True
+                    return
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        """Next (event, JSON data) message, or None if none arrived in time"""
+        if self.closed and self.queue.empty():
+            raise StreamClosed()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            if self.closed:
+                raise StreamClosed()
+            return None
+
+
+class Broadcaster:
+    """
+    Fan-out of server events to stream subscribers. Event data is JSON
+    encoded once per publish, not per subscriber. publish never blocks, so
+    it is safe to call from the request path; use it from the event loop.
+    """
+
+    def __init__(
+        self, max_clients: int = 500, max_queue: int = 256, max_dropped: int = 1000
+    ):
+        self.max_clients = max_clients
+        self.max_queue = max_queue
+        self.max_dropped = max_dropped
+        self._subs: Set[Subscription] = set()
+        self.published = 0
+        self.disconnected_slow = 0
+
+    def __len__(self):
+        return len(self._subs)
+
+    def subscribe(
+        self, symbols: Optional[Iterable[str]] = None
+    ) -> Optional[Subscription]:
+        if len(self._subs) >= self.max_clients:
+            return None
+        sub = Subscription(symbols, self.max_queue, self.max_dropped)
+        self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self._subs.discard(sub)
+
+    def publish(self, event: str, data, symbol: Optional[str] = None):
+        if not self._subs:
+            return
+        message = (event, json.dumps(data, default=str))
+        self.published += 1
+        for sub in list(self._subs):
+            if sub.wants(symbol):
+                sub.offer(message)
+                if sub.closed:
+                    self._subs.discard(sub)
+                    self.disconnected_slow += 1
+
+    def stats(self) -> Dict:
+        return {
+            "clients": len(self._subs),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in self._subs),
+            "disconnected_slow": self.disconnected_slow,
+        }
@@ -0,0 +1,256 @@
+import heapq
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Optional, Set, Tuple
+
+from social_ingest import symbol_key
+
+
+class _Burst:
+    """
+    Messages about one symbol within the burst window, in a heap by their
+    own timestamp so late arrivals still expire in timestamp order
+    """
+
+    __slots__ = ("events", "handles", "platforms")
+
+    def __init__(self):
+        self.events: list = []
+        self.handles: Counter = Counter()
+        self.platforms: Counter = Counter()
+
+    def add(self, ts: float, handle: str, platform: str):
+        heapq.heappush(self.events, (ts, handle, platform))
+        self.handles[handle] += 1
+        self.platforms[platform] += 1
+
+    def expire(self, cutoff: float):
+        events = self.events
+        while events and events[0][0] < cutoff:
+            _, handle, platform = heapq.heappop(events)
+            for counter, key in ((self.handles, handle), (self.platforms, platform)):
+                counter[key] -= 1
+                if not counter[key]:
+                    del counter[key]
+
+
+class CoordinationGraph:
+    """
+    Sliding-window bipartite graph of handles and the symbols they post
+    about, for spotting coordinated pump groups.
+
+    Connected clusters are kept in a union-find structure that is updated
+    on every new handle-symbol edge. Union-find cannot split, so links that
+    expire out of the window are compacted away by rebuilding from the live
+    edges. That happens once expired links reach half the live ones, or
+    `rebuild_seconds` after the first expiry, so the cost is amortized and
+    clusters lag expiry by at most that long.
+
+    Per symbol, the handles and channels that posted within the last
+    `burst_seconds` measure co-posting bursts and their timing spread.
+
+    Messages may arrive out of order. In the graph each one expires relative
+    to the newest timestamp seen when it arrived, so expiry order is arrival
+    order: a late message lives on until the newer ones before it expire,
+    and never pushes live entries out early. Bursts keep each message's own
+    timestamp (capped at the current time), so a burst never spans more
+    than `burst_seconds`. Messages already older than the window (or, for
+    bursts, than `burst_seconds`) are ignored.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 3600,
+        burst_seconds: float = 300,
+        min_burst_handles: int = 3,
+        rebuild_seconds: float = 30,
+    ):
+        self.window_seconds = window_seconds
+        self.burst_seconds = burst_seconds
+        self.min_burst_handles = min_burst_handles
+        self.rebuild_seconds = rebuild_seconds
+
+        self._events: deque = deque()
+        self._edges: Counter = Counter()
+        self._handle_platforms: Dict[str, Counter] = {}
+        self._bursts: Dict[str, _Burst] = {}
+        # Ingestion adds from a worker thread while requests read
+        self._lock = threading.Lock()
+        self._reset_clusters()
+        self._stale = 0
+        self._stale_since: Optional[float] = None
+        # Expiry key of the newest message so far; keys never decrease
+        self._latest = float("-inf")
+
+        self.rebuilds = 0
+        self.late = 0
+
+    def _reset_clusters(self):
+        self._parent: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        # root -> [handles, symbols] in its cluster
+        self._sizes: Dict[Tuple[str, str], list] = {}
+        self._platforms: Dict[Tuple[str, str], Set[str]] = {}
+
+    def _find(self, node):
+        parent = self._parent
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def _node(self, node):
+        if node not in self._parent:
+            self._parent[node] = node
+            self._sizes[node] = [1, 0] if node[0] == "h" else [0, 1]
+            self._platforms[node] = set()
+        return node
+
+    def _union(self, a, b):
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return
+        sa, sb = self._sizes[a], self._sizes[b]
+        # Union by size, merging the smaller platform set into the larger
+        if sa[0] + sa[1] < sb[0] + sb[1]:
+            a, b, sa, sb = b, a, sb, sa
+        self._parent[b] = a
+        sa[0] += sb[0]
+        sa[1] += sb[1]
+        self._platforms[a] |= self._platforms.pop(b)
+        del self._sizes[b]
+
+    def _rebuild(self, now: float):
+        self._reset_clusters()
+        for handle, symbol in self._edges:
+            self._union(self._node(("h", handle)), self._node(("s", symbol)))
+        for handle, platforms in self._handle_platforms.items():
+            self._platforms[self._find(("h", handle))].update(platforms)
+        cutoff = now - self.burst_seconds
+        for burst in self._bursts.values():
+            burst.expire(cutoff)
+        for symbol in [s for s, b in self._bursts.items() if not b.events]:
+            del self._bursts[symbol]
+        self._stale = 0
+        self._stale_since = None
+        self.rebuilds += 1
+
+    def _expire(self, now: float):
+        cutoff = now - self.window_seconds
+        events = self._events
+        while events and events[0][0] < cutoff:
+            _, _, handle, symbol, platform = events.popleft()
+            edge = (handle, symbol)
+            self._edges[edge] -= 1
+            if not self._edges[edge]:
+                del self._edges[edge]
+                self._stale += 1
+                if self._stale_since is None:
+                    self._stale_since = time.monotonic()
+            platforms = self._handle_platforms[handle]
+            platforms[platform] -= 1
+            if not platforms[platform]:
+                del platforms[platform]
+                if not platforms:
+                    del self._handle_platforms[handle]
+        if self._stale and (
+            self._stale > max(64, len(self._edges) // 2)
+            or time.monotonic() - self._stale_since > self.rebuild_seconds
+        ):
+            self._rebuild(now)
+
+    def add(
+        self,
+        handle: str,
+        symbol: str,
+        ts: Optional[float] = None,
+        platform: str = "Unknown",
+    ):
+        now = time.time()
+        ts = now if ts is None else ts
+        if ts < now - self.window_seconds or not handle:
+            return
+        handle = handle.lower()
+        symbol = symbol_key(symbol)
+        with self._lock:
+            self._expire(now)
+            # A future timestamp (clock skew) must not hold everything back
+            key = max(min(ts, now), self._latest)
+            if key > ts:
+                self.late += 1
+            self._latest = key
+            self._events.append((key, ts, handle, symbol, platform))
+            edge = (handle, symbol)
+            new_edge = edge not in self._edges
+            self._edges[edge] += 1
+            platforms = self._handle_platforms.setdefault(handle, Counter())
+            new_platform = not platforms[platform]
+            platforms[platform] += 1
+
+            h = self._node(("h", handle))
+            s = self._node(("s", symbol))
+            if new_edge:
+                self._union(h, s)
+            if new_platform:
+                self._platforms[self._find(h)].add(platform)
+
+            ts = min(ts, now)
+            if ts < now - self.burst_seconds:
+                return
+            burst = self._bursts.get(symbol)
+            if burst is None:
+                burst = self._bursts[symbol] = _Burst()
+            burst.add(ts, handle, platform)
+            burst.expire(now - self.burst_seconds)
+
+    def analyze(self, symbol: str, now: Optional[float] = None) -> Dict:
+        """Coordination evidence around one symbol"""
+        now = time.time() if now is None else now
+        key = symbol_key(symbol)
+        with self._lock:
+            self._expire(now)
+            node = ("s", key)
+            if node in self._parent:
+                root = self._find(node)
+                cluster_handles, cluster_symbols = self._sizes[root]
+                cluster_channels = len(self._platforms[root])
+            else:
+                cluster_handles = cluster_symbols = cluster_channels = 0
+
+            burst = self._bursts.get(key)
+            if burst is not None:
+                burst.expire(now - self.burst_seconds)
+            if burst is not None and burst.events:
+                spread = max(e[0] for e in burst.events) - burst.events[0][0]
+                burst_handles = len(burst.handles)
+                burst_messages = len(burst.events)
+                burst_channels = len(burst.platforms)
+            else:
+                spread = 0.0
+                burst_handles = burst_messages = burst_channels = 0
+
+        coordinated = burst_handles >= self.min_burst_handles
+        return {
+            "cluster_handles": cluster_handles,
+            "cluster_symbols": cluster_symbols,
+            "cluster_channels": cluster_channels,
+            "burst_handles": burst_handles,
+            "burst_messages": burst_messages,
+            "burst_channels": burst_channels,
+            "timing_spread_seconds": round(spread, 1),
+            "coordinated": coordinated,
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "events": len(self._events),
+                "edges": len(self._edges),
+                "handles": len(self._handle_platforms),
+                "clusters": len(self._sizes),
+                "stale_edges": self._stale,
+                "rebuilds": self.rebuilds,
+                "late_messages": self.late,
+            }
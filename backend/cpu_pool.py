@@ -0,0 +1,185 @@
+import asyncio
+import functools
+import itertools
+import multiprocessing
+import time
+import zlib
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class PoolSaturated(Exception):
+    """Raised when `max_pending` calls are already queued or running"""
+
+
+class WorkerCrashed(Exception):
+    """Raised when a worker died during the call; it has been replaced"""
+
+
+class CpuPool:
+    """
+    Runs CPU-bound functions off the event loop on `workers` single-worker
+    executors, either processes or threads. Calls with the same key always go
+    to the same worker, so per-worker state such as fitted models stays warm.
+
+    At most `max_pending` calls may be queued or running at once; further
+    calls fail fast with PoolSaturated, and a call that takes longer than
+    `timeout` raises asyncio.TimeoutError, so callers can degrade instead of
+    waiting. A timed-out call keeps counting as pending until it finishes.
+
+    A worker process that dies (OOM killer, SIGKILL) breaks its executor.
+    The executor is replaced with a fresh one, calls that were on it raise
+    WorkerCrashed, and the symbols routed to it lose their warm state.
+    """
+
+    def __init__(
+        self,
+        kind: str = "process",
+        workers: int = 2,
+        max_pending: int = 32,
+        timeout: float = 10.0,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+    ):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.kind = kind
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._initializer = initializer
+        self._initargs = initargs
+        self._executors: List[Executor] = [
+            self._make_executor(i) for i in range(max(1, workers))
+        ]
+        self._pending = [0] * len(self._executors)
+        self._next = itertools.cycle(range(len(self._executors)))
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.run_seconds = 0.0
+
+    def _make_executor(self, index: int) -> Executor:
+        if self.kind == "process":
+            # spawn, not fork: the parent runs threads and an event loop
+            return ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self._initializer,
+                initargs=self._initargs,
+            )
+        return ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"cpu-{index}",
+            initializer=self._initializer,
+            initargs=self._initargs,
+        )
+
+    def _replace(self, index: int, broken: Executor):
+        # Every call on the broken executor fails at once; only the first
+        # one to get here swaps in the new worker
+        if self._executors[index] is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executors[index] = self._make_executor(index)
+        self.restarts += 1
+        print(f"CPU pool worker {index} died; replaced it")
+
+    def _submit(self, index: int, fn: Callable) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        executor = self._executors[index]
+        try:
+            return loop.run_in_executor(executor, fn)
+        except BrokenExecutor:
+            # Broke before this call was submitted, so it is safe to resend
+            self._replace(index, executor)
+            return loop.run_in_executor(self._executors[index], fn)
+
+    @property
+    def workers(self) -> int:
+        return len(self._executors)
+
+    @property
+    def pending(self) -> int:
+        return sum(self._pending)
+
+    def _worker_for(self, key: Optional[Hashable]) -> int:
+        if key is None:
+            return next(self._next)
+        # crc32 rather than hash(): stable across processes and restarts
+        return zlib.crc32(repr(key).encode()) % len(self._executors)
+
+    def _done(self, index: int, _future):
+        self._pending[index] -= 1
+
+    async def run(self, fn: Callable, *args, key: Optional[Hashable] = None) -> Any:
+        """Run fn(*args) on a worker; fn and args must pickle for processes"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturated("CPU pool saturated")
+        index = self._worker_for(key)
+        future = self._submit(index, functools.partial(fn, *args))
+        executor = self._executors[index]
+        self._pending[index] += 1
+        future.add_done_callback(functools.partial(self._done, index))
+
+        start = time.perf_counter()
+        try:
+            # shield: a timeout abandons the wait, the worker still finishes
+            result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        except BrokenExecutor as e:
+            self.failed += 1
+            self._replace(index, executor)
+            raise WorkerCrashed(f"CPU pool worker {index} died") from e
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        self.run_seconds += time.perf_counter() - start
+        return result
+
+    async def map_workers(self, fn: Callable) -> List[Any]:
+        """Run fn() once on every worker, e.g. to collect per-worker stats"""
+
+        async def call(index: int):
+            executor = self._executors[index]
+            try:
+                return await self._submit(index, fn)
+            except BrokenExecutor:
+                # A dead worker is replaced and asked again
+                self._replace(index, executor)
+                return await self._submit(index, fn)
+
+        return await asyncio.gather(*(call(i) for i in range(self.workers)))
+
+    def shutdown(self):
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "avg_run_ms": (
+                round(self.run_seconds / self.completed * 1000, 3)
+                if self.completed
+                else 0.0
+            ),
+        }
@@ -0,0 +1,150 @@
+import csv
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Words and cashtags; dots split RELIANCE.NSE into ticker and exchange
+TOKEN_RE = re.compile(r"\$?[A-Za-z0-9][A-Za-z0-9&\-]*")
+
+# Trailing words dropped from company names to build the short alias
+NAME_SUFFIXES = {"limited", "ltd", "ltd.", "inc", "corporation", "corp", "plc"}
+
+# Upper-case words common in trading chatter that are also tickers on some
+# exchange. These only match as cashtags ($IDEA), never bare.
+AMBIGUOUS_TICKERS = {
+    "ALL",
+    "BUY",
+    "NOW",
+    "SELL",
+    "HOLD",
+    "TARGET",
+    "URGENT",
+    "ALERT",
+    "BREAKING",
+    "MOON",
+    "IDEA",
+    "GOLD",
+    "BANK",
+    "INDIA",
+}
+
+# CSV column names accepted for the ticker and the company name, covering
+# our own format and the NSE (EQUITY_L.csv) and BSE equity list downloads
+SYMBOL_COLUMNS = ("symbol", "SYMBOL", "Security Id", "ticker")
+NAME_COLUMNS = ("name", "NAME OF COMPANY", "Security Name", "Issuer Name")
+
+_END = ""
+
+
+class EntityIndex:
+    """
+    Known tickers and company-name aliases, matched against a message in a
+    single pass over its tokens. Names live in a word-level trie, so the
+    cost per message depends on its length, not on the dictionary size.
+
+    Recognised forms: cashtags ($TCS, any case), bare tickers written in
+    capitals (TCS), and company names or aliases (tata consultancy services).
+    Multi-word names match in any case. A single-word name must be written
+    capitalized (Reliance, RELIANCE), since many are also ordinary words
+    ("reliance on", "titan of industry"), and never be an AMBIGUOUS_TICKERS
+    word.
+    """
+
+    def __init__(self, min_bare_ticker: int = 3):
+        self.min_bare_ticker = min_bare_ticker
+        self.tickers: Dict[str, str] = {}
+        self._names: Dict = {}
+        self.aliases = 0
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def add(self, symbol: str, name: Optional[str] = None, aliases: Iterable[str] = ()):
+        symbol = symbol.strip().upper()
+        if not symbol:
+            return
+        self.tickers[symbol] = symbol
+        names = list(aliases)
+        if name:
+            names.append(name)
+            words = name.lower().split()
+            while words and words[-1] in NAME_SUFFIXES:
+                words.pop()
+            if words:
+                names.append(" ".join(words))
+        for alias in names:
+            self._add_name(alias, symbol)
+
+    def _add_name(self, alias: str, symbol: str):
+        tokens = [t.lower() for t in TOKEN_RE.findall(alias)]
+        if not tokens:
+            return
+        node = self._names
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if _END not in node:
+            self.aliases += 1
+        node[_END] = symbol
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "EntityIndex":
+        """
+        Load a listings CSV with a symbol and a name column, plus an optional
+        `aliases` column of |-separated alternative names
+        """
+        index = cls(**kwargs)
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                row = {(k or "").strip(): (v or "").strip() for k, v in row.items()}
+                symbol = next((row[c] for c in SYMBOL_COLUMNS if row.get(c)), None)
+                if not symbol:
+                    continue
+                name = next((row[c] for c in NAME_COLUMNS if row.get(c)), None)
+                aliases = [a for a in row.get("aliases", "").split("|") if a.strip()]
+                index.add(symbol, name, aliases)
+        return index
+
+    def extract(self, text: str) -> List[str]:
+        """Symbols mentioned in text, in order of first mention"""
+        tokens = TOKEN_RE.findall(text)
+        lowered = [t.lower() for t in tokens]
+        found: Dict[str, None] = {}
+        i = 0
+        n = len(tokens)
+        while i < n:
+            token = tokens[i]
+            if token[0] == "$":
+                symbol = self.tickers.get(token[1:].upper())
+                if symbol is not None:
+                    found[symbol] = None
+                i += 1
+                continue
+
+            # Longest company name starting here
+            node = self._names.get(lowered[i])
+            match, length, j = None, 0, i
+            while node is not None:
+                j += 1
+                if _END in node:
+                    match, length = node[_END], j - i
+                node = node.get(lowered[j]) if j < n else None
+            if match is not None and (
+                length > 1
+                or (token[0].isupper() and token.upper() not in AMBIGUOUS_TICKERS)
+            ):
+                found[match] = None
+                i += length
+                continue
+
+            if (
+                len(token) >= self.min_bare_ticker
+                and token.isupper()
+                and token not in AMBIGUOUS_TICKERS
+            ):
+                symbol = self.tickers.get(token)
+                if symbol is not None:
+                    found[symbol] = None
+            i += 1
+        return list(found)
+
+    def stats(self) -> Dict:
+        return {"tickers": len(self.tickers), "aliases": self.aliases}
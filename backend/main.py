@@ -1,24 +1,137 @@
 import os
+import json
 import random
 import datetime
+import time
 import uuid
 import re
+from collections import OrderedDict
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import (
+    Body,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import httpx
-import pandas as pd
-import numpy as np
-from sqlalchemy import create_engine
-from sklearn.ensemble import IsolationForest
-from collections import Counter
+from contextlib import asynccontextmanager
+from streaming import StreamingAnomalyDetector
+from resample import MultiTimeframeDetector
+import ml_scoring
+from cpu_pool import CpuPool, PoolSaturated, WorkerCrashed
+from upstream import TwelveDataClient, UpstreamError
+from market_cache import (
+    INTERVAL_SECONDS,
+    BudgetExceeded,
+    MarketDataCache,
+    TokenBucket,
+)
+from bar_store import BarStore, bars_from_closes
+from alert_store import (
+    AlertSpill,
+    AlertStore,
+    decode_cursor,
+    encode_cursor,
+    to_epoch,
+    to_naive_utc,
+)
+from aggregates import ThreatAggregates
+from state import SqliteAlertStore, SqliteThreatAggregates
+from broadcast import Broadcaster, StreamClosed
+from watcher import SymbolWatcher
+from risk import (
+    MANIPULATION_PATTERNS,
+    analyze_sentiment_and_manipulation,
+    calculate_manipulation_confidence,
+    classify_risk,
+    extract_manipulation_keywords,
+)
+from social_ingest import IngestPipeline, SocialSignalStore, cashtag_entities
+from entities import EntityIndex
+from trust import IntermediaryRegistry, TrustService
+from coordination import CoordinationGraph
+from near_duplicates import NearDuplicateIndex
+from metrics import Metrics, MetricsMiddleware, StageTimer
 
 load_dotenv()
 TD_API_KEY = os.getenv("TWELVEDATA_API_KEY", "")
 DATABASE_URL = os.getenv("DATABASE_URL")
+SCAN_MAX_SYMBOLS = int(os.getenv("SCAN_MAX_SYMBOLS", "500"))
+
+# One pooled client for the whole process instead of one per request
+twelvedata = TwelveDataClient(
+    base_url=os.getenv("TWELVEDATA_BASE_URL", "https://api.twelvedata.com"),
+    api_key=TD_API_KEY,
+    max_connections=int(os.getenv("TWELVEDATA_MAX_CONNECTIONS", "50")),
+)
+
+# Fetched bars are optionally kept on disk, one memory-mapped file per
+# symbol and interval, so history outlives the cache and restarts
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR")
+bar_store = (
+    BarStore(BAR_STORE_DIR, max_open=int(os.getenv("BAR_STORE_MAX_OPEN", "256")))
+    if BAR_STORE_DIR
+    else None
+)
+BAR_QUERY_MAX = int(os.getenv("BAR_QUERY_MAX", "100000"))
+
+# Bar history cache in front of /time_series, spending the plan's credits
+# through a token bucket (Twelve Data's free plan allows 8 per minute)
+market_cache = MarketDataCache(
+    fetch=twelvedata.time_series,
+    budget=TokenBucket(
+        rate_per_minute=float(os.getenv("TWELVEDATA_CREDITS_PER_MINUTE", "8")),
+        max_queue=int(os.getenv("TWELVEDATA_MAX_QUEUE", "100")),
+    ),
+    max_bars=int(os.getenv("MARKET_CACHE_MAX_BARS", "500")),
+    store=bar_store,
+)
+
 
-app = FastAPI(title="Sentinel Shield - Backend")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if alert_repo is not None:
+        alert_repo.create_schema()
+        # Warm the in-memory store so threat_score/leaderboard survive restarts
+        since = datetime.datetime.utcnow() - datetime.timedelta(hours=24)
+        for alert in alert_repo.load_since(since):
+            record_alert(alert, persist=False)
+        alert_writer.start()
+    for symbol in WATCHLIST:
+        watcher.watch(symbol)
+    watcher.start()
+    # Not awaited: the app serves (and /health answers) while this runs
+    warmup = asyncio.create_task(warm_up()) if WARMUP else None
+    tail = (
+        asyncio.create_task(tail_shared_alerts()) if STATE_BACKEND == "sqlite" else None
+    )
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    if tail is not None:
+        tail.cancel()
+    await watcher.stop()
+    cpu_pool.shutdown()
+    if alert_writer is not None:
+        alert_writer.stop()
+    if alerts.spill is not None:
+        alerts.spill.close()
+    if STATE_BACKEND == "sqlite":
+        alerts.close()
+    if bar_store is not None:
+        bar_store.close()
+    await twelvedata.aclose()
+
+
+app = FastAPI(title="Sentinel Shield - Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,13 +139,228 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Next-Cursor"],
+)
+
+# Latency per route and per detection stage plus alert counts, scraped from
+# /metrics; send `X-Profile: 1` to get a request's stages in Server-Timing
+metrics = Metrics("sentinel")
+stages = StageTimer(
+    metrics.histogram("stage_duration_seconds", "Detection latency by pipeline stage")
+)
+alerts_raised = metrics.counter("alerts_total", "Alerts raised by severity level")
+app.add_middleware(
+    MetricsMiddleware,
+    latency=metrics.histogram(
+        "request_duration_seconds", "HTTP request latency by route"
+    ),
+    responses=metrics.counter("responses_total", "HTTP responses by route and status"),
+    # Streams stay open for the life of the connection
+    exclude=("/stream",),
+)
+metrics.gauge("alerts_stored", "Alerts held in memory", lambda: len(alerts))
+metrics.gauge("stream_subscribers", "Live update subscribers", lambda: len(broadcaster))
+metrics.gauge("watched_symbols", "Symbols in the watchlist", lambda: len(watcher))
+metrics.gauge(
+    "cpu_pool_pending", "Queued and running ML jobs", lambda: cpu_pool.pending
 )
 
+# Alerts are written to the database off the request path in batches.
+# SQLAlchemy is only imported when a database is configured.
 engine = None
+alert_repo = None
+alert_writer = None
 if DATABASE_URL:
+    from sqlalchemy import create_engine
+
+    from alert_db import AlertRepository, AlertWriter
+
     engine = create_engine(DATABASE_URL, echo=False, future=True)
+    alert_repo = AlertRepository(engine)
+    alert_writer = AlertWriter(
+        alert_repo,
+        batch_size=int(os.getenv("ALERT_WRITE_BATCH", "200")),
+        flush_interval=float(os.getenv("ALERT_WRITE_INTERVAL_MS", "250")) / 1000,
+    )
+
+# Alerts, threat aggregates and fitted models live in this process by
+# default. With STATE_BACKEND=sqlite they live in the STATE_PATH file, so
+# every worker sharing it (uvicorn --workers, or hosts on shared storage)
+# gives the same answers.
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+if STATE_BACKEND not in ("memory", "sqlite"):
+    raise ValueError(f"Unknown STATE_BACKEND: {STATE_BACKEND}")
+STATE_PATH = os.getenv("STATE_PATH", "sentinel_state.db")
+
+# Stored alerts are bounded; in memory, evicted records optionally spill
+ALERT_MAX_COUNT = int(os.getenv("ALERT_MAX_COUNT", "100000"))
+ALERT_MAX_AGE_SECONDS = float(os.getenv("ALERT_MAX_AGE_HOURS", "48")) * 3600
+ALERT_SPILL_PATH = os.getenv("ALERT_SPILL_PATH")
+if STATE_BACKEND == "sqlite":
+    alerts = SqliteAlertStore(
+        STATE_PATH, max_alerts=ALERT_MAX_COUNT, max_age_seconds=ALERT_MAX_AGE_SECONDS
+    )
+else:
+    alerts = AlertStore(
+        max_alerts=ALERT_MAX_COUNT,
+        max_age_seconds=ALERT_MAX_AGE_SECONDS,
+        spill=AlertSpill(ALERT_SPILL_PATH) if ALERT_SPILL_PATH else None,
+    )
+
+THREAT_WEIGHTS = {
+    "Severe Market Manipulation": 50,
+    "Pump-Dump Anomaly (Social Media Confirmed) (ML-Verified)": 45,
+    "Pump-Dump Anomaly (ML-Verified)": 40,
+    "Pump-Dump Anomaly (Social Media Confirmed)": 35,
+    "Pump-Dump Anomaly": 30,
+    "Insider Trading Spike (ML-Verified)": 35,
+    "Insider Trading Spike (Social Media Confirmed)": 30,
+    "Insider Trading Spike": 25,
+    "Unusual Volume Surge (ML-Verified)": 25,
+    "Unusual Volume Surge (Social Media Confirmed)": 20,
+    "Unusual Volume Surge": 15,
+    "Market Irregularity": 10,
+    "ML Anomaly (Requires Review)": 15,
+}
+
+
+def alert_threat_score(alert: Dict) -> float:
+    """Contribution of one alert to the market threat score"""
+    reason = alert.get("reason", "")
+    severity = alert.get("severity_level", 1)
+    manipulation_confidence = alert.get("manipulation_confidence", 0)
+
+    # Base weight from reason
+    base_weight = THREAT_WEIGHTS.get(reason, 5)
+
+    # Severity multiplier
+    severity_multiplier = 1 + (severity * 0.3)
+
+    # Manipulation confidence boost
+    confidence_boost = manipulation_confidence / 100 * 0.5
+
+    return base_weight * severity_multiplier * (1 + confidence_boost)
 
-alerts = []
+
+# Rolling inputs of /threat_score and /leaderboard, updated per alert, or
+# read from the shared alerts table
+threat_aggregates = (
+    SqliteThreatAggregates(alerts, alert_threat_score, recent_size=100)
+    if STATE_BACKEND == "sqlite"
+    else ThreatAggregates(alert_threat_score, recent_size=100)
+)
+
+# Push channel for dashboards connected to /stream
+broadcaster = Broadcaster(
+    max_clients=int(os.getenv("STREAM_MAX_CLIENTS", "500")),
+    max_queue=int(os.getenv("STREAM_QUEUE_SIZE", "256")),
+)
+_last_pushed: Dict[str, Dict] = {}
+
+
+# With the shared state backend, alerts other workers raise reach this
+# worker's /stream clients by tailing the alerts table every STREAM_TAIL_MS.
+# Ids published here directly are remembered so the tail skips them.
+STREAM_TAIL_SECONDS = float(os.getenv("STREAM_TAIL_MS", "500")) / 1000
+_published_here: "OrderedDict[str, None]" = OrderedDict()
+stream_tail_state: Dict = {"published": 0, "errors": 0}
+
+
+def record_alert(alert: Dict, persist: bool = True):
+    """Index a new alert, update the rolling aggregates and queue it for the DB"""
+    if not alerts.add(alert):
+        # Already recorded, e.g. by another worker sharing the state backend
+        return
+    threat_aggregates.add(alert, to_epoch(alert["created_at"]))
+    if persist and alert_writer is not None:
+        alert_writer.submit(alert)
+    if persist:
+        alerts_raised.inc(severity=str(alert["severity_level"]))
+        if STATE_BACKEND == "sqlite":
+            _published_here[alert["id"]] = None
+            if len(_published_here) > 10000:
+                _published_here.popitem(last=False)
+        publish_alert_updates(alert)
+
+
+async def tail_shared_alerts():
+    """Publish alerts that other workers wrote to the shared alerts table"""
+    cursor = alerts.last_rowid()
+    seen_version = None
+    while True:
+        await asyncio.sleep(STREAM_TAIL_SECONDS)
+        try:
+            version = alerts.version()
+            if version == seen_version:
+                continue
+            seen_version = version
+            if not len(broadcaster):
+                # Nobody to tell; skip ahead instead of decoding rows
+                cursor = alerts.last_rowid()
+                _published_here.clear()
+                continue
+            if cursor > alerts.last_rowid():
+                # Retention emptied the table and rowids started over
+                cursor = 0
+            while True:
+                rows = alerts.added_after(cursor)
+                for rowid, alert in rows:
+                    cursor = rowid
+                    if alert["id"] in _published_here:
+                        del _published_here[alert["id"]]
+                        continue
+                    stream_tail_state["published"] += 1
+                    publish_alert_updates(alert)
+                if len(rows) < 500:
+                    break
+        except Exception as e:
+            stream_tail_state["errors"] += 1
+            print(f"Stream tail error: {e}")
+
+
+def publish_alert_updates(alert: Dict):
+    """Push the alert, plus threat score and leaderboard when they changed"""
+    if not len(broadcaster):
+        return
+    broadcaster.publish("alert", alert, symbol=alert["symbol"])
+
+    threat = compute_threat_score()
+    comparable = {**threat, "details": {**threat["details"], "assessment_time": None}}
+    if _last_pushed.get("threat_score") != comparable:
+        _last_pushed["threat_score"] = comparable
+        broadcaster.publish("threat_score", threat)
+
+    board = compute_leaderboard(10)
+    if _last_pushed.get("leaderboard") != board:
+        _last_pushed["leaderboard"] = board
+        broadcaster.publish("leaderboard", board)
+
+
+# Fitted IsolationForest models reused across requests for the same symbol
+ML_REGISTRY_CONFIG = (
+    int(os.getenv("ML_MODEL_CACHE_SIZE", "256")),
+    int(os.getenv("ML_RETRAIN_BARS", "30")),
+    float(os.getenv("ML_RETRAIN_SECONDS", "900")),
+    STATE_PATH if STATE_BACKEND == "sqlite" else None,
+)
+ml_scoring.configure(*ML_REGISTRY_CONFIG)
+
+# Incremental per-(symbol, interval) detectors fed by fetch_live. Symbols
+# come from requests, so like the fitted models these are kept for the
+# ML_MODEL_CACHE_SIZE most recently used and rebuilt from bars after that
+DETECTOR_CACHE_SIZE = ML_REGISTRY_CONFIG[0]
+detectors: "OrderedDict[tuple, StreamingAnomalyDetector]" = OrderedDict()
+
+# Model fits run here, off the event loop. Each worker keeps its own model
+# registry and a symbol is always scored on the same worker.
+cpu_pool = CpuPool(
+    kind=os.getenv("CPU_POOL_KIND", "process"),
+    workers=int(os.getenv("CPU_POOL_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("CPU_POOL_MAX_PENDING", "32")),
+    timeout=float(os.getenv("CPU_POOL_TIMEOUT_SECONDS", "10")),
+    initializer=ml_scoring.configure,
+    initargs=ML_REGISTRY_CONFIG,
+)
 
 SEBI_REGISTERED_HANDLES = {
     "verified_broker_official": {
@@ -57,46 +385,28 @@ SEBI_REGISTERED_HANDLES = {
     },
 }
 
-# Simulated social media manipulation patterns for NLP demonstration
-MANIPULATION_PATTERNS = {
-    "pump_signals": [
-        "🚀🚀 {} going to the moon! Buy now before it's too late!",
-        "BREAKING: {} insider news! Target price {}! Limited time opportunity!",
-        "🔥 {} is the next big thing! Don't miss out! 10x returns guaranteed!",
-        "URGENT: {} pump starting now! Join our premium group for targets!",
-        "💎 {} hidden gem discovered! Buy before market opens tomorrow!",
-    ],
-    "urgency_keywords": [
-        "urgent",
-        "breaking",
-        "limited time",
-        "buy now",
-        "don't miss",
-        "last chance",
-    ],
-    "manipulation_keywords": [
-        "pump",
-        "moon",
-        "rocket",
-        "guaranteed returns",
-        "insider",
-        "target",
-        "premium group",
-    ],
-    "sentiment_indicators": {
-        "extremely_positive": [
-            "🚀",
-            "🔥",
-            "💎",
-            "moon",
-            "rocket",
-            "amazing",
-            "incredible",
-        ],
-        "urgent": ["urgent", "now", "immediate", "breaking", "alert"],
-        "greed": ["guaranteed", "easy money", "quick profit", "10x", "100x"],
-    },
-}
+# Registered intermediaries by handle: the built-in entries above plus the
+# full list from SEBI_REGISTRY_CSV when configured
+intermediaries = IntermediaryRegistry(SEBI_REGISTERED_HANDLES)
+SEBI_REGISTRY_CSV = os.getenv("SEBI_REGISTRY_CSV")
+if SEBI_REGISTRY_CSV:
+    intermediaries.load_csv(SEBI_REGISTRY_CSV)
+
+
+# Known NSE/BSE tickers and company names for extracting the symbols a
+# message talks about
+SYMBOL_LISTINGS_CSV = os.getenv(
+    "SYMBOL_LISTINGS_CSV",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "listings.csv"),
+)
+entity_index = (
+    EntityIndex.from_csv(SYMBOL_LISTINGS_CSV)
+    if os.path.exists(SYMBOL_LISTINGS_CSV)
+    else None
+)
+extract_entities = (
+    entity_index.extract if entity_index is not None else cashtag_entities
+)
 
 
 # Simulated social media data for demonstration
@@ -154,7 +464,8 @@ def generate_social_signals(symbol: str, manipulation_level: str = "low") -> Lis
                 ).isoformat(),
                 "sentiment_score": round(sentiment_score, 3),
                 "manipulation_confidence": round(manipulation_confidence, 3),
-                "entities_extracted": [symbol.split(".")[0]],
+                "entities_extracted": extract_entities(message)
+                or [symbol.split(".")[0]],
                 "keywords_detected": extract_manipulation_keywords(message),
             }
         )
@@ -162,75 +473,74 @@ def generate_social_signals(symbol: str, manipulation_level: str = "low") -> Lis
     return signals
 
 
-def extract_manipulation_keywords(text: str) -> List[str]:
-    """Extract manipulation-related keywords from text"""
-    text_lower = text.lower()
-    keywords = []
-
-    for keyword in (
-        MANIPULATION_PATTERNS["urgency_keywords"]
-        + MANIPULATION_PATTERNS["manipulation_keywords"]
-    ):
-        if keyword in text_lower:
-            keywords.append(keyword)
-
-    return keywords
-
-
-def analyze_sentiment_and_manipulation(text: str) -> Dict:
-    """Analyze text for sentiment and manipulation indicators"""
-    text_lower = text.lower()
-
-    # Simple sentiment scoring based on keywords
-    positive_indicators = sum(
-        1
-        for word in MANIPULATION_PATTERNS["sentiment_indicators"]["extremely_positive"]
-        if word in text_lower
-    )
-    urgent_indicators = sum(
-        1
-        for word in MANIPULATION_PATTERNS["sentiment_indicators"]["urgent"]
-        if word in text_lower
-    )
-    greed_indicators = sum(
-        1
-        for word in MANIPULATION_PATTERNS["sentiment_indicators"]["greed"]
-        if word in text_lower
-    )
-
-    sentiment_score = min(
-        1.0,
-        (positive_indicators * 0.3 + urgent_indicators * 0.4 + greed_indicators * 0.5),
-    )
-    manipulation_score = min(1.0, (urgent_indicators * 0.4 + greed_indicators * 0.6))
-
-    return {
-        "sentiment_score": round(sentiment_score, 3),
-        "manipulation_confidence": round(manipulation_score, 3),
-        "contains_manipulation_keywords": len(extract_manipulation_keywords(text)) > 0,
-    }
-
-
 async def fetch_twelvedata(symbol: str, interval: str = "1min", outputsize: int = 200):
     if not TD_API_KEY:
         return None
-    url = "https://api.twelvedata.com/time_series"
-    params = {
-        "symbol": symbol,
-        "interval": interval,
-        "outputsize": outputsize,
-        "format": "JSON",
-        "apikey": TD_API_KEY,
-    }
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.get(url, params=params)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail="Market API error")
-        return r.json()
+    try:
+        return await market_cache.get(symbol, interval, outputsize)
+    except BudgetExceeded:
+        raise HTTPException(status_code=429, detail="Market API budget exhausted")
+    except (UpstreamError, httpx.HTTPError):
+        raise HTTPException(status_code=502, detail="Market API error")
+
+
+def generate_mock_bars(periods: int = 200):
+    """Generate realistic mock bars for demonstration when no API key is set"""
+    import numpy as np
+    import pandas as pd
+
+    now = pd.Timestamp.now()
+    rng = pd.date_range(end=now, periods=periods, freq="min")
+    base_price = random.uniform(800, 1500)
+    prices = []
+    current_price = base_price
+
+    for i in range(periods):
+        # Add some realistic price movement with occasional spikes
+        change = np.random.normal(0, 0.005)  # 0.5% std deviation
+        if (
+            i > periods * 3 // 4 and random.random() < 0.1
+        ):  # 10% chance of manipulation spike in recent data
+            change += random.uniform(0.02, 0.05)  # 2-5% spike
+        current_price *= 1 + change
+        prices.append(round(current_price, 2))
+
+    # Volume with correlation to price changes
+    base_volume = random.randint(50000, 200000)
+    volumes = []
+    for i, price in enumerate(prices):
+        volume_multiplier = 1
+        if i > 0:
+            price_change = abs(prices[i] - prices[i - 1]) / prices[i - 1]
+            volume_multiplier = 1 + (
+                price_change * 10
+            )  # Higher price changes = higher volume
+
+        volume = int(base_volume * volume_multiplier * random.uniform(0.5, 1.5))
+        volumes.append(volume)
+
+    timestamps = rng.astype(str).tolist()
+    return timestamps, prices, volumes
+
+
+async def load_bars(symbol: str, interval: str = "1min", outputsize: int = 200):
+    """Oldest-first (timestamps, closes, volumes), falling back to mock data"""
+    data = await fetch_twelvedata(symbol, interval=interval, outputsize=outputsize)
+    if data is None or "values" not in data:
+        return generate_mock_bars(outputsize)
+
+    vals = data["values"]
+    vals_sorted = list(reversed(vals))
+    prices = [float(v["close"]) for v in vals_sorted if "close" in v]
+    volumes = [int(v.get("volume", 0)) for v in vals_sorted]
+    timestamps = [v["datetime"] for v in vals_sorted]
+    return timestamps, prices, volumes
 
 
 def compute_ewma_anomaly(prices, span=10):
     """Enhanced EWMA-based anomaly detection with multiple timeframes"""
+    import pandas as pd
+
     s = pd.Series(prices).astype(float)
 
     # Multi-timeframe EWMA analysis
@@ -261,6 +571,8 @@ def compute_ewma_anomaly(prices, span=10):
 
 def compute_volume_anomaly(volumes, window=20):
     """Detect volume anomalies using statistical analysis"""
+    import pandas as pd
+
     s = pd.Series(volumes).astype(float)
 
     # Rolling statistics
@@ -284,6 +596,8 @@ def compute_volume_anomaly(volumes, window=20):
 
 def compute_price_momentum_anomaly(prices, short_window=5, long_window=20):
     """Detect unusual price momentum patterns"""
+    import pandas as pd
+
     s = pd.Series(prices).astype(float)
 
     # Calculate returns
@@ -305,149 +619,43 @@ def compute_price_momentum_anomaly(prices, short_window=5, long_window=20):
     return float(risk_adjusted_momentum), float(short_momentum)
 
 
-def compute_ml_isolation_forest(prices, volumes):
-    """Enhanced ML-based anomaly detection with multiple features"""
-    if len(prices) < 30:
-        return 0.0, False
-
-    df = pd.DataFrame({"price": prices, "volume": volumes}).astype(float)
-
-    # Feature engineering
-    df["returns"] = df["price"].pct_change().fillna(0)
-    df["log_volume"] = np.log(df["volume"] + 1)
-    df["price_volatility"] = df["returns"].rolling(window=10).std().fillna(0)
-    df["volume_ma"] = df["volume"].rolling(window=10).mean()
-    df["volume_ratio"] = df["volume"] / (df["volume_ma"] + 1e-9)
-    df["price_momentum"] = df["returns"].rolling(window=5).mean().fillna(0)
-
-    # Normalize features
-    feature_cols = [
-        "returns",
-        "log_volume",
-        "price_volatility",
-        "volume_ratio",
-        "price_momentum",
-    ]
-    for col in feature_cols:
-        df[f"{col}_norm"] = (df[col] - df[col].mean()) / (df[col].std() + 1e-9)
-
-    # Prepare features for ML model
-    normalized_cols = [f"{col}_norm" for col in feature_cols]
-    features = df[normalized_cols].values
-
-    # Use more data for training if available
-    train_size = min(len(features) - 1, 100)
-    X_train = features[-train_size - 1 : -1]
-    X_test = features[-1].reshape(1, -1)
-
-    # Enhanced Isolation Forest
-    iso = IsolationForest(
-        n_estimators=150, contamination=0.05, random_state=42, max_features=0.8
-    )
-
-    try:
-        iso.fit(X_train)
-        anomaly_score = float(iso.decision_function(X_test)[0])
-        prediction = int(iso.predict(X_test)[0])
-
-        # Convert to positive anomaly score (higher = more anomalous)
-        ml_score = float(-anomaly_score)
-        ml_is_anomaly = prediction == -1
-
-        return ml_score, ml_is_anomaly
-    except Exception as e:
-        print(f"ML anomaly detection error: {e}")
-        return 0.0, False
-
-
-def classify_risk(
-    ewma_score: float,
-    vol_ratio: float,
-    ml_flag: bool,
-    social_signals: Optional[List] = None,
-):
-    """Enhanced risk classification with social media integration"""
-
-    # Base risk assessment from market data
-    if abs(ewma_score) > 4 and vol_ratio > 5:
-        base = "Severe Market Manipulation"
-        severity = 4
-    elif abs(ewma_score) > 3 and vol_ratio > 3:
-        base = "Pump-Dump Anomaly"
-        severity = 3
-    elif abs(ewma_score) > 2.5:
-        base = "Insider Trading Spike"
-        severity = 2
-    elif vol_ratio > 4:
-        base = "Unusual Volume Surge"
-        severity = 2
-    elif abs(ewma_score) > 1.5 or vol_ratio > 2:
-        base = "Market Irregularity"
-        severity = 1
+def get_detector(symbol: str, interval: str) -> StreamingAnomalyDetector:
+    key = (symbol.upper(), interval)
+    detector = detectors.get(key)
+    if detector is None:
+        detector = detectors[key] = StreamingAnomalyDetector(window=60, span=12)
+        while len(detectors) > DETECTOR_CACHE_SIZE:
+            detectors.popitem(last=False)
     else:
-        base = "Normal"
-        severity = 0
-
-    # Social media signal enhancement
-    social_boost = 0
-    if social_signals:
-        high_confidence_signals = [
-            s for s in social_signals if s.get("manipulation_confidence", 0) > 0.7
-        ]
-        if len(high_confidence_signals) >= 3:
-            social_boost = 2
-        elif len(high_confidence_signals) >= 1:
-            social_boost = 1
-
-    # ML confirmation boost
-    ml_boost = 1 if ml_flag and base != "Normal" else 0
-
-    # Final severity calculation
-    final_severity = min(4, severity + social_boost + ml_boost)
-
-    # Generate final classification
-    if social_boost > 0 and base != "Normal":
-        base = f"{base} (Social Media Confirmed)"
-
-    if ml_flag and base != "Normal":
-        base = f"{base} (ML-Verified)"
-    elif ml_flag and base == "Normal":
-        base = "ML Anomaly (Requires Review)"
-        final_severity = 1
-
-    return base, final_severity
+        detectors.move_to_end(key)
+    return detector
 
 
-def calculate_manipulation_confidence(
-    ewma_score: float,
-    vol_ratio: float,
-    ml_score: float,
-    social_signals: Optional[List] = None,
-) -> float:
-    """Calculate overall manipulation confidence score (0-100)"""
+# 5-min, 15-min and hourly detectors per symbol, fed from its 1-minute bars
+# so slower timeframes cost no extra upstream calls; bounded like detectors
+timeframe_detectors: "OrderedDict[str, MultiTimeframeDetector]" = OrderedDict()
 
-    # Market data confidence (0-40 points)
-    market_confidence = 0
-    market_confidence += min(20, abs(ewma_score) * 5)  # EWMA contribution
-    market_confidence += min(20, (vol_ratio - 1) * 8)  # Volume contribution
 
-    # ML confidence (0-30 points)
-    ml_confidence = min(30, ml_score * 15)
-
-    # Social media confidence (0-30 points)
-    social_confidence = 0
-    if social_signals:
-        avg_manipulation = sum(
-            s.get("manipulation_confidence", 0) for s in social_signals
-        ) / len(social_signals)
-        signal_count_bonus = min(10, len(social_signals) * 2)
-        social_confidence = (avg_manipulation * 20) + signal_count_bonus
-
-    total_confidence = min(100, market_confidence + ml_confidence + social_confidence)
-    return round(total_confidence, 1)
+def sync_timeframes(symbol: str, timestamps, prices, volumes) -> Dict[str, Dict]:
+    """Fold a symbol's new 1-minute bars into its slower timeframes"""
+    key = symbol.upper()
+    frames = timeframe_detectors.get(key)
+    if frames is None:
+        frames = timeframe_detectors[key] = MultiTimeframeDetector()
+        while len(timeframe_detectors) > DETECTOR_CACHE_SIZE:
+            timeframe_detectors.popitem(last=False)
+    else:
+        timeframe_detectors.move_to_end(key)
+    if bar_store is not None and bar_store.exists(symbol, "1min"):
+        # Stored bars carry real highs and lows, and enough history to fill
+        # the hourly window if the detectors have to be reseeded
+        frames.sync(bar_store.tail(symbol, "1min", frames.history_bars))
+    else:
+        frames.sync(bars_from_closes(timestamps, prices, volumes))
+    return frames.scores()
 
 
-def score_trust(handle: str, message_content: str = "") -> Dict:
+def compute_trust(handle: str, message_content: str = "") -> Dict:
     """Enhanced trust scoring with content analysis"""
     if not handle:
         return {
@@ -457,8 +665,7 @@ def score_trust(handle: str, message_content: str = "") -> Dict:
             "risk_level": "Very High",
         }
 
-    key = handle.lower()
-    entry = SEBI_REGISTERED_HANDLES.get(key)
+    entry = intermediaries.get(handle)
 
     base_score = 10
     risk_level = "High"
@@ -538,68 +745,131 @@ def analyze_handle_credibility(handle: str, message_content: str = "") -> Dict:
     }
 
 
+# Verification runs for every inbound message, so results are cached per
+# handle and message content
+trust_service = TrustService(
+    intermediaries,
+    compute_trust,
+    max_entries=int(os.getenv("TRUST_CACHE_SIZE", "100000")),
+    ttl_seconds=float(os.getenv("TRUST_CACHE_TTL_SECONDS", "3600")),
+)
+VERIFY_MAX_HANDLES = int(os.getenv("VERIFY_MAX_HANDLES", "1000"))
+
+
+def score_trust(handle: str, message_content: str = "") -> Dict:
+    """Cached trust score of a handle, optionally given a message it posted"""
+    return trust_service.score(handle, message_content)
+
+
+# Real social messages posted to /social/ingest; symbols without recent
+# ingested messages fall back to simulated signals
+SOCIAL_WINDOW_SECONDS = float(os.getenv("SOCIAL_WINDOW_MINUTES", "60")) * 60
+SOCIAL_INGEST_MAX_BATCH = int(os.getenv("SOCIAL_INGEST_MAX_BATCH", "10000"))
+social_store = SocialSignalStore(
+    max_per_symbol=int(os.getenv("SOCIAL_MAX_PER_SYMBOL", "500")),
+    max_symbols=int(os.getenv("SOCIAL_MAX_SYMBOLS", "5000")),
+)
+# Handles-to-symbols posting graph of ingested messages, for coordination
+coordination = CoordinationGraph(
+    window_seconds=float(os.getenv("COORDINATION_WINDOW_MINUTES", "60")) * 60,
+    burst_seconds=float(os.getenv("COORDINATION_BURST_SECONDS", "300")),
+    min_burst_handles=int(os.getenv("COORDINATION_MIN_HANDLES", "3")),
+)
+
+# Near-duplicate (copy-paste) clusters of ingested messages; clusters of at
+# least NEAR_DUP_MIN_CLUSTER messages count as a campaign
+NEAR_DUP_MIN_CLUSTER = int(os.getenv("NEAR_DUP_MIN_CLUSTER", "3"))
+near_duplicates = NearDuplicateIndex(
+    window_seconds=float(os.getenv("NEAR_DUP_WINDOW_MINUTES", "60")) * 60,
+    max_messages=int(os.getenv("NEAR_DUP_MAX_MESSAGES", "100000")),
+    threshold=float(os.getenv("NEAR_DUP_THRESHOLD", "0.6")),
+)
+
+
+def observe_signal(symbol: str, ts: float, signal: Dict):
+    coordination.add(signal["channel"], symbol, ts, signal["platform"])
+
+
+def observe_message(ts: float, msg: Dict):
+    near_duplicates.add(msg["message"], msg["entities_extracted"], ts)
+
+
+def copy_paste_campaigns(symbol: str) -> Dict:
+    return near_duplicates.symbol_summary(symbol, NEAR_DUP_MIN_CLUSTER)
+
+
+social_pipeline = IngestPipeline(
+    social_store,
+    analyze=analyze_sentiment_and_manipulation,
+    trust=score_trust,
+    extract=extract_entities,
+    on_signal=observe_signal,
+    on_message=observe_message,
+)
+
+
+def social_signals_for(symbol: str, manipulation_level: str = "low") -> List[Dict]:
+    """Recent ingested messages about symbol, or simulated ones if there are none"""
+    signals = social_store.recent(symbol, since=time.time() - SOCIAL_WINDOW_SECONDS)
+    if signals:
+        return signals
+    return generate_social_signals(symbol, manipulation_level)
+
+
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "warm": warmup_state["done"]}
 
 
-@app.get("/fetch_live")
-async def fetch_live(
-    symbol: str = Query(..., example="RELIANCE.NSE"), interval: str = "1min"
-):
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Request, stage and alert metrics in the Prometheus text format"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def detect_symbol(symbol: str, interval: str = "1min") -> Dict:
     """Enhanced live data fetching with comprehensive analysis"""
-    data = await fetch_twelvedata(symbol, interval=interval, outputsize=200)
-    if data is None or "values" not in data:
-        # Generate realistic mock data for demonstration
-        now = pd.Timestamp.now()
-        rng = pd.date_range(end=now, periods=200, freq="min")
-        base_price = random.uniform(800, 1500)
-        prices = []
-        current_price = base_price
-
-        for i in range(200):
-            # Add some realistic price movement with occasional spikes
-            change = np.random.normal(0, 0.005)  # 0.5% std deviation
-            if (
-                i > 150 and random.random() < 0.1
-            ):  # 10% chance of manipulation spike in recent data
-                change += random.uniform(0.02, 0.05)  # 2-5% spike
-            current_price *= 1 + change
-            prices.append(round(current_price, 2))
-
-        # Volume with correlation to price changes
-        base_volume = random.randint(50000, 200000)
-        volumes = []
-        for i, price in enumerate(prices):
-            volume_multiplier = 1
-            if i > 0:
-                price_change = abs(prices[i] - prices[i - 1]) / prices[i - 1]
-                volume_multiplier = 1 + (
-                    price_change * 10
-                )  # Higher price changes = higher volume
-
-            volume = int(base_volume * volume_multiplier * random.uniform(0.5, 1.5))
-            volumes.append(volume)
-
-        timestamps = rng.astype(str).tolist()
-    else:
-        vals = data["values"]
-        vals_sorted = list(reversed(vals))
-        prices = [float(v["close"]) for v in vals_sorted if "close" in v]
-        volumes = [int(v.get("volume", 0)) for v in vals_sorted]
-        timestamps = [v["datetime"] for v in vals_sorted]
+    with stages.stage("fetch"):
+        timestamps, prices, volumes = await load_bars(symbol, interval, outputsize=200)
 
     # Enhanced analysis
-    recent_prices = prices[-60:]
-    recent_vols = volumes[-60:]
-    price_now = recent_prices[-1]
-    vol_now = recent_vols[-1]
-
-    # Multi-dimensional anomaly detection
-    ewma_score, ewma_value = compute_ewma_anomaly(recent_prices, span=12)
-    vol_zscore, vol_ratio = compute_volume_anomaly(recent_vols)
-    momentum_score, short_momentum = compute_price_momentum_anomaly(recent_prices)
-    ml_score, ml_is_anomaly = compute_ml_isolation_forest(prices[-200:], volumes[-200:])
+    price_now = prices[-1]
+    vol_now = volumes[-1]
+
+    # Multi-dimensional anomaly detection over the last 60 bars; the
+    # detector only ingests bars it has not seen on a previous poll
+    with stages.stage("detectors"):
+        detector = get_detector(symbol, interval)
+        new_bars = detector.sync(timestamps, prices, volumes)
+        ewma_score, ewma_value = detector.ewma_anomaly()
+        vol_zscore, vol_ratio = detector.volume_anomaly()
+        momentum_score, short_momentum = detector.momentum_anomaly()
+        timeframes = (
+            sync_timeframes(symbol, timestamps, prices, volumes)
+            if interval == "1min"
+            else {}
+        )
+    model_key = (symbol.upper(), interval)
+    ml_degraded = False
+    try:
+        # "ml" is the wall time including the pool queue; the worker reports
+        # its feature and model time separately
+        with stages.stage("ml"):
+            ml_score, ml_is_anomaly, ml_timings = await cpu_pool.run(
+                ml_scoring.timed_ml_isolation_forest,
+                prices[-200:],
+                volumes[-200:],
+                model_key,
+                new_bars,
+                key=model_key,
+            )
+        for name, seconds in ml_timings.items():
+            stages.record(name, seconds)
+    except (PoolSaturated, WorkerCrashed, asyncio.TimeoutError):
+        # Fall back to the statistical scores rather than queueing behind fits
+        # or failing the request because a worker died
+        ml_score, ml_is_anomaly = 0.0, False
+        ml_degraded = True
 
     # Generate social signals based on market anomaly level
     anomaly_strength = abs(ewma_score) + (vol_ratio - 1) + abs(momentum_score)
@@ -610,15 +880,23 @@ async def fetch_live(
     else:
         manipulation_level = "low"
 
-    social_signals = generate_social_signals(symbol, manipulation_level)
+    with stages.stage("social"):
+        social_signals = social_signals_for(symbol, manipulation_level)
+        campaigns = copy_paste_campaigns(symbol)
 
     # Enhanced risk classification
-    risk_reason, severity = classify_risk(
-        ewma_score, vol_ratio, ml_is_anomaly, social_signals
-    )
-    manipulation_confidence = calculate_manipulation_confidence(
-        ewma_score, vol_ratio, ml_score, social_signals
-    )
+    with stages.stage("classify"):
+        risk_reason, severity = classify_risk(
+            ewma_score,
+            vol_ratio,
+            ml_is_anomaly,
+            social_signals,
+            campaigns["clusters"],
+            {tf: scores for tf, scores in timeframes.items() if scores["ready"]},
+        )
+        manipulation_confidence = calculate_manipulation_confidence(
+            ewma_score, vol_ratio, ml_score, social_signals
+        )
 
     anomaly = {
         "symbol": symbol,
@@ -629,13 +907,16 @@ async def fetch_live(
         "volume_ratio": vol_ratio,
         "volume_zscore": vol_zscore,
         "momentum_score": momentum_score,
+        "timeframes": timeframes,
         "ml_score": ml_score,
         "ml_is_anomaly": ml_is_anomaly,
+        "ml_degraded": ml_degraded,
         "is_anomaly": severity > 0,
         "risk_reason": risk_reason,
         "severity_level": severity,
         "manipulation_confidence": manipulation_confidence,
         "social_signals": social_signals,
+        "copy_paste_campaigns": campaigns,
         "timestamps": timestamps[-10:],
         "recent_prices": prices[-10:],
         "recent_volumes": volumes[-10:],
@@ -644,12 +925,8 @@ async def fetch_live(
     return anomaly
 
 
-@app.get("/fetch_live_alert")
-async def fetch_live_alert(symbol: str = Query("RELIANCE.NSE", example="RELIANCE.NSE")):
-    """Enhanced live alert generation with social media correlation"""
-    data = await fetch_live(symbol)
-
-    # Generate alert if anomaly detected
+def build_alert(symbol: str, data: Dict, interval: str = "1min") -> Optional[Dict]:
+    """Alert record for a detection result, or None if nothing was detected"""
     if data["is_anomaly"] and data["severity_level"] >= 1:
         # Select handle based on manipulation confidence and social signals
         possible_handles = [
@@ -687,6 +964,7 @@ async def fetch_live_alert(symbol: str = Query("RELIANCE.NSE", example="RELIANCE
         alert = {
             "id": str(uuid.uuid4()),
             "symbol": symbol,
+            "interval": interval,
             "price": data["price"],
             "volume": data["volume"],
             "time": (
@@ -705,6 +983,7 @@ async def fetch_live_alert(symbol: str = Query("RELIANCE.NSE", example="RELIANCE
             "ml_flag": data.get("ml_is_anomaly", False),
             "social_signals_count": len(data.get("social_signals", [])),
             "trigger_message": trigger_message,
+            "coordination": coordination.analyze(symbol),
             "created_at": datetime.datetime.utcnow().isoformat(),
             "analysis_metadata": {
                 "ewma_zscore": data["ewma_zscore"],
@@ -712,19 +991,249 @@ async def fetch_live_alert(symbol: str = Query("RELIANCE.NSE", example="RELIANCE
                 "momentum_score": data.get("momentum_score", 0),
             },
         }
-        alerts.append(alert)
+        return alert
+    return None
+
+
+async def run_detection(symbol: str, interval: str = "1min") -> Dict:
+    """One detection pass for a symbol, recording an alert if one fires"""
+    data = await detect_symbol(symbol, interval)
+    with stages.stage("alert"):
+        alert = build_alert(symbol, data, interval)
+        if alert is not None:
+            record_alert(alert)
+    return data
+
+
+def watch_period(interval: str) -> float:
+    # New bars only arrive once per bar length, so poll no faster by default
+    return WATCH_POLL_SECONDS or INTERVAL_SECONDS.get(interval, 60)
+
+
+# Detection runs here in the background, once per watched symbol, rather
+# than once per polling client
+WATCHLIST = [s for s in os.getenv("WATCHLIST", "").split(",") if s.strip()]
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "0"))
+watcher = SymbolWatcher(
+    run_detection,
+    watch_period,
+    max_concurrency=int(os.getenv("WATCH_CONCURRENCY", "8")),
+    max_symbols=int(os.getenv("WATCH_MAX_SYMBOLS", "200")),
+    idle_seconds=float(os.getenv("WATCH_IDLE_SECONDS", "900")),
+)
+
+# pandas and scikit-learn load lazily, so startup is fast but the first
+# detection would pay for the imports. The warm-up loads them in the
+# background, in this process and every pool worker, then optionally runs
+# detection once per WARMUP_SYMBOLS entry to pre-fit its model.
+WARMUP = os.getenv("WARMUP", "1") not in ("", "0")
+WARMUP_SYMBOLS = [s for s in os.getenv("WARMUP_SYMBOLS", "").split(",") if s.strip()]
+warmup_state: Dict = {"done": False, "seconds": None, "prefitted": 0}
+
+
+async def warm_up():
+    start = time.perf_counter()
+    await asyncio.to_thread(ml_scoring.preload)
+    await cpu_pool.map_workers(ml_scoring.preload)
+    for symbol in WARMUP_SYMBOLS:
+        try:
+            await detect_symbol(symbol.strip())
+            warmup_state["prefitted"] += 1
+        except Exception as e:
+            print(f"Warm-up error for {symbol}: {e}")
+    warmup_state["done"] = True
+    warmup_state["seconds"] = round(time.perf_counter() - start, 3)
+
+
+@app.get("/fetch_live")
+async def fetch_live(
+    symbol: str = Query(..., example="RELIANCE.NSE"), interval: str = "1min"
+):
+    """On-demand analysis of a symbol; does not raise alerts"""
+    return await detect_symbol(symbol, interval)
+
 
+@app.get("/fetch_live_alert")
+async def fetch_live_alert(symbol: str = Query("RELIANCE.NSE", example="RELIANCE.NSE")):
+    """
+    Latest analysis of a symbol from the background watcher. The symbol is
+    added to the watchlist on first request; alerts are raised by the watcher.
+    A failed first run raises its error, e.g. the upstream HTTPException.
+    """
+    data = await watcher.latest(symbol)
+    if data is None:
+        # Watchlist full, the symbol was never watched: analyse it directly
+        data = await run_detection(symbol)
     return data
 
 
+@app.get("/watchlist")
+async def get_watchlist():
+    return {"symbols": watcher.entries(), "stats": watcher.stats()}
+
+
+@app.post("/watchlist")
+async def add_to_watchlist(
+    symbols: List[str] = Body(..., embed=True), interval: str = Body("1min")
+):
+    """Pin symbols to the watchlist so they are analysed until removed"""
+    added = [s for s in symbols if s.strip() and watcher.watch(s, interval)]
+    if len(added) < len([s for s in symbols if s.strip()]):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Watchlist full, at most {watcher.max_symbols} symbols",
+        )
+    return {"symbols": watcher.entries()}
+
+
+@app.delete("/watchlist/{symbol}")
+async def remove_from_watchlist(symbol: str, interval: str = "1min"):
+    if not watcher.unwatch(symbol, interval):
+        raise HTTPException(status_code=404, detail="Symbol not on watchlist")
+    return {"symbols": watcher.entries()}
+
+
+def score_watchlist(prices: List, volumes: List, window: int) -> Dict[int, Dict]:
+    """Statistical scores per watchlist position, vectorized where possible"""
+    # scan is numpy throughout; import it with the first scan, not at startup
+    from scan import score_matrix, split_by_length, stack_windows
+
+    scores: Dict[int, Dict] = {}
+    full, short = split_by_length([len(p) for p in prices], window)
+    if full:
+        matrix = score_matrix(
+            stack_windows([prices[i] for i in full], window),
+            stack_windows([volumes[i] for i in full], window),
+            span=12,
+        )
+        for row, i in enumerate(full):
+            scores[i] = {k: float(v[row]) for k, v in matrix.items()}
+    # Series shorter than the window cannot be stacked, score them one by one
+    for i in short:
+        ewma_score, ewma_value = compute_ewma_anomaly(prices[i], span=12)
+        vol_zscore, vol_ratio = compute_volume_anomaly(volumes[i])
+        momentum_score, short_momentum = compute_price_momentum_anomaly(prices[i])
+        scores[i] = {
+            "ewma_score": ewma_score,
+            "ewma_value": ewma_value,
+            "volume_zscore": vol_zscore,
+            "volume_ratio": vol_ratio,
+            "momentum_score": momentum_score,
+            "short_momentum": short_momentum,
+        }
+    return scores
+
+
+async def scan_symbols(
+    symbols: List[str], interval: str = "1min", window: int = 60
+) -> List[Dict]:
+    """
+    Score a whole watchlist in one pass: bars for every symbol are loaded
+    concurrently, stacked into (symbols, window) arrays and run through the
+    vectorized EWMA, volume and momentum detectors together.
+    """
+    symbols = list(dict.fromkeys(s.strip() for s in symbols if s.strip()))
+    bars = await asyncio.gather(
+        *(load_bars(s, interval, outputsize=window) for s in symbols),
+        return_exceptions=True,
+    )
+    # A symbol that failed upstream (or ran out of budget) is reported, not fatal
+    bars = [([], [], []) if isinstance(b, Exception) else b for b in bars]
+    prices = [b[1] for b in bars]
+    volumes = [b[2] for b in bars]
+
+    # Score in a worker thread so large watchlists do not stall the event loop
+    scores = await asyncio.to_thread(score_watchlist, prices, volumes, window)
+
+    results = []
+    for i, symbol in enumerate(symbols):
+        if i not in scores:
+            results.append({"symbol": symbol, "error": "No market data"})
+            continue
+        sc = scores[i]
+        risk_reason, severity = classify_risk(
+            sc["ewma_score"], sc["volume_ratio"], False
+        )
+        manipulation_confidence = calculate_manipulation_confidence(
+            sc["ewma_score"], sc["volume_ratio"], 0.0
+        )
+        results.append(
+            {
+                "symbol": symbol,
+                "price": prices[i][-1],
+                "volume": volumes[i][-1],
+                "ewma": sc["ewma_value"],
+                "ewma_zscore": sc["ewma_score"],
+                "volume_ratio": sc["volume_ratio"],
+                "volume_zscore": sc["volume_zscore"],
+                "momentum_score": sc["momentum_score"],
+                "is_anomaly": severity > 0,
+                "risk_reason": risk_reason,
+                "severity_level": severity,
+                "manipulation_confidence": manipulation_confidence,
+            }
+        )
+
+    # Most suspicious first
+    results.sort(
+        key=lambda r: (
+            r.get("severity_level", -1),
+            r.get("manipulation_confidence", 0),
+        ),
+        reverse=True,
+    )
+    return results
+
+
+def _check_scan_size(symbols: List[str]):
+    if not symbols:
+        raise HTTPException(status_code=400, detail="No symbols supplied")
+    if len(symbols) > SCAN_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many symbols, at most {SCAN_MAX_SYMBOLS} per scan",
+        )
+
+
+@app.get("/scan")
+async def scan(
+    symbols: str = Query(..., example="RELIANCE.NSE,TCS.NSE,INFY.NSE"),
+    interval: str = "1min",
+):
+    """
+    Market-data scan of a comma-separated watchlist. Scores are statistical
+    only (no ML or social signals) so hundreds of symbols stay cheap.
+    """
+    symbol_list = [s for s in symbols.split(",") if s.strip()]
+    _check_scan_size(symbol_list)
+    results = await scan_symbols(symbol_list, interval)
+    return {
+        "interval": interval,
+        "count": len(results),
+        "anomalies": sum(1 for r in results if r.get("is_anomaly")),
+        "results": results,
+        "analysis_timestamp": datetime.datetime.utcnow().isoformat(),
+    }
+
+
+@app.post("/scan")
+async def scan_post(
+    symbols: List[str] = Body(..., embed=True), interval: str = Body("1min")
+):
+    """Same as GET /scan for watchlists too long for a query string"""
+    return await scan(",".join(symbols), interval)
+
+
 @app.get("/alerts")
 async def get_alerts(
+    response: Response,
     symbol: str = None,
     handle: str = None,
     limit: int = 100,
     from_ts: str = None,
     to_ts: str = None,
     since_hours: int = None,
+    cursor: str = None,
 ):
     """
     Filters:
@@ -733,25 +1242,12 @@ async def get_alerts(
       - from_ts / to_ts: ISO timestamps (inclusive)
       - since_hours: relative filter (if provided)
       - limit: max records returned (most recent)
+      - cursor: X-Next-Cursor header of the previous page, for older records
     """
-    result = alerts.copy()
-
-    if symbol:
-        result = [a for a in result if a["symbol"].lower() == symbol.lower()]
-
-    if handle:
-        result = [
-            a for a in result if a.get("source_handle", "").lower() == handle.lower()
-        ]
-
+    start = end = before = None
     if from_ts:
         try:
-            f = datetime.datetime.fromisoformat(from_ts)
-            result = [
-                a
-                for a in result
-                if datetime.datetime.fromisoformat(a["created_at"]) >= f
-            ]
+            start = to_naive_utc(from_ts)
         except Exception:
             raise HTTPException(
                 status_code=400, detail="Invalid from_ts format. Use ISO format."
@@ -759,12 +1255,7 @@ async def get_alerts(
 
     if to_ts:
         try:
-            t = datetime.datetime.fromisoformat(to_ts)
-            result = [
-                a
-                for a in result
-                if datetime.datetime.fromisoformat(a["created_at"]) <= t
-            ]
+            end = to_naive_utc(to_ts)
         except Exception:
             raise HTTPException(
                 status_code=400, detail="Invalid to_ts format. Use ISO format."
@@ -772,69 +1263,118 @@ async def get_alerts(
 
     if since_hours:
         cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=int(since_hours))
-        result = [
-            a
-            for a in result
-            if datetime.datetime.fromisoformat(a["created_at"]) >= cutoff
-        ]
+        start = cutoff if start is None else max(start, cutoff)
+
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    # most recent first up to limit
+    if alert_repo is not None:
+        result = await asyncio.to_thread(
+            alert_repo.query,
+            symbol=symbol or None,
+            handle=handle or None,
+            start=start,
+            end=end,
+            limit=int(limit),
+            before=before,
+        )
+    else:
+        result = alerts.query(
+            symbol=symbol or None,
+            handle=handle or None,
+            start=to_epoch(start) if start is not None else None,
+            end=to_epoch(end) if end is not None else None,
+            limit=int(limit),
+            before=(to_epoch(before[0]), before[1]) if before else None,
+        )
+
+    if result and len(result) >= int(limit):
+        response.headers["X-Next-Cursor"] = encode_cursor(result[-1])
+    return result
 
-    # return most recent first up to limit
-    result_sorted = sorted(result, key=lambda x: x.get("created_at", ""), reverse=True)
-    return result_sorted[: int(limit)]
+
+def describe_coordination(coord: Dict) -> Dict:
+    """Coordination graph evidence in the alert detail format"""
+    if coord["coordinated"]:
+        summary = (
+            f"Potential pump group coordination detected: "
+            f"{coord['burst_handles']} handles posted within "
+            f"{coord['timing_spread_seconds']:.0f}s; posting cluster spans "
+            f"{coord['cluster_handles']} handles and "
+            f"{coord['cluster_symbols']} symbols"
+        )
+    elif coord["cluster_handles"]:
+        summary = (
+            f"Posting cluster of {coord['cluster_handles']} handles and "
+            f"{coord['cluster_symbols']} symbols, no co-posting burst"
+        )
+    else:
+        summary = "No ingested social activity for this symbol"
+    return {
+        "simultaneous_signals": coord["burst_messages"],
+        "cross_platform_activity": coord["burst_channels"] > 1,
+        "coordinated_timing": coord["coordinated"],
+        "network_analysis": summary,
+        **coord,
+    }
 
 
 @app.get("/alerts/{alert_id}")
 async def get_alert(alert_id: str):
     """Enhanced alert details with comprehensive social media analysis"""
-    for a in alerts:
-        if a.get("id") == alert_id:
-            # Generate enhanced social snippets
-            social = [
-                {
-                    "handle": a["source_handle"],
-                    "text": a.get(
-                        "trigger_message",
-                        f"🚀 {a['symbol']} is breaking out! Target price incoming!",
-                    ),
-                    "ts": a["created_at"],
-                    "platform": "Telegram",
-                    "manipulation_confidence": 0.85,
-                    "sentiment_score": 0.92,
-                },
-                {
-                    "handle": "market_insider_pro",
-                    "text": f"URGENT: {a['symbol']} massive volume spike detected. Something big is happening!",
-                    "ts": a["created_at"],
-                    "platform": "Telegram",
-                    "manipulation_confidence": 0.73,
-                    "sentiment_score": 0.88,
-                },
-                {
-                    "handle": "trade_signals_vip",
-                    "text": f"{a['symbol']} looking very bullish on charts. Buy zone activated! 💎",
-                    "ts": a["created_at"],
-                    "platform": "WhatsApp",
-                    "manipulation_confidence": 0.67,
-                    "sentiment_score": 0.85,
-                },
-            ]
+    a = alerts.get(alert_id)
+    if a is None and alert_repo is not None:
+        a = await asyncio.to_thread(alert_repo.get, alert_id)
+    if a is None:
+        raise HTTPException(status_code=404, detail="Alert not found")
+
+    # Generate enhanced social snippets
+    social = [
+        {
+            "handle": a["source_handle"],
+            "text": a.get(
+                "trigger_message",
+                f"🚀 {a['symbol']} is breaking out! Target price incoming!",
+            ),
+            "ts": a["created_at"],
+            "platform": "Telegram",
+            "manipulation_confidence": 0.85,
+            "sentiment_score": 0.92,
+        },
+        {
+            "handle": "market_insider_pro",
+            "text": f"URGENT: {a['symbol']} massive volume spike detected. Something big is happening!",
+            "ts": a["created_at"],
+            "platform": "Telegram",
+            "manipulation_confidence": 0.73,
+            "sentiment_score": 0.88,
+        },
+        {
+            "handle": "trade_signals_vip",
+            "text": f"{a['symbol']} looking very bullish on charts. Buy zone activated! 💎",
+            "ts": a["created_at"],
+            "platform": "WhatsApp",
+            "manipulation_confidence": 0.67,
+            "sentiment_score": 0.85,
+        },
+    ]
 
-            return {
-                "alert": a,
-                "social_snippets": social,
-                "entity_verification": {
-                    "verified_entities": 0,
-                    "unverified_entities": 3,
-                    "high_risk_sources": 2,
-                },
-                "coordination_analysis": {
-                    "simultaneous_signals": len(social),
-                    "cross_platform_activity": True,
-                    "coordinated_timing": True,
-                    "network_analysis": "Potential pump group coordination detected",
-                },
-            }
-    raise HTTPException(status_code=404, detail="Alert not found")
+    return {
+        "alert": a,
+        "social_snippets": social,
+        "entity_verification": {
+            "verified_entities": 0,
+            "unverified_entities": 3,
+            "high_risk_sources": 2,
+        },
+        "coordination_analysis": describe_coordination(
+            a.get("coordination") or coordination.analyze(a["symbol"])
+        ),
+    }
 
 
 @app.get("/social_analysis")
@@ -842,7 +1382,7 @@ async def social_analysis(symbol: str = Query(..., example="RELIANCE.NSE")):
     """Analyze social media signals for a specific symbol"""
 
     # Generate social signals for the symbol
-    signals = generate_social_signals(symbol, "medium")
+    signals = social_signals_for(symbol, "medium")
 
     # Aggregate analysis
     total_signals = len(signals)
@@ -866,6 +1406,8 @@ async def social_analysis(symbol: str = Query(..., example="RELIANCE.NSE")):
         platform = signal.get("channel", "Unknown")
         platforms[platform] = platforms.get(platform, 0) + 1
 
+    campaigns = copy_paste_campaigns(symbol)
+
     return {
         "symbol": symbol,
         "analysis_timestamp": datetime.datetime.utcnow().isoformat(),
@@ -876,31 +1418,102 @@ async def social_analysis(symbol: str = Query(..., example="RELIANCE.NSE")):
             "average_sentiment": round(avg_sentiment, 3),
             "average_manipulation_confidence": round(avg_manipulation, 3),
             "platform_distribution": platforms,
+            "near_duplicate_clusters": campaigns["clusters"],
+            "near_duplicate_messages": campaigns["messages"],
+            "largest_near_duplicate_cluster": campaigns["largest_cluster"],
             "risk_assessment": (
                 "High"
                 if high_confidence >= 3
-                else "Medium" if high_confidence >= 1 else "Low"
+                else (
+                    "Medium" if high_confidence >= 1 or campaigns["clusters"] else "Low"
+                )
             ),
         },
     }
 
 
+@app.post("/social/ingest")
+async def social_ingest(messages: List[Dict] = Body(..., embed=True)):
+    """
+    Bulk ingestion of social messages: {"messages": [{"text", "handle",
+    "platform", "timestamp", "symbols"}, ...]}. Messages are matched to
+    symbols, scored and kept in per-symbol windows read by /fetch_live and
+    /social_analysis.
+    """
+    if len(messages) > SOCIAL_INGEST_MAX_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {SOCIAL_INGEST_MAX_BATCH} messages per request",
+        )
+    # Scoring is pure Python; keep the event loop serving other requests
+    return await asyncio.to_thread(social_pipeline.ingest, messages)
+
+
+@app.get("/social/ingest/stats")
+async def social_ingest_stats():
+    return {
+        **social_pipeline.stats(),
+        "entities": entity_index.stats() if entity_index is not None else None,
+    }
+
+
 @app.get("/search_symbols")
 async def search_symbols(query: str = Query(..., min_length=1)):
     if not TD_API_KEY:
         raise HTTPException(status_code=500, detail="No Twelve Data API key configured")
-    url = "https://api.twelvedata.com/symbol_search"
-    params = {"symbol": query, "apikey": TD_API_KEY}
-    async with httpx.AsyncClient(timeout=10) as client:
-        r = await client.get(url, params=params)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail="Search API error")
-        return r.json()
+    try:
+        return await twelvedata.symbol_search(query)
+    except (UpstreamError, httpx.HTTPError):
+        raise HTTPException(status_code=502, detail="Search API error")
 
 
-@app.get("/verify_entity")
-async def verify_entity(handle: str = Query(..., min_length=1)):
-    trust = score_trust(handle)
+@app.get("/upstream/stats")
+async def upstream_stats():
+    """Upstream latency, coalescing, cache and request budget counters"""
+    return {
+        **twelvedata.stats(),
+        "cache": market_cache.stats(),
+        "bar_store": bar_store.stats() if bar_store is not None else None,
+    }
+
+
+@app.get("/bars")
+async def bar_history(
+    symbol: str = Query(..., example="RELIANCE.NSE"),
+    interval: str = Query("1min"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    limit: int = Query(1000, ge=1),
+):
+    """Stored bar history, oldest first, as columns; start/end are ISO times"""
+    import numpy as np
+
+    if bar_store is None:
+        raise HTTPException(status_code=404, detail="No bar store configured")
+    if limit > BAR_QUERY_MAX:
+        raise HTTPException(
+            status_code=413, detail=f"At most {BAR_QUERY_MAX} bars per request"
+        )
+    if not bar_store.exists(symbol, interval):
+        raise HTTPException(status_code=404, detail="No stored bars for symbol")
+    try:
+        lo = int(to_epoch(start)) if start else None
+        hi = int(to_epoch(end)) if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid start or end time")
+    bars = bar_store.series(symbol, interval).between(lo, hi)[-limit:]
+    return {
+        "symbol": symbol,
+        "interval": interval,
+        "count": len(bars),
+        "timestamps": np.datetime_as_string(
+            bars["ts"].astype("datetime64[s]")
+        ).tolist(),
+        **{field: bars[field].tolist() for field in bars.dtype.names[1:]},
+    }
+
+
+def _verification(handle: str, trust: Dict) -> Dict:
     return {
         "handle": handle,
         "registered": trust["registered"],
@@ -909,78 +1522,104 @@ async def verify_entity(handle: str = Query(..., min_length=1)):
     }
 
 
-@app.get("/leaderboard")
-async def leaderboard(limit: int = 10):
-    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=24)
-    recent = []
-    for a in alerts:
-        try:
-            created = datetime.datetime.fromisoformat(a["created_at"])
-            if created >= cutoff:
-                recent.append(a)
-        except Exception:
-            pass
-    counts = Counter([a["symbol"] for a in recent])
-    top = counts.most_common(limit)
-    return {"top": [{"symbol": s, "count": c} for s, c in top]}
+@app.get("/verify_entity")
+async def verify_entity(handle: str = Query(..., min_length=1)):
+    return _verification(handle, score_trust(handle))
 
 
-@app.get("/threat_score")
-async def threat_score():
-    """Enhanced market threat assessment"""
-    weights = {
-        "Severe Market Manipulation": 50,
-        "Pump-Dump Anomaly (Social Media Confirmed) (ML-Verified)": 45,
-        "Pump-Dump Anomaly (ML-Verified)": 40,
-        "Pump-Dump Anomaly (Social Media Confirmed)": 35,
-        "Pump-Dump Anomaly": 30,
-        "Insider Trading Spike (ML-Verified)": 35,
-        "Insider Trading Spike (Social Media Confirmed)": 30,
-        "Insider Trading Spike": 25,
-        "Unusual Volume Surge (ML-Verified)": 25,
-        "Unusual Volume Surge (Social Media Confirmed)": 20,
-        "Unusual Volume Surge": 15,
-        "Market Irregularity": 10,
-        "ML Anomaly (Requires Review)": 15,
+@app.post("/verify_entities")
+async def verify_entities(handles: List[str] = Body(..., embed=True)):
+    """Bulk form of /verify_entity, results in request order"""
+    if len(handles) > VERIFY_MAX_HANDLES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {VERIFY_MAX_HANDLES} handles per request",
+        )
+    scores = trust_service.score_many(handles)
+    return {"results": [_verification(h, scores[h]) for h in handles]}
+
+
+@app.get("/coordination")
+async def coordination_analysis(symbol: str = Query(..., example="RELIANCE.NSE")):
+    """Live co-posting burst and cluster evidence for a symbol"""
+    return {"symbol": symbol, **describe_coordination(coordination.analyze(symbol))}
+
+
+@app.get("/coordination/stats")
+async def coordination_stats():
+    return coordination.stats()
+
+
+@app.get("/near_duplicates/stats")
+async def near_duplicates_stats():
+    return near_duplicates.stats()
+
+
+@app.get("/trust/stats")
+async def trust_stats():
+    """Registry size and trust cache hit rate"""
+    return trust_service.stats()
+
+
+@app.get("/ml_models/stats")
+async def ml_model_stats():
+    """Model cache hit rate and fit/score timings for sizing ML_MODEL_CACHE_SIZE"""
+    if cpu_pool.kind == "thread":
+        # Threads share this process's registry
+        return {
+            **ml_scoring.registry_stats(),
+            "pool": cpu_pool.stats(),
+            "warmup": warmup_state,
+        }
+    workers = await cpu_pool.map_workers(ml_scoring.registry_stats)
+    return {
+        **ml_scoring.merge_registry_stats(workers),
+        "workers": workers,
+        "pool": cpu_pool.stats(),
+        "warmup": warmup_state,
     }
 
-    # Calculate weighted threat score
-    total = 0
-    high_severity_count = 0
-    recent_alerts = alerts[-100:] if len(alerts) > 100 else alerts
 
-    for a in recent_alerts:
-        reason = a.get("reason", "")
-        severity = a.get("severity_level", 1)
-        manipulation_confidence = a.get("manipulation_confidence", 0)
+@app.get("/state/stats")
+async def state_stats():
+    """Alert store backend, size, eviction and cross-worker stream counters"""
+    if STATE_BACKEND == "sqlite":
+        return {**alerts.stats(), "stream_tail": stream_tail_state}
+    return alerts.stats()
+
 
-        # Base weight from reason
-        base_weight = weights.get(reason, 5)
+@app.get("/persistence/stats")
+async def persistence_stats():
+    """Background alert writer counters (null when DATABASE_URL is unset)"""
+    return alert_writer.stats() if alert_writer is not None else None
 
-        # Severity multiplier
-        severity_multiplier = 1 + (severity * 0.3)
 
-        # Manipulation confidence boost
-        confidence_boost = manipulation_confidence / 100 * 0.5
+def compute_leaderboard(limit: int = 10) -> Dict:
+    top = threat_aggregates.leaderboard(limit)
+    return {"top": [{"symbol": s, "count": c} for s, c in top]}
+
+
+@app.get("/leaderboard")
+async def leaderboard(limit: int = 10):
+    return compute_leaderboard(limit)
+
+
+@app.get("/threat_score")
+async def threat_score():
+    """Enhanced market threat assessment"""
+    return compute_threat_score()
 
-        alert_score = base_weight * severity_multiplier * (1 + confidence_boost)
-        total += alert_score
 
-        if severity >= 3:
-            high_severity_count += 1
+def compute_threat_score() -> Dict:
+    # Weighted threat score, maintained incrementally as alerts arrive
+    agg = threat_aggregates.threat()
+    total = agg["recent_score"]
+    high_severity_count = agg["high_severity_alerts"]
 
     # Additional factors
-    recent_alerts_1h = [
-        a
-        for a in alerts
-        if (
-            datetime.datetime.utcnow()
-            - datetime.datetime.fromisoformat(a["created_at"])
-        ).total_seconds()
-        < 3600
-    ]
+    alerts_last_hour = agg["alerts_last_hour"]
 
-    recency_boost = min(20, len(recent_alerts_1h) * 3)
+    recency_boost = min(20, alerts_last_hour * 3)
     total += recency_boost
 
     # Calculate final score
@@ -1008,9 +1647,100 @@ async def threat_score():
         "level": level,
         "color": color,
         "details": {
-            "total_recent_alerts": len(recent_alerts),
+            "total_recent_alerts": agg["recent_alerts"],
             "high_severity_alerts": high_severity_count,
-            "alerts_last_hour": len(recent_alerts_1h),
+            "alerts_last_hour": alerts_last_hour,
             "assessment_time": datetime.datetime.utcnow().isoformat(),
         },
     }
+
+
+def _stream_snapshot(sub) -> list:
+    """Initial state for a new stream client"""
+    recent = [a for a in alerts.query(limit=200) if sub.wants(a["symbol"])][:50]
+    return [
+        ("threat_score", compute_threat_score()),
+        ("leaderboard", compute_leaderboard(10)),
+        ("alerts", recent),
+    ]
+
+
+@app.get("/stream")
+async def stream(request: Request, symbols: Optional[str] = None):
+    """
+    Server-Sent Events feed of new alerts (`alert`), threat score changes
+    (`threat_score`) and leaderboard changes (`leaderboard`). `symbols` is
+    an optional comma-separated filter for alert events.
+    """
+    sub = broadcaster.subscribe(symbols.split(",") if symbols else None)
+    if sub is None:
+        raise HTTPException(status_code=503, detail="Too many stream clients")
+
+    async def events():
+        try:
+            for event, data in _stream_snapshot(sub):
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+            while not await request.is_disconnected():
+                message = await sub.next(timeout=15)
+                if message is None:
+                    # Keep-alive comment so proxies do not drop idle streams
+                    yield ": ping\n\n"
+                    continue
+                event, data = message
+                yield f"event: {event}\ndata: {data}\n\n"
+        except StreamClosed:
+            yield 'event: error\ndata: {"detail": "Client too slow"}\n\n'
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/stream/ws")
+async def stream_ws(websocket: WebSocket):
+    """
+    WebSocket variant of /stream. Clients may send
+    {"action": "subscribe", "symbols": [...]} at any time to change their
+    symbol filter (an empty list means all symbols).
+    """
+    await websocket.accept()
+    symbols = websocket.query_params.get("symbols")
+    sub = broadcaster.subscribe(symbols.split(",") if symbols else None)
+    if sub is None:
+        await websocket.close(code=1013)
+        return
+
+    async def receive_commands():
+        while True:
+            msg = await websocket.receive_json()
+            if isinstance(msg, dict) and msg.get("action") == "subscribe":
+                sub.set_symbols(msg.get("symbols") or [])
+
+    reader = asyncio.create_task(receive_commands())
+    try:
+        for event, data in _stream_snapshot(sub):
+            await websocket.send_text(
+                json.dumps({"event": event, "data": data}, default=str)
+            )
+        while not reader.done():
+            message = await sub.next(timeout=15)
+            if message is None:
+                continue
+            event, data = message
+            await websocket.send_text(f'{{"event": "{event}", "data": {data}}}')
+    except StreamClosed:
+        await websocket.close(code=1008)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        broadcaster.unsubscribe(sub)
+
+
+@app.get("/stream/stats")
+async def stream_stats():
+    return broadcaster.stats()
@@ -0,0 +1,237 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bar_store import BarStore, bars_from_values, values_from_bars
+from upstream import SingleFlight
+
+# Bar length per Twelve Data interval, used as the cache freshness TTL
+INTERVAL_SECONDS = {
+    "1min": 60,
+    "5min": 300,
+    "15min": 900,
+    "30min": 1800,
+    "45min": 2700,
+    "1h": 3600,
+    "2h": 7200,
+    "4h": 14400,
+    "1day": 86400,
+    "1week": 604800,
+    "1month": 2592000,
+}
+
+
+class BudgetExceeded(Exception):
+    """Raised when too many calls are already queued for request credits"""
+
+
+class TokenBucket:
+    """
+    Token-bucket request budget. Callers that find the bucket empty queue
+    in FIFO order until a token refills; once `max_queue` callers are already
+    waiting, further calls fail fast with BudgetExceeded.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        max_queue: int = 100,
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.max_queue = max_queue
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+        self.granted = 0
+        self.delayed = 0
+        self.rejected = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise BudgetExceeded("Upstream request budget exhausted")
+        self.waiting += 1
+        try:
+            # asyncio.Lock wakes waiters in FIFO order
+            async with self._lock:
+                self._refill()
+                if self.tokens < 1:
+                    self.delayed += 1
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self._refill()
+                self.tokens -= 1
+                self.granted += 1
+        finally:
+            self.waiting -= 1
+
+    def stats(self) -> Dict:
+        self._refill()
+        return {
+            "rate_per_minute": round(self.rate * 60, 3),
+            "capacity": self.capacity,
+            "tokens": round(self.tokens, 3),
+            "queued": self.waiting,
+            "granted": self.granted,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+        }
+
+
+class _Series:
+    __slots__ = ("values", "fetched_at", "depth")
+
+    def __init__(self, values: List[Dict], fetched_at: float, depth: int):
+        # Oldest-first Twelve Data bar dicts
+        self.values = values
+        self.fetched_at = fetched_at
+        self.depth = depth
+
+
+class MarketDataCache:
+    """
+    Bar history per (symbol, interval) in front of the time_series endpoint.
+
+    Entries stay fresh for one bar length. A stale entry is refreshed by
+    fetching only the bars since the last fetch (plus the last cached bar,
+    which may still have been forming) and merging them in. Every upstream
+    call spends one token from the request budget.
+
+    Given a BarStore, fetched bars are also written through to disk, and a
+    series missing from memory (e.g. after a restart) is loaded back from
+    it, so only the bars since the last write are fetched.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, str, int], Awaitable[Dict]],
+        budget: TokenBucket,
+        max_bars: int = 500,
+        store: Optional[BarStore] = None,
+    ):
+        self.fetch = fetch
+        self.budget = budget
+        self.max_bars = max_bars
+        self.store = store
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._flight = SingleFlight()
+
+        self.hits = 0
+        self.delta_fetches = 0
+        self.full_fetches = 0
+        self.stale_served = 0
+        self.warm_loads = 0
+
+    @staticmethod
+    def ttl(interval: str) -> float:
+        return INTERVAL_SECONDS.get(interval, 60)
+
+    def _response(self, entry: _Series, outputsize: int) -> Dict:
+        # Same shape as the upstream payload: newest bar first
+        return {"values": list(reversed(entry.values[-outputsize:]))}
+
+    def _warm(self, key, interval: str) -> Optional[_Series]:
+        if self.store is None or not self.store.exists(*key):
+            return None
+        series = self.store.series(*key)
+        bars = series.tail(self.max_bars)
+        if not len(bars):
+            return None
+        daily = self.ttl(interval) >= INTERVAL_SECONDS["1day"]
+        entry = _Series(values_from_bars(bars, daily), series.modified, len(bars))
+        self._series[key] = entry
+        self.warm_loads += 1
+        return entry
+
+    def _persist(self, key, values: List[Dict]):
+        if self.store is not None and values:
+            self.store.append(*key, bars_from_values(values))
+
+    async def get(self, symbol: str, interval: str, outputsize: int = 200) -> Dict:
+        key = (symbol.upper(), interval)
+        entry = self._series.get(key)
+        if entry is None:
+            entry = self._warm(key, interval)
+        if (
+            entry is not None
+            and entry.depth >= outputsize
+            and time.time() - entry.fetched_at < self.ttl(interval)
+        ):
+            self.hits += 1
+            return self._response(entry, outputsize)
+
+        try:
+            # Concurrent pollers of one stale series share a single refresh
+            data = await self._flight.do(
+                (key, outputsize),
+                lambda: self._refresh(key, symbol, interval, outputsize),
+            )
+        except BudgetExceeded:
+            if entry is None:
+                raise
+            self.stale_served += 1
+            return self._response(entry, outputsize)
+
+        entry = self._series.get(key)
+        if entry is None:
+            # Upstream answered without bars (error payload); pass it through
+            return data
+        return self._response(entry, outputsize)
+
+    async def _refresh(self, key, symbol: str, interval: str, outputsize: int) -> Dict:
+        entry = self._series.get(key)
+        now = time.time()
+
+        if entry is not None and entry.depth >= outputsize:
+            missed = int((now - entry.fetched_at) // self.ttl(interval)) + 2
+            if missed < outputsize:
+                await self.budget.acquire()
+                data = await self.fetch(symbol, interval, missed)
+                if "values" not in data:
+                    return data
+                delta = list(reversed(data["values"]))
+                if (
+                    delta
+                    and entry.values
+                    and delta[0]["datetime"] <= entry.values[-1]["datetime"]
+                ):
+                    first = delta[0]["datetime"]
+                    kept = [v for v in entry.values if v["datetime"] < first]
+                    entry.values = (kept + delta)[-self.max_bars :]
+                    entry.fetched_at = now
+                    self._persist(key, delta)
+                    self.delta_fetches += 1
+                    return data
+                # No overlap with the cached bars means we may have a gap
+
+        await self.budget.acquire()
+        data = await self.fetch(symbol, interval, outputsize)
+        if "values" not in data:
+            return data
+        values = list(reversed(data["values"]))[-self.max_bars :]
+        self._series[key] = _Series(values, now, outputsize)
+        self._persist(key, values)
+        self.full_fetches += 1
+        return data
+
+    def stats(self) -> Dict:
+        upstream_calls = self.delta_fetches + self.full_fetches
+        lookups = self.hits + upstream_calls + self.stale_served
+        return {
+            "series": len(self._series),
+            "hits": self.hits,
+            "delta_fetches": self.delta_fetches,
+            "full_fetches": self.full_fetches,
+            "stale_served": self.stale_served,
+            "warm_loads": self.warm_loads,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "budget": self.budget.stats(),
+        }
@@ -0,0 +1,257 @@
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds; Prometheus client defaults extended down to 1ms for fast stages
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Stage durations of the current request when it asked for a profile
+_profile: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "profile", default=None
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    inner = ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs)
+    return f"{{{inner}}}" if inner else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        # Per-bucket counts; cumulated only when rendered
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class HistogramFamily:
+    """Histograms of one metric, one per label combination"""
+
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[tuple, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(labels.items())
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = _Histogram(len(self.buckets) + 1)
+            child.counts[i] += 1
+            child.sum += value
+            child.count += 1
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            children = [
+                (key, list(c.counts), c.sum, c.count)
+                for key, c in self._children.items()
+            ]
+        bounds = self.buckets + (math.inf,)
+        for key, counts, total, count in children:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                labels = _labels(key + (("le", _number(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_labels(key)} {count}")
+        return lines
+
+
+class CounterFamily:
+    """Monotonic counters of one metric, one per label combination"""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(labels.items())
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        lines.extend(f"{self.name}{_labels(k)} {_number(v)}" for k, v in values)
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time, so it costs nothing meanwhile"""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_number(self.read())}",
+        ]
+
+
+class Metrics:
+    """Metric families rendered together in the Prometheus text format"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._families: List = []
+
+    def _add(self, family):
+        self._families.append(family)
+        return family
+
+    def histogram(
+        self, name: str, documentation: str, buckets=DEFAULT_BUCKETS
+    ) -> HistogramFamily:
+        full = f"{self.namespace}_{name}"
+        return self._add(HistogramFamily(full, documentation, buckets))
+
+    def counter(self, name: str, documentation: str) -> CounterFamily:
+        return self._add(CounterFamily(f"{self.namespace}_{name}", documentation))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        return self._add(Gauge(f"{self.namespace}_{name}", documentation, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self._families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Times named stages of the hot path into a histogram labelled by stage,
+    and into the current request's profile when one was asked for
+    """
+
+    def __init__(self, histogram: HistogramFamily):
+        self.histogram = histogram
+
+    def record(self, name: str, seconds: float):
+        self.histogram.observe(seconds, stage=name)
+        profile = _profile.get()
+        if profile is not None:
+            profile[name] = profile.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+
+def server_timing(profile: Dict[str, float], total: float) -> str:
+    """Server-Timing header value, durations in milliseconds"""
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in profile.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status per route template. A
+    request sent with `X-Profile: 1` gets its stage breakdown back in a
+    Server-Timing response header.
+    """
+
+    def __init__(
+        self,
+        app,
+        latency: HistogramFamily,
+        responses: CounterFamily,
+        exclude: Iterable[str] = (),
+    ):
+        self.app = app
+        self.latency = latency
+        self.responses = responses
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        wanted = any(
+            k == b"x-profile" and v not in (b"", b"0")
+            for k, v in scope.get("headers", ())
+        )
+        profile: Optional[Dict[str, float]] = {} if wanted else None
+        token = _profile.set(profile)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile is not None:
+                    value = server_timing(profile, time.perf_counter() - start)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _profile.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            if path not in self.exclude:
+                method = scope.get("method", "")
+                self.latency.observe(
+                    time.perf_counter() - start, route=path, method=method
+                )
+                self.responses.inc(route=path, method=method, status=str(status))
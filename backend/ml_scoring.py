@@ -0,0 +1,209 @@
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from model_registry import IsolationForestRegistry
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy, pandas and scikit-learn are imported on first use, or by
+# preload(), so importing this module (and spawning pool workers) stays cheap
+
+# Fitted models of this process. Pool workers each hold their own, and the
+# pool routes a given model key to the same worker every time.
+registry = IsolationForestRegistry()
+
+
+def configure(
+    max_models: int = 256,
+    retrain_after_bars: int = 30,
+    retrain_after_seconds: float = 900,
+    shared_path: Optional[str] = None,
+):
+    """
+    Replace this process's model registry; also used as pool initializer.
+    With shared_path, fitted models are shared through that SQLite file.
+    """
+    global registry
+    shared = None
+    if shared_path:
+        from state import SqliteModelStore
+
+        shared = SqliteModelStore(shared_path)
+    registry = IsolationForestRegistry(
+        max_models=max_models,
+        retrain_after_bars=retrain_after_bars,
+        retrain_after_seconds=retrain_after_seconds,
+        shared=shared,
+    )
+
+
+def preload():
+    """Import numpy, pandas and scikit-learn now instead of on the first score"""
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+
+
+def build_ml_features(prices, volumes):
+    """Engineer normalized IsolationForest features, one row per bar"""
+    import numpy as np
+    import pandas as pd
+
+    df = pd.DataFrame({"price": prices, "volume": volumes}).astype(float)
+
+    # Feature engineering
+    df["returns"] = df["price"].pct_change().fillna(0)
+    df["log_volume"] = np.log(df["volume"] + 1)
+    df["price_volatility"] = df["returns"].rolling(window=10).std().fillna(0)
+    df["volume_ma"] = df["volume"].rolling(window=10).mean()
+    df["volume_ratio"] = df["volume"] / (df["volume_ma"] + 1e-9)
+    df["price_momentum"] = df["returns"].rolling(window=5).mean().fillna(0)
+
+    # Normalize features
+    feature_cols = [
+        "returns",
+        "log_volume",
+        "price_volatility",
+        "volume_ratio",
+        "price_momentum",
+    ]
+    for col in feature_cols:
+        df[f"{col}_norm"] = (df[col] - df[col].mean()) / (df[col].std() + 1e-9)
+
+    # Prepare features for ML model
+    normalized_cols = [f"{col}_norm" for col in feature_cols]
+    return df[normalized_cols].values
+
+
+def _rolling(X: "np.ndarray", window: int) -> "np.ndarray":
+    import numpy as np
+
+    # (rows, cols - window + 1, window) views of trailing windows per column
+    return np.lib.stride_tricks.sliding_window_view(X, window, axis=1)
+
+
+def batch_ml_features(P: "np.ndarray", V: "np.ndarray") -> "np.ndarray":
+    """
+    build_ml_features for every row of (windows, bars) price and volume
+    arrays at once; returns (windows, bars, features)
+    """
+    import numpy as np
+
+    P = np.asarray(P, dtype=float)
+    V = np.asarray(V, dtype=float)
+    rows, n = P.shape
+    returns = np.zeros_like(P)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[:, 1:] = P[:, 1:] / P[:, :-1] - 1
+
+    # Leading rows without a full rolling window: pandas gives NaN, which
+    # fillna(0) turns into 0 except for volume_ratio
+    volatility = np.zeros_like(P)
+    volume_ratio = np.full_like(P, np.nan)
+    momentum = np.zeros_like(P)
+    if n >= 10:
+        volatility[:, 9:] = _rolling(returns, 10).std(axis=-1, ddof=1)
+        volume_ratio[:, 9:] = V[:, 9:] / (_rolling(V, 10).mean(axis=-1) + 1e-9)
+    if n >= 5:
+        momentum[:, 4:] = _rolling(returns, 5).mean(axis=-1)
+
+    features = np.stack(
+        [returns, np.log(V + 1), volatility, volume_ratio, momentum], axis=-1
+    )
+    with np.errstate(invalid="ignore"):
+        mean = np.nanmean(features, axis=1, keepdims=True)
+        std = np.nanstd(features, axis=1, ddof=1, keepdims=True)
+    return (features - mean) / (std + 1e-9)
+
+
+def compute_ml_isolation_forest(
+    prices,
+    volumes,
+    model_key: Optional[tuple] = None,
+    new_bars: int = 0,
+    timings: Optional[Dict[str, float]] = None,
+):
+    """
+    Enhanced ML-based anomaly detection with multiple features.
+
+    With a model_key the fitted model is taken from the worker's model registry
+    and only refitted once enough new bars have arrived. Given a timings dict,
+    seconds spent on features and on the model are added to it.
+    """
+    if len(prices) < 30:
+        return 0.0, False
+
+    start = time.perf_counter()
+    features = build_ml_features(prices, volumes)
+    if timings is not None:
+        timings["ml_features"] = time.perf_counter() - start
+        start = time.perf_counter()
+
+    # Use more data for training if available
+    train_size = min(len(features) - 1, 100)
+    X_train = features[-train_size - 1 : -1]
+    X_test = features[-1].reshape(1, -1)
+
+    try:
+        if model_key is not None:
+            result = registry.score(model_key, X_train, X_test, new_bars=new_bars)
+            if timings is not None:
+                timings["ml_model"] = time.perf_counter() - start
+            return result
+
+        # Enhanced Isolation Forest
+        from sklearn.ensemble import IsolationForest
+
+        iso = IsolationForest(
+            n_estimators=150, contamination=0.05, random_state=42, max_features=0.8
+        )
+        iso.fit(X_train)
+        anomaly_score = float(iso.decision_function(X_test)[0])
+        prediction = int(iso.predict(X_test)[0])
+
+        # Convert to positive anomaly score (higher = more anomalous)
+        ml_score = float(-anomaly_score)
+        ml_is_anomaly = prediction == -1
+
+        return ml_score, ml_is_anomaly
+    except Exception as e:
+        print(f"ML anomaly detection error: {e}")
+        return 0.0, False
+
+
+def timed_ml_isolation_forest(
+    prices, volumes, model_key: Optional[tuple] = None, new_bars: int = 0
+) -> Tuple[float, bool, Dict[str, float]]:
+    """compute_ml_isolation_forest plus its stage timings, for pool callers"""
+    timings: Dict[str, float] = {}
+    score, is_anomaly = compute_ml_isolation_forest(
+        prices, volumes, model_key, new_bars, timings
+    )
+    return score, is_anomaly, timings
+
+
+def registry_stats() -> Dict:
+    return registry.stats()
+
+
+def merge_registry_stats(stats: List[Dict]) -> Dict:
+    """Combine the registry stats of several workers"""
+    summed = (
+        "cached_models",
+        "max_models",
+        "hits",
+        "misses",
+        "retrains",
+        "shared_hits",
+        "evictions",
+        "fit_count",
+        "score_count",
+    )
+    merged = {k: sum(s[k] for s in stats) for k in summed}
+    lookups = merged["hits"] + merged["misses"] + merged["retrains"]
+    merged["hit_rate"] = round(merged["hits"] / lookups, 4) if lookups else 0.0
+    for avg, count in (("avg_fit_ms", "fit_count"), ("avg_score_ms", "score_count")):
+        total_ms = sum(s[avg] * s[count] for s in stats)
+        merged[avg] = round(total_ms / merged[count], 3) if merged[count] else 0.0
+    return merged
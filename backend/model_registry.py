@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    from sklearn.ensemble import IsolationForest
+
+
+def default_isolation_forest() -> "IsolationForest":
+    # scikit-learn takes about a second to import; load it on the first fit
+    from sklearn.ensemble import IsolationForest
+
+    return IsolationForest(
+        n_estimators=150, contamination=0.05, random_state=42, max_features=0.8
+    )
+
+
+class _CachedModel:
+    __slots__ = ("model", "fitted_at", "bars_since_fit")
+
+    def __init__(self, model, fitted_at: float):
+        self.model = model
+        self.fitted_at = fitted_at
+        self.bars_since_fit = 0
+
+
+class IsolationForestRegistry:
+    """
+    LRU cache of fitted IsolationForest models keyed by (symbol, interval).
+
+    A cached model is reused for scoring until `retrain_after_bars` new bars
+    have arrived or it is older than `retrain_after_seconds`, at which point
+    it is refitted on the latest training window.
+
+    Given a `shared` model store (get/put of (model, fitted_at) by key),
+    models fitted by other workers are adopted while still fresh, and this
+    registry's fits are published to it.
+
+    Safe to share between threads (CPU_POOL_KIND=thread). The cache and
+    counters are guarded by a lock; fits run outside it, so different keys
+    fit in parallel and two first requests for one key may both fit.
+    """
+
+    def __init__(
+        self,
+        max_models: int = 256,
+        retrain_after_bars: int = 30,
+        retrain_after_seconds: float = 900,
+        model_factory: Callable[[], "IsolationForest"] = default_isolation_forest,
+        shared=None,
+    ):
+        self.max_models = max_models
+        self.retrain_after_bars = retrain_after_bars
+        self.retrain_after_seconds = retrain_after_seconds
+        self.model_factory = model_factory
+        self.shared = shared
+        self._models: "OrderedDict[Hashable, _CachedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.retrains = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.fit_count = 0
+        self.fit_seconds = 0.0
+        self.score_count = 0
+        self.score_seconds = 0.0
+
+    def __len__(self):
+        return len(self._models)
+
+    def _needs_refit(self, entry: _CachedModel, now: float) -> bool:
+        return (
+            entry.bars_since_fit >= self.retrain_after_bars
+            or now - entry.fitted_at >= self.retrain_after_seconds
+        )
+
+    def _fit(self, X_train: "np.ndarray"):
+        start = time.perf_counter()
+        model = self.model_factory()
+        model.fit(X_train)
+        with self._lock:
+            self.fit_count += 1
+            self.fit_seconds += time.perf_counter() - start
+        return model
+
+    def _fit_or_adopt(
+        self, key: Hashable, X_train: "np.ndarray", now: float, newer_than: float
+    ) -> Tuple[object, float]:
+        if self.shared is not None:
+            found = self.shared.get(key)
+            if found is not None:
+                model, fitted_at = found
+                if (
+                    fitted_at > newer_than
+                    and now - fitted_at < self.retrain_after_seconds
+                ):
+                    with self._lock:
+                        self.shared_hits += 1
+                    return model, fitted_at
+        model = self._fit(X_train)
+        if self.shared is not None:
+            self.shared.put(key, model, now)
+        return model, now
+
+    def get_model(self, key: Hashable, X_train: "np.ndarray", new_bars: int = 0):
+        """Return a fitted model for key, fitting or refitting it if needed"""
+        now = time.time()
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                entry.bars_since_fit += new_bars
+                self._models.move_to_end(key)
+                if not self._needs_refit(entry, now):
+                    self.hits += 1
+                    return entry.model
+                self.retrains += 1
+                # Another worker may already have refitted this key
+                newer_than = entry.fitted_at
+            else:
+                self.misses += 1
+                newer_than = float("-inf")
+
+        model, fitted_at = self._fit_or_adopt(key, X_train, now, newer_than)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                self._models[key] = _CachedModel(model, fitted_at)
+                while len(self._models) > self.max_models:
+                    self._models.popitem(last=False)
+                    self.evictions += 1
+            else:
+                entry.model, entry.fitted_at = model, fitted_at
+                entry.bars_since_fit = 0
+        return model
+
+    def score(
+        self,
+        key: Hashable,
+        X_train: "np.ndarray",
+        X_test: "np.ndarray",
+        new_bars: int = 0,
+    ) -> Tuple[float, bool]:
+        """Score X_test with the cached model for key (higher = more anomalous)"""
+        model = self.get_model(key, X_train, new_bars)
+        start = time.perf_counter()
+        # predict() is just decision_function() < 0, so avoid a second pass
+        anomaly_score = float(model.decision_function(X_test)[0])
+        with self._lock:
+            self.score_count += 1
+            self.score_seconds += time.perf_counter() - start
+        return float(-anomaly_score), anomaly_score < 0
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._models.clear()
+            else:
+                self._models.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.retrains
+            return {
+                "cached_models": len(self._models),
+                "max_models": self.max_models,
+                "hits": self.hits,
+                "misses": self.misses,
+                "retrains": self.retrains,
+                "shared_hits": self.shared_hits,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "fit_count": self.fit_count,
+                "avg_fit_ms": (
+                    round(self.fit_seconds / self.fit_count * 1000, 3)
+                    if self.fit_count
+                    else 0.0
+                ),
+                "score_count": self.score_count,
+                "avg_score_ms": (
+                    round(self.score_seconds / self.score_count * 1000, 3)
+                    if self.score_count
+                    else 0.0
+                ),
+            }
@@ -0,0 +1,271 @@
+import itertools
+import re
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from social_ingest import symbol_key
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_PRIME = (1 << 61) - 1
+_DIGITS_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lower case, numbers collapsed and whitespace squeezed, so template
+    variations (target prices, spacing) do not change the shingles"""
+    return _SPACE_RE.sub(" ", _DIGITS_RE.sub("0", text.lower())).strip()
+
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles of normalized text. The
+    permutations (and numpy) are loaded with the first signature.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 7):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self._params: Optional[tuple] = None
+
+    def _permutations(self) -> tuple:
+        # Deterministic, so threads racing on the first call agree
+        if self._params is None:
+            import numpy as np
+
+            rng = np.random.RandomState(self.seed)
+            size = (self.num_perm, 1)
+            a = rng.randint(1, 2**31 - 1, size=size).astype(np.uint64)
+            b = rng.randint(0, 2**31 - 1, size=size).astype(np.uint64)
+            self._params = (a, b, np.uint64(_PRIME))
+        return self._params
+
+    def shingles(self, text: str) -> "np.ndarray":
+        import numpy as np
+
+        text = normalize_text(text)
+        k = self.shingle_size
+        grams = {text[i : i + k] for i in range(max(1, len(text) - k + 1))}
+        return np.fromiter(
+            (zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams)
+        )
+
+    def signature(self, text: str) -> "np.ndarray":
+        import numpy as np
+
+        a, b, prime = self._permutations()
+        hashes = self.shingles(text)
+        # (a * x + b) mod p for every permutation and shingle at once; with
+        # a, b < 2**31 and x < 2**32 nothing overflows 64 bits
+        permuted = (a * hashes[None, :] + b) % prime
+        # Low 32 bits are plenty to compare minima and halve the memory
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+class _Cluster:
+    __slots__ = ("size", "symbols", "first_ts", "last_ts", "sample")
+
+    def __init__(self, ts: float, sample: str):
+        self.size = 0
+        self.symbols: Counter = Counter()
+        self.first_ts = ts
+        self.last_ts = ts
+        self.sample = sample
+
+
+class NearDuplicateIndex:
+    """
+    Groups near-duplicate messages (copy-paste pump templates) within a
+    sliding time window.
+
+    Each message's MinHash signature is cut into `bands` bands; messages
+    sharing any band land in the same LSH bucket, so finding candidates is
+    a few dict lookups instead of a comparison with every message. A
+    candidate is confirmed when the signatures agree on at least
+    `threshold` of their positions (the estimated Jaccard similarity), and
+    the message joins that candidate's cluster. Messages older than
+    `window_seconds`, or beyond `max_messages`, are evicted from buckets
+    and clusters.
+
+    Messages may arrive out of order. Each one expires relative to the
+    newest timestamp seen when it arrived, so eviction follows arrival
+    order and a late batch never pushes live messages out early. A message
+    already older than the window is not indexed.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 3600,
+        max_messages: int = 100000,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.6,
+        max_candidates: int = 16,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.window_seconds = window_seconds
+        self.max_messages = max_messages
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self.hasher = MinHasher(num_perm)
+
+        self._ids = itertools.count()
+        self._order: deque = deque()
+        self._signatures: Dict[int, "np.ndarray"] = {}
+        self._message_cluster: Dict[int, int] = {}
+        self._message_symbols: Dict[int, List[str]] = {}
+        # (band, band bytes) -> ids in insertion order
+        self._buckets: Dict[tuple, Dict[int, None]] = {}
+        self._clusters: Dict[int, _Cluster] = {}
+        self._by_symbol: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        # Expiry key of the newest message so far; keys never decrease
+        self._latest = float("-inf")
+
+        self.added = 0
+        self.duplicates = 0
+        self.late = 0
+
+    def _band_keys(self, signature: "np.ndarray"):
+        r = self.rows
+        return [
+            (b, signature[b * r : (b + 1) * r].tobytes()) for b in range(self.bands)
+        ]
+
+    def _evict_oldest(self):
+        _, mid = self._order.popleft()
+        signature = self._signatures.pop(mid)
+        for key in self._band_keys(signature):
+            bucket = self._buckets[key]
+            del bucket[mid]
+            if not bucket:
+                del self._buckets[key]
+        cid = self._message_cluster.pop(mid)
+        cluster = self._clusters[cid]
+        cluster.size -= 1
+        for symbol in self._message_symbols.pop(mid):
+            cluster.symbols[symbol] -= 1
+            if not cluster.symbols[symbol]:
+                del cluster.symbols[symbol]
+            counts = self._by_symbol[symbol]
+            counts[cid] -= 1
+            if not counts[cid]:
+                del counts[cid]
+                if not counts:
+                    del self._by_symbol[symbol]
+        if not cluster.size:
+            del self._clusters[cid]
+
+    def _expire(self, now: float, room: int = 0):
+        cutoff = now - self.window_seconds
+        while self._order and (
+            self._order[0][0] < cutoff or len(self._order) + room > self.max_messages
+        ):
+            self._evict_oldest()
+
+    def _match(self, signature: "np.ndarray", keys) -> Optional[int]:
+        checked = set()
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            # Newest bucket members first; a big campaign fills a bucket
+            # with one cluster, so a few checks are enough
+            for mid in itertools.islice(reversed(bucket), self.max_candidates):
+                if mid in checked:
+                    continue
+                checked.add(mid)
+                agreement = int((self._signatures[mid] == signature).sum())
+                if agreement >= self.threshold * len(signature):
+                    return self._message_cluster[mid]
+                if len(checked) >= self.max_candidates:
+                    return None
+        return None
+
+    def add(
+        self,
+        text: str,
+        symbols: Iterable[str] = (),
+        ts: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        Index a message; returns the size of the cluster it joined, or 0 if
+        it is already outside the window. now defaults to the wall clock;
+        replays pass event time.
+        """
+        now = time.time() if now is None else now
+        ts = now if ts is None else ts
+        if ts < now - self.window_seconds:
+            return 0
+        signature = self.hasher.signature(text)
+        keys = self._band_keys(signature)
+        symbols = list(dict.fromkeys(symbol_key(s) for s in symbols))
+        with self._lock:
+            self._expire(now, room=1)
+            cid = self._match(signature, keys)
+            mid = next(self._ids)
+            if cid is None:
+                cid = mid
+                self._clusters[cid] = _Cluster(ts, text)
+            else:
+                self.duplicates += 1
+            cluster = self._clusters[cid]
+            cluster.size += 1
+            cluster.first_ts = min(cluster.first_ts, ts)
+            cluster.last_ts = max(cluster.last_ts, ts)
+            for symbol in symbols:
+                cluster.symbols[symbol] += 1
+                self._by_symbol.setdefault(symbol, Counter())[cid] += 1
+
+            # A future timestamp (clock skew) must not hold everything back
+            key = max(min(ts, now), self._latest)
+            if key > ts:
+                self.late += 1
+            self._latest = key
+            self._order.append((key, mid))
+            self._signatures[mid] = signature
+            self._message_cluster[mid] = cid
+            self._message_symbols[mid] = symbols
+            for key in keys:
+                self._buckets.setdefault(key, {})[mid] = None
+            self.added += 1
+            return cluster.size
+
+    def symbol_summary(
+        self, symbol: str, min_size: int = 3, now: Optional[float] = None
+    ) -> Dict:
+        """Near-duplicate clusters of at least min_size messages about symbol"""
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+            counts = self._by_symbol.get(symbol_key(symbol), {})
+            sizes = {cid: n for cid, n in counts.items() if n >= min_size}
+            largest = max(sizes, key=sizes.get) if sizes else None
+            return {
+                "clusters": len(sizes),
+                "messages": sum(sizes.values()),
+                "largest_cluster": sizes[largest] if largest is not None else 0,
+                "largest_sample": (
+                    self._clusters[largest].sample if largest is not None else None
+                ),
+            }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "messages": len(self._order),
+                "clusters": len(self._clusters),
+                "buckets": len(self._buckets),
+                "added": self.added,
+                "duplicates": self.duplicates,
+                "late_messages": self.late,
+            }
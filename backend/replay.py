@@ -0,0 +1,528 @@
+import argparse
+import bisect
+import csv
+import datetime
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from alert_store import to_epoch
+from bar_store import BarStore
+from entities import EntityIndex
+from ml_scoring import batch_ml_features
+from near_duplicates import NearDuplicateIndex
+from resample import MultiTimeframeDetector
+from risk import (
+    analyze_sentiment_and_manipulation,
+    calculate_manipulation_confidence,
+    classify_risk,
+)
+from scan import score_matrix
+from social_ingest import (
+    cashtag_entities,
+    parse_messages,
+    read_jsonl,
+    symbol_key,
+    with_entities,
+)
+
+# Same windows as live detection: get_detector's 60-bar streaming detector
+# and the 200 bars load_bars fetches, of which the last 101 train the model
+DETECTOR_WINDOW = 60
+ML_WINDOW = 200
+ML_TRAIN = 100
+
+DEFAULT_LISTINGS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "listings.csv"
+)
+
+
+class ReplayConfig:
+    """Detection settings for a replay; defaults follow the live environment"""
+
+    def __init__(
+        self,
+        interval: str = "1min",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        min_severity: int = 1,
+        ml: bool = True,
+        ml_retrain_bars: int = int(os.getenv("ML_RETRAIN_BARS", "30")),
+        ml_retrain_seconds: float = float(os.getenv("ML_RETRAIN_SECONDS", "900")),
+        ml_estimators: int = 150,
+        ml_contamination: float = 0.05,
+        social_window_seconds: float = float(os.getenv("SOCIAL_WINDOW_MINUTES", "60"))
+        * 60,
+        social_limit: int = 50,
+        near_dup_window_seconds: float = float(
+            os.getenv("NEAR_DUP_WINDOW_MINUTES", "60")
+        )
+        * 60,
+        near_dup_threshold: float = float(os.getenv("NEAR_DUP_THRESHOLD", "0.6")),
+        near_dup_min_cluster: int = int(os.getenv("NEAR_DUP_MIN_CLUSTER", "3")),
+    ):
+        self.interval = interval
+        self.start = start
+        self.end = end
+        self.min_severity = min_severity
+        self.ml = ml
+        self.ml_retrain_bars = ml_retrain_bars
+        self.ml_retrain_seconds = ml_retrain_seconds
+        self.ml_estimators = ml_estimators
+        self.ml_contamination = ml_contamination
+        self.social_window_seconds = social_window_seconds
+        self.social_limit = social_limit
+        self.near_dup_window_seconds = near_dup_window_seconds
+        self.near_dup_threshold = near_dup_threshold
+        self.near_dup_min_cluster = near_dup_min_cluster
+
+
+def load_messages(
+    records: Iterable[Dict], extract=cashtag_entities, utc_offset_seconds: float = 0
+) -> Dict[str, List[Dict]]:
+    """
+    Score historical messages and group them by symbol, oldest first. Bar
+    times are exchange-local, so message times are shifted by the offset.
+    """
+    by_symbol: Dict[str, List[Dict]] = {}
+    for msg in with_entities(parse_messages(records, time.time()), extract):
+        if msg.get("rejected") or not msg["entities_extracted"]:
+            continue
+        analysis = analyze_sentiment_and_manipulation(msg["message"])
+        signal = {
+            "ts": msg["ts"] + utc_offset_seconds,
+            "message": msg["message"],
+            "sentiment_score": analysis["sentiment_score"],
+            "manipulation_confidence": analysis["manipulation_confidence"],
+        }
+        for symbol in msg["entities_extracted"]:
+            by_symbol.setdefault(symbol, []).append(signal)
+    for signals in by_symbol.values():
+        signals.sort(key=lambda s: s["ts"])
+    return by_symbol
+
+
+def _refit_points(ts: List[int], config: ReplayConfig) -> List[int]:
+    # Where the live model registry would refit: after retrain_bars new bars
+    # or retrain_seconds, here counted in event time
+    points = [0]
+    fitted_at = ts[0]
+    since = 0
+    for i in range(1, len(ts)):
+        since += 1
+        if (
+            since >= config.ml_retrain_bars
+            or ts[i] - fitted_at >= config.ml_retrain_seconds
+        ):
+            points.append(i)
+            fitted_at = ts[i]
+            since = 0
+    return points
+
+
+def _ml_scores(close, volume, ts, first: int, config: ReplayConfig):
+    """IsolationForest score and flag of every bar from `first` on"""
+    n = len(close) - first
+    scores = np.zeros(n)
+    flags = np.zeros(n, dtype=bool)
+    P = np.lib.stride_tricks.sliding_window_view(close, ML_WINDOW)
+    V = np.lib.stride_tricks.sliding_window_view(volume, ML_WINDOW)
+    offset = first - ML_WINDOW + 1
+    points = _refit_points(ts[first:].tolist(), config) + [n]
+    fits = 0
+    for a, b in zip(points, points[1:]):
+        # Between refits the model is fixed, so all its bars score in one call
+        features = batch_ml_features(
+            P[offset + a : offset + b], V[offset + a : offset + b]
+        )
+        try:
+            model = IsolationForest(
+                n_estimators=config.ml_estimators,
+                contamination=config.ml_contamination,
+                random_state=42,
+                max_features=0.8,
+            )
+            model.fit(features[0, -ML_TRAIN - 1 : -1])
+            fits += 1
+            decision = model.decision_function(features[:, -1])
+        except ValueError:
+            # Degenerate windows (e.g. zero prices) fail live as well
+            continue
+        scores[a:b] = -decision
+        flags[a:b] = decision < 0
+    return scores, flags, fits
+
+
+def _timeframe_scores(bars: np.ndarray, start: int, stop: int) -> List[Dict]:
+    """
+    Ready slower-timeframe scores at each 1-minute bar in [start, stop), as
+    sync_timeframes gives them to live detection: warmed up on the stored
+    history before start, then fed one bar at a time
+    """
+    frames = MultiTimeframeDetector()
+    frames.sync(bars[max(0, start - frames.history_bars) : start])
+    fields = ("ts", "open", "high", "low", "close", "volume")
+    ready: List[Dict] = []
+    current, ingested = {}, None
+    for row in zip(*(bars[f][start:stop].tolist() for f in fields)):
+        frames.update(*row)
+        # Scores only change when some timeframe completes a bar
+        count = sum(d.bars_ingested for d in frames.detectors.values())
+        if count != ingested:
+            scores = frames.scores()
+            current = {tf: s for tf, s in scores.items() if s["ready"]}
+            ingested = count
+        ready.append(current)
+    return ready
+
+
+def _bar_time(ts: int) -> str:
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+
+
+_stores: Dict[str, BarStore] = {}
+
+
+def replay_symbol(
+    root: str, symbol: str, signals: List[Dict], config: ReplayConfig
+) -> Dict:
+    """
+    Run one symbol's bars through detection in time order: the streaming
+    statistics, IsolationForest, slower timeframes resampled from 1-minute
+    bars, ingested messages of the social window, near-duplicate campaigns
+    and classify_risk, bar by bar
+    """
+    store = _stores.get(root)
+    if store is None:
+        store = _stores[root] = BarStore(root)
+    series = store.series(symbol, config.interval)
+    history = series.view()
+    ts = history["ts"]
+    lo = 0 if config.start is None else int(np.searchsorted(ts, config.start))
+    hi = len(history) if config.end is None else int(np.searchsorted(ts, config.end))
+    # Every evaluated bar needs the full history live detection would see
+    begin = max(0, lo - ML_WINDOW + 1)
+    bars = history[begin:hi]
+    first = max(lo - begin, ML_WINDOW - 1)
+    result = {"symbol": symbol, "bars": 0, "ml_fits": 0, "alerts": []}
+    if len(bars) <= first:
+        return result
+
+    ts = bars["ts"]
+    close = bars["close"].astype(float)
+    volume = bars["volume"].astype(float)
+    windows = slice(first - DETECTOR_WINDOW + 1, len(bars) - DETECTOR_WINDOW + 1)
+    scores = score_matrix(
+        np.lib.stride_tricks.sliding_window_view(close, DETECTOR_WINDOW)[windows],
+        np.lib.stride_tricks.sliding_window_view(volume, DETECTOR_WINDOW)[windows],
+        span=12,
+    )
+    if config.ml:
+        ml_scores, ml_flags, result["ml_fits"] = _ml_scores(
+            close, volume, ts, first, config
+        )
+    else:
+        ml_scores = np.zeros(len(bars) - first)
+        ml_flags = np.zeros(len(bars) - first, dtype=bool)
+    # Live detection adds slower timeframes only on 1-minute bars
+    timeframes = (
+        _timeframe_scores(history, begin + first, hi)
+        if config.interval == "1min"
+        else [None] * (len(bars) - first)
+    )
+
+    signal_ts = [s["ts"] for s in signals]
+    duplicates = (
+        NearDuplicateIndex(
+            window_seconds=config.near_dup_window_seconds,
+            threshold=config.near_dup_threshold,
+        )
+        if signals
+        else None
+    )
+    key = symbol_key(symbol)
+    indexed = 0
+
+    columns = zip(
+        ts[first:].tolist(),
+        close[first:].tolist(),
+        volume[first:].tolist(),
+        scores["ewma_score"].tolist(),
+        scores["volume_ratio"].tolist(),
+        scores["momentum_score"].tolist(),
+        ml_scores.tolist(),
+        ml_flags.tolist(),
+        timeframes,
+    )
+    alerts = result["alerts"]
+    for (
+        now,
+        price,
+        vol,
+        ewma_score,
+        vol_ratio,
+        momentum,
+        ml_score,
+        ml_flag,
+        frames,
+    ) in columns:
+        social_signals = []
+        clusters = 0
+        if signals:
+            end = bisect.bisect_right(signal_ts, now)
+            start = bisect.bisect_left(
+                signal_ts, now - config.social_window_seconds, 0, end
+            )
+            social_signals = signals[max(start, end - config.social_limit) : end]
+            while indexed < end:
+                signal = signals[indexed]
+                duplicates.add(signal["message"], [key], signal["ts"], signal["ts"])
+                indexed += 1
+            clusters = duplicates.symbol_summary(key, config.near_dup_min_cluster, now)[
+                "clusters"
+            ]
+
+        reason, severity = classify_risk(
+            ewma_score, vol_ratio, ml_flag, social_signals, clusters, frames
+        )
+        if severity < config.min_severity:
+            continue
+        alerts.append(
+            {
+                "symbol": symbol,
+                "time": _bar_time(now),
+                "ts": now,
+                "price": price,
+                "volume": int(vol),
+                "reason": reason,
+                "severity_level": severity,
+                "manipulation_confidence": calculate_manipulation_confidence(
+                    ewma_score, vol_ratio, ml_score, social_signals
+                ),
+                "ewma_zscore": round(ewma_score, 4),
+                "volume_ratio": round(vol_ratio, 4),
+                "momentum_score": round(momentum, 4),
+                "ml_score": round(ml_score, 4),
+                "ml_flag": ml_flag,
+                "social_signals_count": len(social_signals),
+                "near_duplicate_clusters": clusters,
+            }
+        )
+    result["bars"] = len(bars) - first
+    return result
+
+
+def replay(
+    root: str,
+    symbols: List[str],
+    signals: Dict[str, List[Dict]],
+    config: ReplayConfig,
+    workers: int = 1,
+) -> Iterator[Dict]:
+    """replay_symbol results per symbol, across a process pool if workers > 1"""
+    jobs = [(root, s, signals.get(symbol_key(s), []), config) for s in symbols]
+    if workers <= 1:
+        for job in jobs:
+            yield replay_symbol(*job)
+        return
+    # spawn, like the API's CPU pool: forking a process with threads is unsafe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        yield from pool.map(replay_symbol, *zip(*jobs))
+
+
+def load_events(path: str) -> List[Dict]:
+    """
+    Labeled manipulation events from CSV or JSON lines with symbol, start
+    and optional end (ISO exchange-local time or epoch seconds) columns
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.endswith(".csv"):
+            records = list(csv.DictReader(f))
+        else:
+            records = list(read_jsonl(f))
+    events = []
+    for record in records:
+        if not record.get("symbol") or not record.get("start"):
+            continue
+        start = to_epoch(_number(record["start"]))
+        end = to_epoch(_number(record.get("end") or record["start"]))
+        events.append(
+            {"symbol": symbol_key(record["symbol"]), "start": start, "end": end}
+        )
+    return events
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def evaluate(alerts: List[Dict], events: List[Dict], tolerance: float = 0) -> Dict:
+    """
+    Precision (alerts inside a labeled event of their symbol) and recall
+    (events with at least one alert) for each minimum severity, with event
+    windows widened by `tolerance` seconds on both sides
+    """
+    windows: Dict[str, List] = {}
+    for e in events:
+        windows.setdefault(e["symbol"], []).append(
+            (e["start"] - tolerance, e["end"] + tolerance, e["start"])
+        )
+    starts = {}
+    reach = {}
+    for symbol, ws in windows.items():
+        ws.sort()
+        starts[symbol] = [w[0] for w in ws]
+        # Furthest window end among windows starting at or before each one
+        reach[symbol] = list(np.maximum.accumulate([w[1] for w in ws]))
+
+    def inside(alert) -> bool:
+        symbol = symbol_key(alert["symbol"])
+        i = bisect.bisect_right(starts.get(symbol, []), alert["ts"]) - 1
+        return i >= 0 and reach[symbol][i] >= alert["ts"]
+
+    report = {"events": len(events), "by_min_severity": {}}
+    for level in range(1, 5):
+        selected = [a for a in alerts if a["severity_level"] >= level]
+        hits = sum(1 for a in selected if inside(a))
+        alert_ts: Dict[str, List[float]] = {}
+        for a in selected:
+            alert_ts.setdefault(symbol_key(a["symbol"]), []).append(a["ts"])
+        for stamps in alert_ts.values():
+            stamps.sort()
+
+        detected = 0
+        latencies = []
+        for symbol, ws in windows.items():
+            stamps = alert_ts.get(symbol, [])
+            for lo, hi, start in ws:
+                i = bisect.bisect_left(stamps, lo)
+                if i < len(stamps) and stamps[i] <= hi:
+                    detected += 1
+                    latencies.append(stamps[i] - start)
+
+        precision = hits / len(selected) if selected else 0.0
+        recall = detected / len(events) if events else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if hits else 0.0
+        report["by_min_severity"][level] = {
+            "alerts": len(selected),
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(f1, 4),
+            "median_latency_seconds": (
+                statistics.median(latencies) if latencies else None
+            ),
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    """Replay stored bars and messages through detection and score the alerts"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("root", nargs="?", default=os.getenv("BAR_STORE_DIR"))
+    parser.add_argument("--interval", default="1min")
+    parser.add_argument("--symbols", help="comma-separated; default all stored")
+    parser.add_argument("--start", help="ISO exchange-local time")
+    parser.add_argument("--end", help="ISO exchange-local time, exclusive")
+    parser.add_argument("--messages", help="JSONL message history")
+    parser.add_argument("--listings", default=DEFAULT_LISTINGS)
+    parser.add_argument(
+        "--utc-offset-minutes",
+        type=float,
+        default=330,
+        help="exchange offset from UTC applied to message times (IST = 330)",
+    )
+    parser.add_argument("--labels", help="CSV or JSONL of labeled events")
+    parser.add_argument("--tolerance-minutes", type=float, default=15)
+    parser.add_argument("--alerts", help="write alerts here as JSONL")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-severity", type=int, default=1)
+    parser.add_argument("--no-ml", action="store_true")
+    parser.add_argument("--ml-retrain-bars", type=int)
+    parser.add_argument("--ml-retrain-seconds", type=float)
+    parser.add_argument("--ml-estimators", type=int, default=150)
+    parser.add_argument("--ml-contamination", type=float, default=0.05)
+    args = parser.parse_args(argv)
+    if not args.root:
+        parser.error("bar store directory required (or set BAR_STORE_DIR)")
+
+    config = ReplayConfig(
+        interval=args.interval,
+        start=to_epoch(args.start) if args.start else None,
+        end=to_epoch(args.end) if args.end else None,
+        min_severity=args.min_severity,
+        ml=not args.no_ml,
+        ml_estimators=args.ml_estimators,
+        ml_contamination=args.ml_contamination,
+    )
+    if args.ml_retrain_bars is not None:
+        config.ml_retrain_bars = args.ml_retrain_bars
+    if args.ml_retrain_seconds is not None:
+        config.ml_retrain_seconds = args.ml_retrain_seconds
+
+    store = BarStore(args.root)
+    symbols = (
+        [s.strip() for s in args.symbols.split(",") if s.strip()]
+        if args.symbols
+        else store.symbols(args.interval)
+    )
+    store.close()
+
+    signals: Dict[str, List[Dict]] = {}
+    if args.messages:
+        extract = (
+            EntityIndex.from_csv(args.listings).extract
+            if os.path.exists(args.listings)
+            else cashtag_entities
+        )
+        with open(args.messages, encoding="utf-8") as f:
+            signals = load_messages(
+                read_jsonl(f), extract, args.utc_offset_minutes * 60
+            )
+
+    start = time.perf_counter()
+    alerts: List[Dict] = []
+    bars = fits = 0
+    out = open(args.alerts, "w", encoding="utf-8") if args.alerts else None
+    try:
+        for result in replay(args.root, symbols, signals, config, args.workers):
+            bars += result["bars"]
+            fits += result["ml_fits"]
+            alerts.extend(result["alerts"])
+            if out is not None:
+                for alert in result["alerts"]:
+                    out.write(json.dumps(alert, separators=(",", ":")) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "symbols": len(symbols),
+        "bars": bars,
+        "alerts": len(alerts),
+        "ml_fits": fits,
+        "seconds": round(elapsed, 3),
+        "bars_per_second": round(bars / elapsed, 1) if elapsed else 0.0,
+    }
+    if args.labels:
+        summary["evaluation"] = evaluate(
+            alerts, load_events(args.labels), args.tolerance_minutes * 60
+        )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
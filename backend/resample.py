@@ -0,0 +1,143 @@
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Optional
+
+from market_cache import INTERVAL_SECONDS
+from streaming import StreamingAnomalyDetector
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Timeframes built locally from 1-minute bars instead of fetched upstream
+DERIVED_TIMEFRAMES = ("5min", "15min", "1h")
+
+
+class BarResampler:
+    """
+    Builds `seconds`-long OHLCV bars from 1-minute bars one at a time. A
+    bar completes when the first 1-minute bar of the next period arrives.
+    A 1-minute bar sent again for the same time (it was still forming
+    upstream) replaces its earlier version.
+    """
+
+    __slots__ = ("seconds", "forming", "_before_last", "last_ts")
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        # [start, open, high, low, close, volume] of the period in progress,
+        # and the same without its latest 1-minute bar
+        self.forming: Optional[list] = None
+        self._before_last: Optional[list] = None
+        self.last_ts: Optional[int] = None
+
+    def update(self, ts: int, o: float, h: float, lo: float, c: float, v: int):
+        """Add a 1-minute bar; returns the (start, o, h, lo, c, v) it completed"""
+        if self.last_ts is not None and ts < self.last_ts:
+            # Late bar of a period already handed on
+            return None
+        base = self._before_last if ts == self.last_ts else self.forming
+        start = ts - ts % self.seconds
+        completed = None
+        if base is not None and base[0] != start:
+            completed = tuple(base)
+            base = None
+        self._before_last = base
+        if base is None:
+            self.forming = [start, o, h, lo, c, v]
+        else:
+            self.forming = [base[0], base[1], max(base[2], h), min(base[3], lo), c]
+            self.forming.append(base[5] + v)
+        self.last_ts = ts
+        return completed
+
+
+class MultiTimeframeDetector:
+    """
+    EWMA, volume and momentum detectors on 5-min, 15-min and hourly bars
+    resampled from one symbol's 1-minute bars. Every 1-minute bar is folded
+    into all timeframes in one pass, and a timeframe's detector ingests a
+    bar when it completes, so its scores describe the last completed bar.
+    """
+
+    def __init__(self, timeframes=DERIVED_TIMEFRAMES, window: int = 60, span: int = 12):
+        self.timeframes = tuple(timeframes)
+        self.window = window
+        self.span = span
+        # 1-minute bars needed to fill the slowest timeframe's window
+        self.history_bars = (
+            window * max(INTERVAL_SECONDS[tf] for tf in self.timeframes) // 60
+        )
+        self.reseeds = 0
+        self.reset()
+
+    def reset(self):
+        self.resamplers = {
+            tf: BarResampler(INTERVAL_SECONDS[tf]) for tf in self.timeframes
+        }
+        self.detectors = {
+            tf: StreamingAnomalyDetector(window=self.window, span=self.span)
+            for tf in self.timeframes
+        }
+        self.last_ts: Optional[int] = None
+        # (ts, close, volume) of the last two 1-minute bars folded in
+        self._recent: deque = deque(maxlen=2)
+
+    def update(self, ts: int, o: float, h: float, lo: float, c: float, v: int):
+        for tf, resampler in self.resamplers.items():
+            completed = resampler.update(ts, o, h, lo, c, v)
+            if completed is not None:
+                self.detectors[tf].update(completed[4], completed[5], completed[0])
+        if self.last_ts is None or ts > self.last_ts:
+            self._recent.append((ts, c, v))
+            self.last_ts = ts
+        elif ts == self.last_ts:
+            self._recent[-1] = (ts, c, v)
+
+    def _continues(self, bars: "np.ndarray") -> bool:
+        """
+        Whether bars extend the history already folded in. The latest bar
+        may still have been forming, so the one before it is compared.
+        """
+        if len(self._recent) < 2:
+            return True
+        ts, close, volume = self._recent[0]
+        i = int(bars["ts"].searchsorted(ts))
+        return (
+            i < len(bars)
+            and bars["ts"][i] == ts
+            and bars["close"][i] == close
+            and bars["volume"][i] == volume
+        )
+
+    def sync(self, bars: "np.ndarray") -> int:
+        """
+        Ingest BAR_DTYPE 1-minute bars, oldest first, from the last one seen
+        onwards (it is folded in again in case it changed). If the history
+        no longer contains the bars already folded in (regenerated data, a
+        revision upstream or a long gap), every timeframe is reset and
+        seeded from bars. Returns the number of bars ingested.
+        """
+        if self.last_ts is not None and len(bars) and not self._continues(bars):
+            self.reseeds += 1
+            self.reset()
+        if self.last_ts is not None:
+            bars = bars[bars["ts"] >= self.last_ts]
+        columns = [bars[f].tolist() for f in ("ts", "open", "high", "low", "close")]
+        columns.append(bars["volume"].tolist())
+        for row in zip(*columns):
+            self.update(*row)
+        return len(bars)
+
+    def scores(self) -> Dict[str, Dict]:
+        """
+        Detector scores per timeframe. A timeframe is ready once it has
+        completed enough bars for the momentum window; until then only its
+        bar count is reported.
+        """
+        result = {}
+        for tf, detector in self.detectors.items():
+            ready = detector.bars_ingested >= detector.long_window
+            entry = {"bars": detector.bars_ingested, "ready": ready}
+            if ready:
+                entry.update(detector.scores())
+            result[tf] = entry
+        return result
@@ -0,0 +1,208 @@
+from typing import Dict, List, Optional, Tuple
+
+from text_match import KeywordMatcher
+
+# Simulated social media manipulation patterns for NLP demonstration
+MANIPULATION_PATTERNS = {
+    "pump_signals": [
+        "🚀🚀 {} going to the moon! Buy now before it's too late!",
+        "BREAKING: {} insider news! Target price {}! Limited time opportunity!",
+        "🔥 {} is the next big thing! Don't miss out! 10x returns guaranteed!",
+        "URGENT: {} pump starting now! Join our premium group for targets!",
+        "💎 {} hidden gem discovered! Buy before market opens tomorrow!",
+    ],
+    "urgency_keywords": [
+        "urgent",
+        "breaking",
+        "limited time",
+        "buy now",
+        "don't miss",
+        "last chance",
+    ],
+    "manipulation_keywords": [
+        "pump",
+        "moon",
+        "rocket",
+        "guaranteed returns",
+        "insider",
+        "target",
+        "premium group",
+    ],
+    "sentiment_indicators": {
+        "extremely_positive": [
+            "🚀",
+            "🔥",
+            "💎",
+            "moon",
+            "rocket",
+            "amazing",
+            "incredible",
+        ],
+        "urgent": ["urgent", "now", "immediate", "breaking", "alert"],
+        "greed": ["guaranteed", "easy money", "quick profit", "10x", "100x"],
+    },
+}
+
+# Every keyword list above in one matcher, lower-cased and deduplicated
+# once instead of on every message
+MANIPULATION_MATCHER = KeywordMatcher(
+    {
+        "urgency": MANIPULATION_PATTERNS["urgency_keywords"],
+        "manipulation": MANIPULATION_PATTERNS["manipulation_keywords"],
+        **{
+            f"sentiment:{name}": words
+            for name, words in MANIPULATION_PATTERNS["sentiment_indicators"].items()
+        },
+    }
+)
+
+
+def _manipulation_keywords(hits: Dict) -> List[str]:
+    # Urgency then manipulation keywords, each in MANIPULATION_PATTERNS order
+    found = hits.get("urgency", set()) | hits.get("manipulation", set())
+    return [
+        keyword
+        for keyword in (
+            MANIPULATION_PATTERNS["urgency_keywords"]
+            + MANIPULATION_PATTERNS["manipulation_keywords"]
+        )
+        if keyword in found
+    ]
+
+
+def extract_manipulation_keywords(text: str) -> List[str]:
+    """Extract manipulation-related keywords from text"""
+    return _manipulation_keywords(MANIPULATION_MATCHER.find(text))
+
+
+def analyze_sentiment_and_manipulation(text: str) -> Dict:
+    """Analyze text for sentiment and manipulation indicators"""
+    hits = MANIPULATION_MATCHER.find(text)
+
+    # Simple sentiment scoring based on keywords
+    positive_indicators = len(hits.get("sentiment:extremely_positive", ()))
+    urgent_indicators = len(hits.get("sentiment:urgent", ()))
+    greed_indicators = len(hits.get("sentiment:greed", ()))
+
+    sentiment_score = min(
+        1.0,
+        (positive_indicators * 0.3 + urgent_indicators * 0.4 + greed_indicators * 0.5),
+    )
+    manipulation_score = min(1.0, (urgent_indicators * 0.4 + greed_indicators * 0.6))
+
+    keywords = _manipulation_keywords(hits)
+    return {
+        "sentiment_score": round(sentiment_score, 3),
+        "manipulation_confidence": round(manipulation_score, 3),
+        "contains_manipulation_keywords": bool(keywords),
+        "keywords_detected": keywords,
+    }
+
+
+def _market_assessment(ewma_score: float, vol_ratio: float) -> Tuple[str, int]:
+    """Risk label and base severity from one series' EWMA and volume scores"""
+    if abs(ewma_score) > 4 and vol_ratio > 5:
+        return "Severe Market Manipulation", 4
+    if abs(ewma_score) > 3 and vol_ratio > 3:
+        return "Pump-Dump Anomaly", 3
+    if abs(ewma_score) > 2.5:
+        return "Insider Trading Spike", 2
+    if vol_ratio > 4:
+        return "Unusual Volume Surge", 2
+    if abs(ewma_score) > 1.5 or vol_ratio > 2:
+        return "Market Irregularity", 1
+    return "Normal", 0
+
+
+def classify_risk(
+    ewma_score: float,
+    vol_ratio: float,
+    ml_flag: bool,
+    social_signals: Optional[List] = None,
+    duplicate_clusters: int = 0,
+    timeframes: Optional[Dict[str, Dict]] = None,
+):
+    """
+    Enhanced risk classification with social media integration. timeframes
+    maps slower timeframes to their detector scores (ewma_score,
+    volume_ratio); the strongest timeframe sets the base risk.
+    """
+
+    # Base risk assessment from market data
+    base, severity = _market_assessment(ewma_score, vol_ratio)
+    minute_anomaly = severity > 0
+
+    # A pump built up over hours can look normal minute by minute
+    slower_anomalies = 0
+    for scores in (timeframes or {}).values():
+        tf_base, tf_severity = _market_assessment(
+            scores["ewma_score"], scores["volume_ratio"]
+        )
+        if tf_severity:
+            slower_anomalies += 1
+        if tf_severity > severity:
+            base, severity = tf_base, tf_severity
+
+    # Cross-timeframe confirmation: the minute anomaly persists on slower bars
+    timeframe_boost = 1 if minute_anomaly and slower_anomalies else 0
+
+    # Social media signal enhancement
+    social_boost = 0
+    if social_signals:
+        high_confidence_signals = [
+            s for s in social_signals if s.get("manipulation_confidence", 0) > 0.7
+        ]
+        if len(high_confidence_signals) >= 3:
+            social_boost = 2
+        elif len(high_confidence_signals) >= 1:
+            social_boost = 1
+    # The same message pasted across accounts is a campaign, whatever its wording
+    if duplicate_clusters:
+        social_boost = max(social_boost, 1)
+
+    # ML confirmation boost
+    ml_boost = 1 if ml_flag and base != "Normal" else 0
+
+    # Final severity calculation
+    final_severity = min(4, severity + social_boost + ml_boost + timeframe_boost)
+
+    # Generate final classification
+    if social_boost > 0 and base != "Normal":
+        base = f"{base} (Social Media Confirmed)"
+
+    if ml_flag and base != "Normal":
+        base = f"{base} (ML-Verified)"
+    elif ml_flag and base == "Normal":
+        base = "ML Anomaly (Requires Review)"
+        final_severity = 1
+
+    return base, final_severity
+
+
+def calculate_manipulation_confidence(
+    ewma_score: float,
+    vol_ratio: float,
+    ml_score: float,
+    social_signals: Optional[List] = None,
+) -> float:
+    """Calculate overall manipulation confidence score (0-100)"""
+
+    # Market data confidence (0-40 points)
+    market_confidence = 0
+    market_confidence += min(20, abs(ewma_score) * 5)  # EWMA contribution
+    market_confidence += min(20, (vol_ratio - 1) * 8)  # Volume contribution
+
+    # ML confidence (0-30 points)
+    ml_confidence = min(30, ml_score * 15)
+
+    # Social media confidence (0-30 points)
+    social_confidence = 0
+    if social_signals:
+        avg_manipulation = sum(
+            s.get("manipulation_confidence", 0) for s in social_signals
+        ) / len(social_signals)
+        signal_count_bonus = min(10, len(social_signals) * 2)
+        social_confidence = (avg_manipulation * 20) + signal_count_bonus
+
+    total_confidence = min(100, market_confidence + ml_confidence + social_confidence)
+    return round(total_confidence, 1)
@@ -0,0 +1,110 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+def ewma_columns(X: np.ndarray, span: int) -> np.ndarray:
+    """
+    adjust=False EWMA of every row of X, i.e. pd.Series(row).ewm(span=span,
+    adjust=False).mean(), computed column by column for all rows at once.
+    The update is the one StreamingAnomalyDetector uses, so a flat row stays
+    exactly flat instead of picking up rounding residuals
+    """
+    q = 1 - 2.0 / (span + 1)
+    out = np.empty_like(X, dtype=float)
+    e = X[:, 0].astype(float)
+    out[:, 0] = e
+    for t in range(1, X.shape[1]):
+        x = X[:, t]
+        e = x + q * (e - x)
+        out[:, t] = e
+    return out
+
+
+def _row_std(X: np.ndarray) -> np.ndarray:
+    # pandas .std() semantics: ddof=1, NaN for a single observation
+    if X.shape[1] < 2:
+        return np.full(X.shape[0], np.nan)
+    return X.std(axis=1, ddof=1)
+
+
+def batch_ewma_anomaly(P: np.ndarray, span: int = 10):
+    """Vectorized compute_ewma_anomaly over the rows of a (symbols, bars) array"""
+    ewma_short = ewma_columns(P, span)
+    ewma_long_last = ewma_columns(P, span * 2)[:, -1]
+
+    resid_short = P - ewma_short
+    resid_std = _row_std(resid_short)
+    z_score_short = resid_short[:, -1] / np.where(resid_std > 0, resid_std, 1e-9)
+
+    ewma_short_last = ewma_short[:, -1]
+    safe_long = np.where(ewma_long_last != 0, ewma_long_last, 1.0)
+    trend_divergence = np.where(
+        ewma_long_last != 0, (ewma_short_last - ewma_long_last) / safe_long, 0.0
+    )
+
+    combined_score = z_score_short + (trend_divergence * 2)
+    return combined_score, ewma_short_last
+
+
+def batch_volume_anomaly(V: np.ndarray, window: int = 20):
+    """Vectorized compute_volume_anomaly over the rows of a (symbols, bars) array"""
+    recent = V[:, -window:]
+    current_vol = V[:, -1]
+    recent_mean = recent.mean(axis=1)
+    recent_std = _row_std(recent)
+
+    volume_zscore = (current_vol - recent_mean) / np.where(
+        recent_std > 0, recent_std, 1e-9
+    )
+    volume_ratio = current_vol / np.where(recent_mean > 0, recent_mean, 1)
+    return volume_zscore, volume_ratio
+
+
+def batch_price_momentum_anomaly(
+    P: np.ndarray, short_window: int = 5, long_window: int = 20
+):
+    """Vectorized compute_price_momentum_anomaly over the rows of P"""
+    returns = np.zeros_like(P)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[:, 1:] = P[:, 1:] / P[:, :-1] - 1
+
+    nan = np.full(P.shape[0], np.nan)
+    enough_short = P.shape[1] >= short_window
+    enough_long = P.shape[1] >= long_window
+    short_momentum = returns[:, -short_window:].mean(axis=1) if enough_short else nan
+    long_momentum = returns[:, -long_window:].mean(axis=1) if enough_long else nan
+    volatility = _row_std(returns[:, -long_window:]) if enough_long else nan
+
+    momentum_divergence = short_momentum - long_momentum
+    risk_adjusted_momentum = momentum_divergence / np.where(
+        volatility > 0, volatility, 1e-9
+    )
+    return risk_adjusted_momentum, short_momentum
+
+
+def stack_windows(series: Sequence[Sequence[float]], window: int) -> np.ndarray:
+    """Stack the trailing `window` values of equally long-enough series"""
+    return np.array([s[-window:] for s in series], dtype=float)
+
+
+def score_matrix(P: np.ndarray, V: np.ndarray, span: int = 12) -> Dict[str, np.ndarray]:
+    """Run the EWMA, volume and momentum detectors over every row at once"""
+    ewma_score, ewma_value = batch_ewma_anomaly(P, span=span)
+    vol_zscore, vol_ratio = batch_volume_anomaly(V)
+    momentum_score, short_momentum = batch_price_momentum_anomaly(P)
+    return {
+        "ewma_score": ewma_score,
+        "ewma_value": ewma_value,
+        "volume_zscore": vol_zscore,
+        "volume_ratio": vol_ratio,
+        "momentum_score": momentum_score,
+        "short_momentum": short_momentum,
+    }
+
+
+def split_by_length(lengths: List[int], window: int):
+    """Indices of series with a full window and of those that are shorter"""
+    full = [i for i, n in enumerate(lengths) if n >= window]
+    short = [i for i, n in enumerate(lengths) if 0 < n < window]
+    return full, short
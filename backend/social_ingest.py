@@ -0,0 +1,320 @@
+import argparse
+import datetime
+import itertools
+import json
+import math
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from alert_store import to_epoch
+
+# $RELIANCE, $TCS etc.; the fallback when no entity index is configured
+CASHTAG_RE = re.compile(r"\$([A-Za-z][A-Za-z0-9&]{0,19})")
+
+
+def symbol_key(symbol: str) -> str:
+    """Signals are keyed by bare ticker: RELIANCE.NSE and $reliance share one"""
+    return symbol.split(".")[0].strip().upper()
+
+
+def cashtag_entities(text: str) -> List[str]:
+    return list(dict.fromkeys(m.upper() for m in CASHTAG_RE.findall(text)))
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    it = iter(iterable)
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def read_jsonl(stream: TextIO) -> Iterator[Dict]:
+    """Records of a JSON-lines stream; blank and malformed lines are skipped"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def parse_messages(records: Iterable[Dict], now: float) -> Iterator[Dict]:
+    """
+    Normalize raw records. Accepted fields: text (or message), handle (or
+    channel), platform, timestamp (ISO or epoch seconds), id and an optional
+    list of symbols the message is already known to mention (a single
+    symbol string is accepted too). Records without text or with a
+    timestamp that cannot be read are rejected; a record without a
+    timestamp is stamped `now`.
+    """
+    for record in records:
+        text = record.get("text") or record.get("message")
+        if not isinstance(text, str) or not text.strip():
+            yield {"rejected": True}
+            continue
+        try:
+            ts = to_epoch(record["timestamp"]) if record.get("timestamp") else now
+            if not math.isfinite(ts):
+                raise ValueError(f"timestamp {ts}")
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            # Stamping it `now` instead would put it in the wrong burst window
+            yield {"rejected": True, "bad_timestamp": True}
+            continue
+        symbols = record.get("symbols") or []
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        elif not isinstance(symbols, (list, tuple)):
+            symbols = []
+        handle = str(record.get("handle") or record.get("channel") or "")
+        yield {
+            "id": str(record.get("id") or uuid.uuid4()),
+            "source": "ingested",
+            "channel": handle,
+            "platform": record.get("platform") or "Unknown",
+            "message": text,
+            "ts": ts,
+            "symbols": [s for s in symbols if isinstance(s, str)],
+        }
+
+
+def with_entities(
+    messages: Iterable[Dict], extract: Callable[[str], List[str]]
+) -> Iterator[Dict]:
+    for msg in messages:
+        if not msg.get("rejected"):
+            found = extract(msg["message"]) + msg.pop("symbols")
+            msg["entities_extracted"] = list(
+                dict.fromkeys(symbol_key(s) for s in found if s)
+            )
+        yield msg
+
+
+def with_scores(
+    messages: Iterable[Dict],
+    analyze: Callable[[str], Dict],
+    trust: Callable[[str, str], Dict],
+) -> Iterator[Dict]:
+    """Keyword, sentiment/manipulation and source trust scores per message"""
+    for msg in messages:
+        # Messages about no known symbol cannot feed any detector; skip scoring
+        if not msg.get("rejected") and msg["entities_extracted"]:
+            analysis = analyze(msg["message"])
+            source = trust(msg["channel"], msg["message"])
+            msg.update(
+                sentiment_score=analysis["sentiment_score"],
+                manipulation_confidence=analysis["manipulation_confidence"],
+                keywords_detected=analysis["keywords_detected"],
+                trust_score=source["score"],
+                registered=source["registered"],
+            )
+        yield msg
+
+
+class SocialSignalStore:
+    """
+    Recent scored messages per symbol, newest last. Bounded by
+    `max_per_symbol` messages per symbol, `max_symbols` symbols (least
+    recently updated dropped first) and `max_age_seconds`.
+    """
+
+    def __init__(
+        self,
+        max_per_symbol: int = 500,
+        max_symbols: int = 5000,
+        max_age_seconds: float = 6 * 3600,
+    ):
+        self.max_per_symbol = max_per_symbol
+        self.max_symbols = max_symbols
+        self.max_age_seconds = max_age_seconds
+        self._by_symbol: "OrderedDict[str, deque]" = OrderedDict()
+        # Ingestion runs in a worker thread while requests read
+        self._lock = threading.Lock()
+        self.stored = 0
+
+    def __len__(self):
+        return len(self._by_symbol)
+
+    def add(self, symbol: str, ts: float, signal: Dict):
+        key = symbol_key(symbol)
+        with self._lock:
+            window = self._by_symbol.get(key)
+            if window is None:
+                window = self._by_symbol[key] = deque(maxlen=self.max_per_symbol)
+                while len(self._by_symbol) > self.max_symbols:
+                    self._by_symbol.popitem(last=False)
+            else:
+                self._by_symbol.move_to_end(key)
+            window.append((ts, signal))
+            self.stored += 1
+
+    def recent(
+        self, symbol: str, since: Optional[float] = None, limit: int = 50
+    ) -> List[Dict]:
+        """Newest first, at most limit, no older than since"""
+        cutoff = time.time() - self.max_age_seconds
+        since = cutoff if since is None else max(since, cutoff)
+        with self._lock:
+            window = self._by_symbol.get(symbol_key(symbol))
+            if not window:
+                return []
+            result = []
+            for ts, signal in reversed(window):
+                if len(result) >= limit:
+                    break
+                if ts >= since:
+                    result.append(signal)
+            return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "symbols": len(self._by_symbol),
+                "signals": sum(len(w) for w in self._by_symbol.values()),
+                "stored_total": self.stored,
+            }
+
+
+class IngestPipeline:
+    """
+    parse -> extract entities -> match keywords and score -> store, as a
+    chain of generators run over fixed-size batches, so memory stays
+    bounded by the batch size however long the input is.
+    """
+
+    def __init__(
+        self,
+        store: SocialSignalStore,
+        analyze: Callable[[str], Dict],
+        trust: Callable[[str, str], Dict],
+        extract: Callable[[str], List[str]] = cashtag_entities,
+        batch_size: int = 1000,
+        on_signal: Optional[Callable[[str, float, Dict], None]] = None,
+        on_message: Optional[Callable[[float, Dict], None]] = None,
+    ):
+        """
+        on_signal(symbol, ts, message) is called for every stored signal and
+        on_message(ts, message) once per stored message
+        """
+        self.store = store
+        self.on_signal = on_signal
+        self.on_message = on_message
+        self.analyze = analyze
+        self.trust = trust
+        self.extract = extract
+        self.batch_size = batch_size
+
+        self.received = 0
+        self.rejected = 0
+        self.bad_timestamps = 0
+        self.without_entities = 0
+        self.signals = 0
+        self.seconds = 0.0
+        self.last_rate = 0.0
+
+    def ingest(self, records: Iterable[Dict]) -> Dict:
+        start = time.perf_counter()
+        received = rejected = bad_timestamps = unmatched = signals = 0
+        for batch in batched(records, self.batch_size):
+            now = time.time()
+            stream = with_scores(
+                with_entities(parse_messages(batch, now), self.extract),
+                self.analyze,
+                self.trust,
+            )
+            for msg in stream:
+                received += 1
+                if msg.get("rejected"):
+                    rejected += 1
+                    bad_timestamps += msg.get("bad_timestamp", False)
+                    continue
+                if not msg["entities_extracted"]:
+                    unmatched += 1
+                    continue
+                ts = msg.pop("ts")
+                msg["timestamp"] = (
+                    datetime.datetime.fromtimestamp(ts, datetime.timezone.utc)
+                    .replace(tzinfo=None)
+                    .isoformat()
+                )
+                for symbol in msg["entities_extracted"]:
+                    self.store.add(symbol, ts, msg)
+                    if self.on_signal is not None:
+                        self.on_signal(symbol, ts, msg)
+                    signals += 1
+                if self.on_message is not None:
+                    self.on_message(ts, msg)
+
+        elapsed = time.perf_counter() - start
+        rate = received / elapsed if elapsed > 0 else 0.0
+        self.received += received
+        self.rejected += rejected
+        self.bad_timestamps += bad_timestamps
+        self.without_entities += unmatched
+        self.signals += signals
+        self.seconds += elapsed
+        self.last_rate = rate
+        return {
+            "received": received,
+            "rejected": rejected,
+            "bad_timestamps": bad_timestamps,
+            "without_entities": unmatched,
+            "signals_stored": signals,
+            "seconds": round(elapsed, 4),
+            "messages_per_second": round(rate, 1),
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "received": self.received,
+            "rejected": self.rejected,
+            "bad_timestamps": self.bad_timestamps,
+            "without_entities": self.without_entities,
+            "signals_stored": self.signals,
+            "messages_per_second": (
+                round(self.received / self.seconds, 1) if self.seconds else 0.0
+            ),
+            "last_batch_messages_per_second": round(self.last_rate, 1),
+            "store": self.store.stats(),
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    """Stream a JSON-lines file (or stdin) into a running backend in batches"""
+    import httpx
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("path", nargs="?", default="-", help="JSONL file, - = stdin")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    totals: Dict[str, float] = {}
+    start = time.perf_counter()
+    with stream, httpx.Client(base_url=args.url, timeout=60) as client:
+        for batch in batched(read_jsonl(stream), args.batch):
+            res = client.post("/social/ingest", json={"messages": batch})
+            res.raise_for_status()
+            for k, v in res.json().items():
+                if k != "messages_per_second":
+                    totals[k] = totals.get(k, 0) + v
+    elapsed = time.perf_counter() - start
+    received = totals.get("received", 0)
+    totals = {k: round(v, 4) for k, v in totals.items()}
+    totals["messages_per_second"] = round(received / elapsed, 1) if elapsed else 0.0
+    print(json.dumps(totals))
+
+
+if __name__ == "__main__":
+    main()
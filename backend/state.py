@@ -0,0 +1,341 @@
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from alert_store import bar_key, to_epoch
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Autocommit connection in WAL mode: readers never block the writer"""
+    conn = sqlite3.connect(
+        path, timeout=10.0, isolation_level=None, check_same_thread=False
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Durable at checkpoints rather than every commit; a crash loses at most
+    # the last few alerts, never the database
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+_ALERT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    symbol_key TEXT NOT NULL,
+    handle_key TEXT NOT NULL,
+    -- alert_store.bar_key: one alert per symbol, interval and bar across workers
+    dedupe_key TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL,
+    severity_level INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_alerts_created ON alerts (created, id);
+CREATE INDEX IF NOT EXISTS ix_alerts_symbol ON alerts (symbol_key, created, id);
+CREATE INDEX IF NOT EXISTS ix_alerts_handle ON alerts (handle_key, created, id);
+"""
+
+
+class SqliteAlertStore:
+    """
+    AlertStore over a SQLite file in WAL mode, so every worker process
+    pointed at the same file sees the same alerts.
+
+    Workers running the same watchlist raise the same alert for a bar; as in
+    AlertStore, an alert whose id or bar_key is already stored is dropped
+    and add() returns False. Retention is enforced every `expire_every` inserts
+    rather than on each one, since counting rows is a table scan.
+    """
+
+    spill = None
+
+    def __init__(
+        self,
+        path: str,
+        max_alerts: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        expire_every: int = 100,
+    ):
+        self.path = path
+        self.max_alerts = max_alerts
+        self.max_age_seconds = max_age_seconds
+        self.expire_every = expire_every
+        self._conn = connect(path)
+        self._conn.executescript(_ALERT_SCHEMA)
+        self._lock = threading.Lock()
+        self._since_expire = 0
+        # Our own commits do not change data_version, so count them here
+        self._writes = 0
+
+        self.evicted = 0
+        self.duplicates = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Alerts oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM alerts ORDER BY created, id"
+            ).fetchall()
+        return (json.loads(r[0]) for r in rows)
+
+    def version(self) -> Tuple[int, int]:
+        """Changes whenever any worker has written to the store"""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return data_version, self._writes
+
+    def add(self, alert: Dict) -> bool:
+        symbol = alert["symbol"]
+        row = (
+            alert["id"],
+            symbol,
+            symbol.lower(),
+            (alert.get("source_handle") or "").lower(),
+            bar_key(alert),
+            to_epoch(alert["created_at"]),
+            int(alert.get("severity_level", 0)),
+            json.dumps(alert, separators=(",", ":"), default=str),
+        )
+        with self._lock:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row
+            ).rowcount
+            if not inserted:
+                self.duplicates += 1
+                return False
+            self._writes += 1
+            self._since_expire += 1
+            due = self._since_expire >= self.expire_every
+        if due:
+            self.expire()
+        return True
+
+    def expire(self, now: Optional[float] = None):
+        """Evict alerts beyond the count limit or older than the age limit"""
+        with self._lock:
+            self._since_expire = 0
+            deleted = 0
+            if self.max_age_seconds is not None:
+                cutoff = (time.time() if now is None else now) - self.max_age_seconds
+                deleted += self._conn.execute(
+                    "DELETE FROM alerts WHERE created < ?", (cutoff,)
+                ).rowcount
+            if self.max_alerts is not None:
+                count = self._conn.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+                if count > self.max_alerts:
+                    deleted += self._conn.execute(
+                        "DELETE FROM alerts WHERE id IN (SELECT id FROM alerts"
+                        " ORDER BY created, id LIMIT ?)",
+                        (count - self.max_alerts,),
+                    ).rowcount
+            if deleted:
+                self.evicted += deleted
+                self._writes += 1
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM alerts WHERE id = ?", (alert_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def epoch(self, alert_id: str) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created FROM alerts WHERE id = ?", (alert_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(alert_id)
+        return row[0]
+
+    def query(
+        self,
+        symbol: Optional[str] = None,
+        handle: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: int = 100,
+        before: Optional[Tuple[float, str]] = None,
+    ) -> List[Dict]:
+        """Same contract as AlertStore.query: most recent first, keyset paged"""
+        where, args = [], []
+        if symbol is not None:
+            where.append("symbol_key = ?")
+            args.append(symbol.lower())
+        if handle is not None:
+            where.append("handle_key = ?")
+            args.append(handle.lower())
+        if start is not None:
+            where.append("created >= ?")
+            args.append(start)
+        if end is not None:
+            where.append("created <= ?")
+            args.append(end)
+        if before is not None:
+            where.append("(created, id) < (?, ?)")
+            args.extend(before)
+        sql = "SELECT payload FROM alerts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created DESC, id DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def recent(self, n: int) -> List[Dict]:
+        """The last n alerts, oldest first"""
+        return self.query(limit=n)[::-1] if n > 0 else []
+
+    def recent_rows(self, n: int) -> List[Tuple[int, Dict]]:
+        """(severity, alert) of the last n alerts, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT severity_level, payload FROM alerts"
+                " ORDER BY created DESC, id DESC LIMIT ?",
+                (n,),
+            ).fetchall()
+        return [(severity, json.loads(payload)) for severity, payload in rows]
+
+    def last_rowid(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(MAX(rowid), 0) FROM alerts"
+            ).fetchone()[0]
+
+    def added_after(self, rowid: int, limit: int = 500) -> List[Tuple[int, Dict]]:
+        """(rowid, alert) of alerts any worker inserted after rowid, in order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid, payload FROM alerts WHERE rowid > ?"
+                " ORDER BY rowid LIMIT ?",
+                (rowid, limit),
+            ).fetchall()
+        return [(r, json.loads(payload)) for r, payload in rows]
+
+    def count_since(self, start: float) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM alerts WHERE created >= ?", (start,)
+            ).fetchone()[0]
+
+    def symbol_counts(self, start: Optional[float] = None) -> Dict[str, int]:
+        """Alert count per symbol since start"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT MIN(symbol), COUNT(*) FROM alerts WHERE created >= ?"
+                " GROUP BY symbol_key",
+                (start if start is not None else float("-inf"),),
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "alerts": len(self),
+            "evicted": self.evicted,
+            "duplicates": self.duplicates,
+        }
+
+
+class SqliteThreatAggregates:
+    """
+    ThreatAggregates computed from a shared SqliteAlertStore, so every
+    worker reports the same threat score and leaderboard. Results are
+    cached until some worker writes or the clock moves to the next second.
+    """
+
+    def __init__(
+        self,
+        store: SqliteAlertStore,
+        score_fn: Callable[[Dict], float],
+        recent_size: int = 100,
+    ):
+        self.store = store
+        self.score_fn = score_fn
+        self.recent_size = recent_size
+        self._cache: Dict[Hashable, Tuple[tuple, object]] = {}
+
+    def add(self, alert: Dict, ts: float):
+        # Everything is derived from the alerts table at read time
+        pass
+
+    def _cached(self, key: Hashable, now: Optional[float], compute: Callable):
+        now = time.time() if now is None else now
+        stamp = (self.store.version(), int(now))
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        value = compute(now)
+        self._cache[key] = (stamp, value)
+        return value
+
+    def threat(self, now: Optional[float] = None) -> Dict:
+        def compute(now: float) -> Dict:
+            rows = self.store.recent_rows(self.recent_size)
+            return {
+                "recent_score": sum(self.score_fn(alert) for _, alert in rows),
+                "recent_alerts": len(rows),
+                "high_severity_alerts": sum(1 for s, _ in rows if s >= 3),
+                "alerts_last_hour": self.store.count_since(now - 3600),
+            }
+
+        return self._cached("threat", now, compute)
+
+    def leaderboard(self, limit: int, now: Optional[float] = None):
+        def compute(now: float) -> List[Tuple[str, int]]:
+            counts = self.store.symbol_counts(now - 86400)
+            # Ties by name, so every worker ranks them the same way
+            ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+            return ranked[:limit]
+
+        return self._cached(("leaderboard", limit), now, compute)
+
+
+class SqliteModelStore:
+    """
+    Fitted models shared between workers, pickled into the same SQLite
+    file. A worker that misses its own registry adopts a model another
+    worker fitted recently instead of fitting its own.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS models"
+            " (key TEXT PRIMARY KEY, fitted_at REAL NOT NULL, model BLOB NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[object, float]]:
+        """(model, fitted_at) stored for key, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT model, fitted_at FROM models WHERE key = ?", (repr(key),)
+            ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def put(self, key: Hashable, model, fitted_at: float):
+        blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            # Keep whichever fit is newer when two workers race
+            self._conn.execute(
+                "INSERT INTO models VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE"
+                " SET fitted_at = excluded.fitted_at, model = excluded.model"
+                " WHERE excluded.fitted_at > models.fitted_at",
+                (repr(key), fitted_at, blob),
+            )
@@ -0,0 +1,276 @@
+import math
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class RollingStats:
+    """Welford mean/variance over a value stream with O(1) add and remove"""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x: float):
+        if self.n <= 1:
+            self.n = 0
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        self.n -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self.m2 -= delta * (x - self.mean)
+        if self.m2 < 0:
+            self.m2 = 0.0
+
+    def rebuild(self, values: Sequence[float]):
+        """Recompute from scratch to shed accumulated floating-point drift"""
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        for x in values:
+            self.add(x)
+
+    def std(self) -> float:
+        # Sample standard deviation (ddof=1), NaN when undefined like pandas
+        if self.n < 2:
+            return float("nan")
+        return math.sqrt(self.m2 / (self.n - 1))
+
+
+class _SlidingWindow:
+    """Fixed-length window of floats with running Welford statistics"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.stats = RollingStats()
+
+    def push(self, x: float):
+        if len(self.values) == self.size:
+            self.stats.remove(self.values[0])
+        self.values.append(x)
+        self.stats.add(x)
+
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+
+class StreamingAnomalyDetector:
+    """
+    Per-symbol detector that ingests bars one at a time and keeps the
+    EWMA, volume and momentum statistics up to date in O(1) per bar.
+
+    Scores match compute_ewma_anomaly, compute_volume_anomaly and
+    compute_price_momentum_anomaly evaluated over the last `window` bars.
+    """
+
+    def __init__(
+        self,
+        window: int = 60,
+        span: int = 12,
+        volume_window: int = 20,
+        short_window: int = 5,
+        long_window: int = 20,
+    ):
+        self.window = window
+        self.span = span
+        self.volume_window = volume_window
+        self.short_window = short_window
+        self.long_window = long_window
+
+        # Decay factors of the short (span) and long (2 * span) EWMAs
+        self._q_short = 1 - 2.0 / (span + 1)
+        self._q_long = 1 - 2.0 / (span * 2 + 1)
+
+        self.reset()
+
+    def reset(self):
+        # Unbounded EWMAs over the whole stream; the windowed EWMA that the
+        # pandas version computes is recovered from these in closed form.
+        self._ewma_short = None
+        self._ewma_long = None
+
+        # (price, ewma_short, ewma_long, residual) for each bar in the window
+        self._bars = deque(maxlen=self.window)
+        self._resid = RollingStats()
+        # sum of residual[j] * q_short ** j, j counted from the oldest bar
+        self._resid_weighted = 0.0
+
+        self._volumes = _SlidingWindow(self.volume_window)
+        self._returns_short = _SlidingWindow(self.short_window)
+        self._returns_long = _SlidingWindow(self.long_window)
+
+        self._last_price = None
+        self._last_volume = None
+        self.last_timestamp = None
+        self.bars_ingested = 0
+
+    def update(self, price: float, volume: float, timestamp: Optional[str] = None):
+        """Ingest one bar"""
+        price = float(price)
+        volume = float(volume)
+
+        if self._ewma_short is None:
+            self._ewma_short = price
+            self._ewma_long = price
+        else:
+            self._ewma_short = price + self._q_short * (self._ewma_short - price)
+            self._ewma_long = price + self._q_long * (self._ewma_long - price)
+        resid = price - self._ewma_short
+
+        q = self._q_short
+        if len(self._bars) == self.window:
+            oldest = self._bars[0]
+            self._resid.remove(oldest[3])
+            self._resid_weighted = (self._resid_weighted - oldest[3]) / q
+            self._bars.append((price, self._ewma_short, self._ewma_long, resid))
+            self._resid_weighted += resid * q ** (self.window - 1)
+        else:
+            self._resid_weighted += resid * q ** len(self._bars)
+            self._bars.append((price, self._ewma_short, self._ewma_long, resid))
+        self._resid.add(resid)
+
+        # Returns are pct_change().fillna(0), so the very first bar counts as 0
+        if self._last_price is None:
+            ret = 0.0
+        elif self._last_price != 0:
+            ret = price / self._last_price - 1
+        else:
+            ret = float("inf")
+        self._returns_short.push(ret)
+        self._returns_long.push(ret)
+        self._volumes.push(volume)
+
+        self._last_price = price
+        self._last_volume = volume
+        self.last_timestamp = timestamp
+        self.bars_ingested += 1
+
+        # Dividing the weighted sum by q on every slide amplifies rounding
+        # error, so rebuild the window sums once per window length.
+        if self.bars_ingested % self.window == 0:
+            self._rebuild()
+
+    def _rebuild(self):
+        q = self._q_short
+        self._resid.rebuild([b[3] for b in self._bars])
+        self._resid_weighted = sum(b[3] * q**j for j, b in enumerate(self._bars))
+        for win in (self._volumes, self._returns_short, self._returns_long):
+            win.stats.rebuild(win.values)
+
+    def sync(
+        self, timestamps: List[str], prices: List[float], volumes: List[float]
+    ) -> int:
+        """
+        Bring the detector in line with a full bar history, ingesting only the
+        bars after last_timestamp. If the history no longer contains the last
+        ingested bar (gap, restart or regenerated data) the detector is reset
+        and seeded from the trailing window.
+        """
+        start = None
+        if self.last_timestamp is not None:
+            for i in range(len(timestamps) - 1, -1, -1):
+                if timestamps[i] == self.last_timestamp:
+                    if (
+                        prices[i] == self._last_price
+                        and volumes[i] == self._last_volume
+                    ):
+                        start = i + 1
+                    break
+
+        if start is None:
+            self.reset()
+            start = max(0, len(prices) - self.window)
+
+        for i in range(start, len(prices)):
+            self.update(prices[i], volumes[i], timestamps[i])
+        return len(prices) - start
+
+    def ewma_anomaly(self) -> Tuple[float, float]:
+        """Streaming equivalent of compute_ewma_anomaly(window prices, span)"""
+        n = len(self._bars)
+        if n == 0:
+            return float("nan"), float("nan")
+        q, q_long = self._q_short, self._q_long
+        x_s, e_s, l_s, _ = self._bars[0]
+
+        # The window EWMA restarts at the oldest bar, so it differs from the
+        # stream EWMA by (x_s - e_s) decayed over the bars since then.
+        c = x_s - e_s
+        ewma_short = self._ewma_short + c * q ** (n - 1)
+        ewma_long = self._ewma_long + (x_s - l_s) * q_long ** (n - 1)
+        resid_last = self._bars[-1][3] - c * q ** (n - 1)
+
+        # Window residuals are resid[j] - c * q**j; their centred sum of
+        # squares expands into the running residual statistics.
+        g1 = (1 - q**n) / (1 - q)
+        g2 = (1 - q ** (2 * n)) / (1 - q * q)
+        resid_sum = self._resid.mean * n
+        centred_ss = (
+            self._resid.m2
+            - 2 * c * (self._resid_weighted - resid_sum * g1 / n)
+            + c * c * (g2 - g1 * g1 / n)
+        )
+        resid_std = math.sqrt(max(centred_ss, 0.0) / (n - 1)) if n > 1 else float("nan")
+
+        z_score_short = resid_last / (resid_std if resid_std > 0 else 1e-9)
+        trend_divergence = (ewma_short - ewma_long) / ewma_long if ewma_long != 0 else 0
+        combined_score = z_score_short + (trend_divergence * 2)
+        return float(combined_score), float(ewma_short)
+
+    def volume_anomaly(self) -> Tuple[float, float]:
+        """Streaming equivalent of compute_volume_anomaly(window volumes)"""
+        stats = self._volumes.stats
+        if stats.n == 0:
+            return float("nan"), float("nan")
+        current_vol = self._last_volume
+        recent_mean = stats.mean
+        recent_std = stats.std()
+
+        volume_zscore = (current_vol - recent_mean) / (
+            recent_std if recent_std > 0 else 1e-9
+        )
+        volume_ratio = current_vol / (recent_mean if recent_mean > 0 else 1)
+        return float(volume_zscore), float(volume_ratio)
+
+    def momentum_anomaly(self) -> Tuple[float, float]:
+        """Streaming equivalent of compute_price_momentum_anomaly(window prices)"""
+        nan = float("nan")
+        short_momentum = (
+            self._returns_short.stats.mean if self._returns_short.full() else nan
+        )
+        long_momentum = (
+            self._returns_long.stats.mean if self._returns_long.full() else nan
+        )
+        volatility = (
+            self._returns_long.stats.std() if self._returns_long.full() else nan
+        )
+
+        momentum_divergence = short_momentum - long_momentum
+        risk_adjusted_momentum = momentum_divergence / (
+            volatility if volatility > 0 else 1e-9
+        )
+        return float(risk_adjusted_momentum), float(short_momentum)
+
+    def scores(self) -> Dict[str, float]:
+        ewma_score, ewma_value = self.ewma_anomaly()
+        vol_zscore, vol_ratio = self.volume_anomaly()
+        momentum_score, short_momentum = self.momentum_anomaly()
+        return {
+            "ewma_score": ewma_score,
+            "ewma_value": ewma_value,
+            "volume_zscore": vol_zscore,
+            "volume_ratio": vol_ratio,
+            "momentum_score": momentum_score,
+            "short_momentum": short_momentum,
+        }
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules are imported flat, as uvicorn does when run from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# main reads its configuration at import: mock market data, no database,
+# ML in threads and nothing running in the background
+os.environ.update(
+    {
+        "TWELVEDATA_API_KEY": "",
+        "DATABASE_URL": "",
+        "CPU_POOL_KIND": "thread",
+        "WARMUP": "0",
+        "WATCHLIST": "",
+        "BAR_STORE_DIR": "",
+        "ALERT_SPILL_PATH": "",
+        "STATE_BACKEND": "memory",
+    }
+)
+
+
+@pytest.fixture(scope="session")
+def main():
+    import main
+
+    return main
@@ -0,0 +1,96 @@
+import random
+import time
+from collections import Counter
+
+from aggregates import RunningWindowSum, SlidingWindowCounter, ThreatAggregates
+
+T0 = 1_800_000_000.0  # a minute boundary
+
+
+def test_minute_buckets_expire_with_the_window():
+    counter = SlidingWindowCounter(window_seconds=300, bucket_seconds=60)
+    counter.add(T0, "A", now=T0)
+    counter.add(T0 + 59, "A", now=T0 + 59)
+    counter.add(T0 + 60, "B", now=T0 + 60)
+
+    assert counter.total(now=T0 + 60) == 3
+    # The window still overlaps the first minute bucket at T0 + 359
+    assert counter.counts(now=T0 + 359) == {"A": 2, "B": 1}
+    assert counter.counts(now=T0 + 360) == {"B": 1}
+    assert counter.total(now=T0 + 420) == 0
+    # Events already older than the window are dropped
+    counter.add(T0, "A", now=T0 + 420)
+    assert counter.top(5, now=T0 + 420) == []
+
+
+def test_late_event_lands_in_its_own_bucket():
+    counter = SlidingWindowCounter(window_seconds=300, bucket_seconds=60)
+    counter.add(T0 + 120, "A", now=T0 + 120)
+    counter.add(T0, "B", now=T0 + 130)
+
+    assert counter.counts(now=T0 + 359) == {"A": 1, "B": 1}
+    assert counter.counts(now=T0 + 360) == {"A": 1}
+
+
+def test_leaderboard_order_follows_adds_and_expiry():
+    counter = SlidingWindowCounter(window_seconds=300, bucket_seconds=60)
+    for _ in range(3):
+        counter.add(T0, "OLD", now=T0)
+    counter.add(T0 + 120, "NEW", now=T0 + 120)
+    counter.add(T0 + 120, "NEW", now=T0 + 120)
+    counter.add(T0 + 120, "MID", n=2, now=T0 + 120)
+
+    assert counter.top(2, now=T0 + 120) == [("OLD", 3), ("MID", 2)]
+    counter.add(T0 + 180, "NEW", now=T0 + 180)
+    assert counter.top(3, now=T0 + 180) == [("NEW", 3), ("OLD", 3), ("MID", 2)]
+    # OLD's bucket leaves the window and it drops off the board
+    assert counter.top(3, now=T0 + 360) == [("NEW", 3), ("MID", 2)]
+
+
+def test_ranking_matches_recounting():
+    rng = random.Random(7)
+    counter = SlidingWindowCounter(window_seconds=600, bucket_seconds=60)
+    events = []
+    now = T0
+    for _ in range(2000):
+        now += rng.uniform(0, 5)
+        ts = now - rng.choice((0, 0, 0, 90))
+        key = f"S{rng.randrange(30)}"
+        counter.add(ts, key, now=now)
+        events.append((ts, key))
+
+        cutoff = (now - 600) // 60
+        live = Counter(k for t, k in events if t // 60 >= cutoff)
+        expected = sorted(live.items(), key=lambda kv: (-kv[1], kv[0]))[:10]
+        assert counter.top(10, now=now) == expected
+
+
+def test_running_window_sum_drops_the_oldest_value():
+    window = RunningWindowSum(3)
+    for value in (0.5, 1.0, 2.0, 4.0):
+        window.push(value)
+
+    assert len(window) == 3
+    assert window.total == 7.0
+
+
+def test_threat_aggregates_weight_recent_alerts():
+    weights = {1: 0.5, 2: 1.0, 3: 2.0, 4: 3.0}
+    agg = ThreatAggregates(lambda a: weights[a["severity_level"]], recent_size=3)
+    # add() expires against the wall clock
+    now = time.time()
+    for i, (symbol, level) in enumerate(
+        [("TCS", 4), ("INFY", 1), ("TCS", 3), ("INFY", 2)]
+    ):
+        agg.add({"symbol": symbol, "severity_level": level}, now - 10 + i)
+
+    threat = agg.threat(now=now)
+    # The first alert (weight 3.0) has left the last-3 window
+    assert threat == {
+        "recent_score": 3.5,
+        "recent_alerts": 3,
+        "high_severity_alerts": 1,
+        "alerts_last_hour": 4,
+    }
+    assert agg.leaderboard(5, now=now) == [("INFY", 2), ("TCS", 2)]
+    assert agg.threat(now=now + 3700)["alerts_last_hour"] == 0
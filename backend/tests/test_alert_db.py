@@ -0,0 +1,142 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from alert_db import AlertRepository, AlertWriter
+from alert_store import decode_cursor, encode_cursor
+
+BASE = datetime.datetime(2026, 3, 2, 9, 15)
+
+
+def make_alert(i: int, symbol: str = "AAA", handle: str = "@pumper", **extra):
+    alert = {
+        "id": f"alert-{i:04d}",
+        "symbol": symbol,
+        "source_handle": handle,
+        "severity_level": i % 4,
+        "manipulation_confidence": 0.5,
+        "reason": "volume spike",
+        "created_at": (BASE + datetime.timedelta(seconds=i)).isoformat(),
+    }
+    alert.update(extra)
+    return alert
+
+
+@pytest.fixture
+def repo(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'alerts.db'}")
+    repo = AlertRepository(engine)
+    repo.create_schema()
+    yield repo
+    engine.dispose()
+
+
+def test_insert_get_and_query(repo):
+    repo.insert_many(
+        [make_alert(i, symbol="AAA" if i % 2 else "BBB") for i in range(10)]
+    )
+    assert repo.get("alert-0003")["symbol"] == "AAA"
+    assert repo.get("missing") is None
+
+    newest = repo.query(limit=3)
+    assert [a["id"] for a in newest] == ["alert-0009", "alert-0008", "alert-0007"]
+    # Filters are case-insensitive
+    assert {a["symbol"] for a in repo.query(symbol="bbb")} == {"BBB"}
+    assert len(repo.query(handle="@PUMPER")) == 10
+    window = repo.query(
+        start=BASE + datetime.timedelta(seconds=2),
+        end=BASE + datetime.timedelta(seconds=4),
+    )
+    assert [a["id"] for a in window] == ["alert-0004", "alert-0003", "alert-0002"]
+
+
+def test_keyset_pagination_visits_every_alert_once(repo):
+    # Several alerts share a timestamp, so the id breaks ties
+    alerts = [make_alert(i, created_at=BASE.isoformat()) for i in range(5)]
+    alerts += [make_alert(i) for i in range(5, 12)]
+    repo.insert_many(alerts)
+    seen, before = [], None
+    while True:
+        page = repo.query(limit=4, before=before)
+        if not page:
+            break
+        seen += [a["id"] for a in page]
+        before = decode_cursor(encode_cursor(page[-1]))
+    assert sorted(seen) == sorted(a["id"] for a in alerts)
+    assert len(seen) == len(set(seen))
+
+
+def test_load_since_is_oldest_first(repo):
+    repo.insert_many([make_alert(i) for i in range(6)])
+    loaded = repo.load_since(BASE + datetime.timedelta(seconds=3))
+    assert [a["id"] for a in loaded] == ["alert-0003", "alert-0004", "alert-0005"]
+
+
+def test_writer_drains_in_batches(repo):
+    writer = AlertWriter(repo, batch_size=25, flush_interval=0.05)
+    writer.start()
+    for i in range(100):
+        assert writer.submit(make_alert(i))
+    writer.flush()
+    writer.stop()
+    stats = writer.stats()
+    assert stats["written"] == 100
+    assert stats["failed"] == 0
+    assert stats["batches"] >= 4
+    assert len(repo.query(limit=1000)) == 100
+
+
+def test_writer_drops_only_the_failing_rows(repo):
+    repo.insert_many([make_alert(3)])
+    writer = AlertWriter(repo, batch_size=50, flush_interval=0.2)
+    # Queue everything before the thread starts so it all lands in one batch:
+    # a duplicate id and a row whose timestamp cannot be parsed
+    for i in range(10):
+        writer.submit(make_alert(i))
+    writer.submit(make_alert(10, created_at="not a time"))
+    writer.start()
+    writer.flush()
+    writer.stop()
+    stats = writer.stats()
+    assert stats["written"] == 9
+    assert stats["failed"] == 2
+    assert stats["retried_batches"] == 1
+    assert len(repo.query(limit=1000)) == 10
+
+
+def test_alert_endpoints_read_the_repository_off_the_event_loop(
+    main, repo, monkeypatch
+):
+    import asyncio
+    import threading
+
+    from fastapi import Response
+
+    repo.insert_many([make_alert(i) for i in range(3)])
+    threads = []
+    query, get = repo.query, repo.get
+
+    def tracked(fn):
+        def call(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return fn(*args, **kwargs)
+
+        return call
+
+    monkeypatch.setattr(repo, "query", tracked(query))
+    monkeypatch.setattr(repo, "get", tracked(get))
+    monkeypatch.setattr(main, "alert_repo", repo)
+
+    async def run():
+        response = Response()
+        page = await main.get_alerts(response, limit=2)
+        alert = await main.get_alert("alert-0000")
+        return response, page, alert, threading.current_thread()
+
+    response, page, alert, loop_thread = asyncio.run(run())
+
+    assert [a["id"] for a in page] == ["alert-0002", "alert-0001"]
+    assert decode_cursor(response.headers["X-Next-Cursor"])
+    assert alert["alert"]["id"] == "alert-0000"
+    assert len(threads) == 2 and loop_thread not in threads
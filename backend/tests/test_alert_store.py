@@ -0,0 +1,154 @@
+import datetime
+import json
+
+import pytest
+
+import alert_store
+from alert_store import AlertSpill, AlertStore, to_epoch
+from state import SqliteAlertStore
+
+BASE = datetime.datetime(2026, 3, 2, 9, 15)
+
+
+def make_alert(i: int, symbol: str = "AAA", interval: str = "1min", bar: int = None):
+    created = BASE + datetime.timedelta(seconds=i)
+    bar_time = BASE + datetime.timedelta(minutes=i if bar is None else bar)
+    return {
+        "id": f"alert-{i:04d}-{symbol}-{interval}",
+        "symbol": symbol,
+        "interval": interval,
+        "time": bar_time.isoformat(),
+        "source_handle": "Pump_VIP",
+        "severity_level": 2,
+        "created_at": created.isoformat(),
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield AlertStore(max_alerts=5)
+    else:
+        store = SqliteAlertStore(
+            str(tmp_path / "state.db"), max_alerts=5, expire_every=1
+        )
+        yield store
+        store.close()
+
+
+def test_one_alert_per_symbol_interval_and_bar(store):
+    assert store.add(make_alert(0))
+    # Same bar again, from a rerun or another worker
+    assert not store.add(make_alert(1, bar=0))
+    assert not store.add(make_alert(2, symbol="aaa", bar=0))
+    # Same id again
+    assert not store.add(make_alert(0))
+    # Another interval or symbol on the same bar time is a different bar
+    assert store.add(make_alert(3, interval="5min", bar=0))
+    assert store.add(make_alert(4, symbol="BBB", bar=0))
+    assert len(store) == 3
+    assert store.stats()["duplicates"] == 3
+
+
+def test_evicted_bar_can_be_raised_again(store):
+    for i in range(6):
+        assert store.add(make_alert(i))
+    assert len(store) == 5
+    assert store.get(make_alert(0)["id"]) is None
+    # Retention dropped bar 0, so it is no longer a duplicate
+    again = make_alert(10, bar=0)
+    assert store.add(again)
+    assert store.get(again["id"]) is not None
+
+
+def test_query_contract(store):
+    for i in range(5):
+        store.add(make_alert(i, symbol="AAA" if i % 2 else "BBB"))
+    newest = store.query(limit=2)
+    assert [a["id"] for a in newest] == [
+        make_alert(4, symbol="BBB")["id"],
+        make_alert(3, symbol="AAA")["id"],
+    ]
+    assert {a["symbol"] for a in store.query(symbol="aaa")} == {"AAA"}
+    assert len(store.query(handle="pump_vip")) == 5
+    before = (store.epoch(newest[-1]["id"]), newest[-1]["id"])
+    assert len(store.query(before=before)) == 3
+    assert [a["id"] for a in store.recent(2)] == [a["id"] for a in newest[::-1]]
+
+
+def read_spill(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_count_limit_evicts_oldest_into_the_spill(tmp_path):
+    path = str(tmp_path / "spill.jsonl")
+    spill = AlertSpill(path, flush_every=2)
+    store = AlertStore(max_alerts=3, spill=spill)
+    symbols = ["OLD", "OLD", "AAA", "BBB", "AAA"]
+    for i, symbol in enumerate(symbols):
+        store.add(make_alert(i, symbol=symbol))
+
+    assert [a["symbol"] for a in store] == ["AAA", "BBB", "AAA"]
+    # OLD left every index along with its last alert
+    assert store.symbol_counts() == {"AAA": 2, "BBB": 1}
+    assert store.query(symbol="OLD") == []
+    assert len(store.query(handle="pump_vip")) == 3
+    assert store.stats()["evicted"] == 2
+    # Two evictions reach flush_every, so both lines are on disk
+    spilled = read_spill(path)
+    assert [a["id"] for a in spilled] == [make_alert(i, "OLD")["id"] for i in (0, 1)]
+    assert spilled[0] == make_alert(0, symbol="OLD")
+    spill.close()
+
+
+def test_spill_keeps_appending_across_restarts(tmp_path):
+    path = str(tmp_path / "spill.jsonl")
+    for run in range(2):
+        spill = AlertSpill(path)
+        store = AlertStore(max_alerts=1, spill=spill)
+        store.add(make_alert(run * 10))
+        store.add(make_alert(run * 10 + 1))
+        spill.close()
+
+    assert [a["id"] for a in read_spill(path)] == [
+        make_alert(0)["id"],
+        make_alert(10)["id"],
+    ]
+
+
+def test_age_limit_expires_on_read(tmp_path, monkeypatch):
+    now = [to_epoch(BASE) + 100]
+    monkeypatch.setattr(alert_store.time, "time", lambda: now[0])
+    spill = AlertSpill(str(tmp_path / "spill.jsonl"), flush_every=1)
+    store = AlertStore(max_age_seconds=60, spill=spill)
+    # Created at BASE + 30s .. BASE + 49s; the first ten are already too old
+    for i in range(30, 50):
+        store.add(make_alert(i))
+    assert len(store) == 10
+
+    # No new alerts: reads alone move the window
+    now[0] += 5
+    assert len(store.query(limit=100)) == 5
+    now[0] += 5
+    assert store.recent(10) == []
+    assert store.count_since(0) == 0
+    assert store.get(make_alert(49)["id"]) is None
+    assert store.stats()["spilled"] == 20
+    assert len(read_spill(spill.path)) == 20
+    spill.close()
+
+
+def test_count_and_age_limits_together(monkeypatch):
+    now = [to_epoch(BASE) + 100]
+    monkeypatch.setattr(alert_store.time, "time", lambda: now[0])
+    store = AlertStore(max_alerts=3, max_age_seconds=60)
+    for i in range(50, 56):
+        store.add(make_alert(i))
+    # The count limit binds first
+    assert [a["id"] for a in store.recent(5)] == [
+        make_alert(i)["id"] for i in (53, 54, 55)
+    ]
+    now[0] += 15
+    assert len(store.query()) == 1
+    assert store.stats()["evicted"] == 5
@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+
+from bar_store import (
+    BAR_SIZE,
+    BarSeries,
+    BarStore,
+    bar_dtype,
+    bars_from_closes,
+    bars_from_values,
+    values_from_bars,
+)
+
+
+def minutes(start: int, n: int, close: float = 100.0):
+    stamps = [f"2026-03-02T09:{m:02d}:00" for m in range(start, start + n)]
+    closes = [close + i for i in range(n)]
+    return bars_from_closes(stamps, closes, [1000 + i for i in range(n)])
+
+
+def test_append_skips_bars_already_stored(tmp_path):
+    series = BarSeries(str(tmp_path / "TCS__1min.bars"))
+    assert series.append(minutes(15, 5)) == 5
+    # Overlapping fetch: only bars from the last stored one (09:19) on are
+    # written, that one in place
+    assert series.append(minutes(16, 6)) == 3
+    assert len(series) == 7
+    assert series.view()["ts"].tolist() == minutes(15, 7)["ts"].tolist()
+    assert os.path.getsize(series.path) == 7 * BAR_SIZE
+    assert series.append(minutes(10, 3)) == 0
+    series.close()
+
+
+def test_bar_at_the_last_time_overwrites_it(tmp_path):
+    series = BarSeries(str(tmp_path / "TCS__1min.bars"))
+    series.append(minutes(15, 3))
+    # The 09:17 bar was still forming when first stored
+    revised = minutes(17, 2, close=150.0)
+    assert series.append(revised) == 2
+
+    bars = series.view()
+    assert len(bars) == 4
+    assert bars["close"].tolist() == [100.0, 101.0, 150.0, 151.0]
+    assert bars["volume"].tolist() == [1000, 1001, 1000, 1001]
+    series.close()
+
+
+def test_torn_write_is_truncated_on_open(tmp_path):
+    path = str(tmp_path / "TCS__1min.bars")
+    series = BarSeries(path)
+    series.append(minutes(15, 3))
+    series.close()
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (BAR_SIZE // 2))
+
+    reopened = BarSeries(path)
+
+    assert len(reopened) == 3
+    assert os.path.getsize(path) == 3 * BAR_SIZE
+    assert reopened.append(minutes(18, 1)) == 1
+    assert reopened.view()["close"].tolist() == [100.0, 101.0, 102.0, 100.0]
+    reopened.close()
+
+
+def test_between_is_start_inclusive_end_exclusive(tmp_path):
+    series = BarSeries(str(tmp_path / "TCS__1min.bars"))
+    series.append(minutes(15, 10))
+    ts = series.view()["ts"]
+
+    assert len(series.between()) == 10
+    assert series.between(ts[2], ts[5])["ts"].tolist() == ts[2:5].tolist()
+    assert series.between(ts[2] + 1, ts[5] + 1)["ts"].tolist() == ts[3:6].tolist()
+    assert len(series.between(start=ts[-1] + 60)) == 0
+    assert len(series.between(end=ts[0])) == 0
+    assert series.tail(3)["ts"].tolist() == ts[-3:].tolist()
+    assert len(series.tail(0)) == 0
+    series.close()
+
+
+def test_views_stay_valid_after_appends(tmp_path):
+    series = BarSeries(str(tmp_path / "TCS__1min.bars"))
+    series.append(minutes(15, 2))
+    before = series.view()
+    series.append(minutes(17, 2))
+
+    assert len(before) == 2 and len(series.view()) == 4
+    assert not before.flags.writeable
+    series.close()
+
+
+def test_store_files_and_open_limit(tmp_path):
+    store = BarStore(str(tmp_path), max_open=2)
+    for symbol in ("TCS", "M&M.NSE", "INFY"):
+        store.append(symbol, "1min", minutes(15, 2))
+
+    assert store.symbols("1min") == ["INFY", "M&M.NSE", "TCS"]
+    assert store.exists("tcs", "1min") and not store.exists("TCS", "5min")
+    assert store.stats()["open"] == 2
+    # A closed series is reopened from its file
+    assert len(store.tail("TCS", "1min", 5)) == 2
+    assert store.tail("WIPRO", "1min", 5).dtype == bar_dtype()
+    stats = store.stats()
+    assert (stats["series"], stats["bars"], stats["appended"]) == (3, 6, 6)
+    store.close()
+
+
+def test_values_round_trip():
+    values = [
+        {
+            "datetime": "2026-03-02 09:15:00",
+            "open": "10.5",
+            "high": "11.0",
+            "low": "10.0",
+            "close": "10.75",
+            "volume": "1200",
+        },
+        {"datetime": "2026-03-02 09:16:00", "close": "10.8", "volume": None},
+    ]
+    bars = bars_from_values(values)
+
+    assert values_from_bars(bars)[0] == values[0]
+    assert values_from_bars(bars)[1]["open"] == "10.8"
+    assert values_from_bars(bars)[1]["volume"] == "0"
+    daily = values_from_bars(bars[:1], daily=True)
+    assert daily[0]["datetime"] == "2026-03-02"
+    assert bars_from_values([]).dtype == bar_dtype()
+    assert isinstance(bars, np.ndarray)
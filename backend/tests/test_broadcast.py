@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from broadcast import Broadcaster, StreamClosed, Subscription
+
+
+def drain(sub):
+    messages = []
+    while not sub.queue.empty():
+        messages.append(sub.queue.get_nowait())
+    return messages
+
+
+def test_full_queue_drops_the_oldest_events():
+    sub = Subscription(max_queue=3, max_dropped=10)
+    for i in range(5):
+        sub.offer(("alert", str(i)))
+
+    assert drain(sub) == [("alert", "2"), ("alert", "3"), ("alert", "4")]
+    assert sub.dropped == 2
+    assert not sub.closed
+
+
+def test_slow_subscriber_is_disconnected_after_max_dropped():
+    broadcaster = Broadcaster(max_queue=2, max_dropped=3)
+
+    async def run():
+        slow = broadcaster.subscribe()
+        for i in range(6):
+            broadcaster.publish("alert", {"n": i})
+        assert slow.closed and len(broadcaster) == 0
+        # What is still queued is delivered before the close is reported
+        queued = [await slow.next(timeout=0.01)]
+        with pytest.raises(StreamClosed):
+            await slow.next(timeout=0.01)
+        return queued
+
+    queued = asyncio.run(run())
+
+    # 0-3 were dropped to make room; the fourth drop closed it before 5
+    assert [json.loads(data)["n"] for _, data in queued] == [4]
+    stats = broadcaster.stats()
+    assert (stats["published"], stats["disconnected_slow"]) == (6, 1)
+    # No subscribers left: publishing is a no-op
+    broadcaster.publish("alert", {"n": 6})
+    assert broadcaster.stats()["published"] == 6
+
+
+def test_symbol_filter_and_shared_encoding():
+    broadcaster = Broadcaster()
+    tcs = broadcaster.subscribe([" tcs ", ""])
+    everything = broadcaster.subscribe()
+    broadcaster.publish("alert", {"symbol": "INFY"}, symbol="INFY")
+    broadcaster.publish("alert", {"symbol": "TCS"}, symbol="tcs")
+    broadcaster.publish("threat_score", {"score": 1})
+
+    assert [e for e, _ in drain(tcs)] == ["alert", "threat_score"]
+    received = drain(everything)
+    assert [json.loads(d)["symbol"] for _, d in received[:2]] == ["INFY", "TCS"]
+    # Encoded once per publish, not per subscriber
+    tcs.set_symbols(None)
+    broadcaster.publish("leaderboard", [["TCS", 3]])
+    assert drain(tcs)[0][1] is drain(everything)[0][1]
+
+
+def test_client_limit():
+    broadcaster = Broadcaster(max_clients=1)
+    first = broadcaster.subscribe()
+    assert broadcaster.subscribe() is None
+    broadcaster.unsubscribe(first)
+    assert broadcaster.subscribe() is not None
+
+
+class FakeRequest:
+    def __init__(self, polls: int):
+        self.polls = polls
+
+    async def is_disconnected(self):
+        self.polls -= 1
+        return self.polls < 0
+
+
+def parse_sse(chunks):
+    frames = []
+    for chunk in chunks:
+        assert chunk.endswith("\n\n")
+        lines = chunk[:-2].split("\n")
+        event = lines[0][len("event: ") :]
+        assert lines[1].startswith("data: ") and len(lines) == 2
+        frames.append((event, json.loads(lines[1][len("data: ") :])))
+    return frames
+
+
+def test_sse_framing_and_slow_client_error(main, monkeypatch):
+    broadcaster = Broadcaster(max_queue=1, max_dropped=0)
+    monkeypatch.setattr(main, "broadcaster", broadcaster)
+
+    async def run():
+        response = await main.stream(FakeRequest(polls=5), symbols="TCS,INFY")
+        body = response.body_iterator
+        chunks = [await body.__anext__() for _ in range(3)]
+        broadcaster.publish("alert", {"symbol": "TCS", "id": "a1"}, symbol="TCS")
+        chunks.append(await body.__anext__())
+        # The third overflows the one-slot queue, and no drops are allowed
+        broadcaster.publish("alert", {"symbol": "TCS", "id": "a2"}, symbol="TCS")
+        broadcaster.publish("alert", {"symbol": "TCS", "id": "a3"}, symbol="TCS")
+        chunks += [chunk async for chunk in body]
+        return response, chunks
+
+    response, chunks = asyncio.run(run())
+
+    assert response.media_type == "text/event-stream"
+    assert response.headers["cache-control"] == "no-cache"
+    frames = parse_sse(chunks)
+    assert [event for event, _ in frames] == [
+        "threat_score",
+        "leaderboard",
+        "alerts",
+        "alert",
+        "error",
+    ]
+    assert isinstance(frames[2][1], list)
+    assert frames[3][1]["id"] == "a1"
+    assert frames[4][1] == {"detail": "Client too slow"}
+    assert len(broadcaster) == 0
+
+
+def test_stream_rejects_clients_over_the_limit(main, monkeypatch):
+    broadcaster = Broadcaster(max_clients=0)
+    monkeypatch.setattr(main, "broadcaster", broadcaster)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(main.stream(FakeRequest(polls=1)))
+    assert exc.value.status_code == 503
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+from cpu_pool import CpuPool, PoolSaturated, WorkerCrashed
+
+
+def test_same_key_goes_to_the_same_worker():
+    pool = CpuPool(kind="thread", workers=4)
+
+    async def run():
+        import threading
+
+        def name():
+            return threading.current_thread().name
+
+        return {await pool.run(name, key="AAA") for _ in range(10)}
+
+    try:
+        assert len(asyncio.run(run())) == 1
+    finally:
+        pool.shutdown()
+
+
+def test_saturated_and_timed_out_calls_fail_fast():
+    pool = CpuPool(kind="thread", workers=1, max_pending=1, timeout=0.05)
+
+    async def run():
+        slow = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturated):
+            await pool.run(time.sleep, 0)
+        with pytest.raises(asyncio.TimeoutError):
+            await slow
+
+    try:
+        asyncio.run(run())
+        stats = pool.stats()
+        assert stats["rejected"] == 1
+        assert stats["timeouts"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_killed_worker_is_replaced():
+    pool = CpuPool(kind="process", workers=1, timeout=30)
+
+    async def run():
+        pid = await pool.run(os.getpid)
+        # Killed in the middle of a call: that call fails, the next one runs
+        # on a fresh process
+        call = asyncio.ensure_future(pool.run(time.sleep, 10))
+        await asyncio.sleep(0.5)
+        os.kill(pid, signal.SIGKILL)
+        with pytest.raises(WorkerCrashed):
+            await call
+        new_pid = await pool.run(os.getpid)
+        assert new_pid != pid
+
+        # Killed while idle: the call is resent to a fresh process
+        os.kill(new_pid, signal.SIGKILL)
+        await asyncio.sleep(0.5)
+        assert await pool.run(os.getpid) not in (pid, new_pid)
+        assert len(await pool.map_workers(os.getpid)) == 1
+
+    try:
+        asyncio.run(run())
+        stats = pool.stats()
+        assert stats["restarts"] == 2
+        assert stats["failed"] == 1
+        assert stats["pending"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_detect_symbol_degrades_when_the_worker_dies(main, monkeypatch):
+    async def crashed(*args, **kwargs):
+        raise WorkerCrashed("CPU pool worker 0 died")
+
+    monkeypatch.setattr(main.cpu_pool, "run", crashed)
+    result = asyncio.run(main.detect_symbol("CRASH.NSE"))
+    assert result["ml_degraded"] is True
+    assert result["ml_score"] == 0.0
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from entities import EntityIndex
+
+LISTINGS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "listings.csv"
+)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return EntityIndex.from_csv(LISTINGS)
+
+
+def test_cashtags_in_any_case(index):
+    assert index.extract("$tcs and $Infy, not $NOPE") == ["TCS", "INFY"]
+
+
+def test_bare_tickers_need_capitals_and_length(index):
+    assert index.extract("WIPRO and NTPC") == ["WIPRO", "NTPC"]
+    # Two letters is below min_bare_ticker
+    assert index.extract("LT is up") == []
+    assert EntityIndex.from_csv(LISTINGS, min_bare_ticker=2).extract("LT up") == ["LT"]
+
+
+def test_ambiguous_tickers_only_match_as_cashtags():
+    index = EntityIndex()
+    index.add("GOLD", "Gold Corp")
+    index.add("IDEA", "Vodafone Idea Limited")
+
+    assert index.extract("BUY GOLD NOW, great IDEA") == []
+    assert index.extract("$gold and $IDEA") == ["GOLD", "IDEA"]
+    assert index.extract("vodafone idea is up") == ["IDEA"]
+
+
+def test_multi_word_names_match_in_any_case(index):
+    text = "tata consultancy services beat, TATA MOTORS and Tata Steel follow"
+    assert index.extract(text) == ["TCS", "TATAMOTORS", "TATASTEEL"]
+    # The longest name starting at a token wins
+    assert index.extract("HDFC Life and hdfc bank") == ["HDFCLIFE", "HDFCBANK"]
+    assert index.extract("Mahindra and Mahindra") == ["M&M"]
+
+
+def test_single_word_names_must_be_capitalized(index):
+    assert index.extract("heavy reliance on imports, a titan of industry") == []
+    assert index.extract("no reliance on cipla or wipro") == []
+    assert index.extract("Reliance, Cipla and WIPRO rally") == [
+        "RELIANCE",
+        "CIPLA",
+        "WIPRO",
+    ]
+    assert index.extract("RIL and Airtel") == ["RELIANCE", "BHARTIARTL"]
+
+
+def test_first_mention_order_without_duplicates(index):
+    text = "$INFY then Reliance then Infosys then RELIANCE INDUSTRIES"
+    assert index.extract(text) == ["INFY", "RELIANCE"]
+
+
+def test_csv_loading(index):
+    stats = index.stats()
+    assert stats["tickers"] == len(index) == 50
+    # Name, short name without "Limited" and listed aliases
+    assert stats["aliases"] > stats["tickers"]
+    assert index.extract("Larsen & Toubro") == ["LT"]
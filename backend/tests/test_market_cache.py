@@ -0,0 +1,151 @@
+import asyncio
+import datetime
+
+import pytest
+
+import market_cache
+from bar_store import BarStore
+from market_cache import BudgetExceeded, MarketDataCache, TokenBucket
+
+BASE = datetime.datetime(2026, 3, 2, 9, 15)
+
+
+def bar(i: int, close: float = None) -> dict:
+    close = 100.0 + i if close is None else close
+    return {
+        "datetime": (BASE + datetime.timedelta(minutes=i)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        ),
+        "open": str(close),
+        "high": str(close),
+        "low": str(close),
+        "close": str(close),
+        "volume": str(1000 + i),
+    }
+
+
+class Upstream:
+    """Bars 0..last, answered newest first like Twelve Data"""
+
+    def __init__(self, last: int):
+        self.bars = [bar(i) for i in range(last + 1)]
+        self.calls = []
+
+    async def fetch(self, symbol, interval, outputsize):
+        self.calls.append(outputsize)
+        return {"values": list(reversed(self.bars[-outputsize:]))}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_800_000_000.0]
+    monkeypatch.setattr(market_cache.time, "time", lambda: now[0])
+    return now
+
+
+def closes(data):
+    return [float(v["close"]) for v in data["values"]]
+
+
+def test_fresh_entries_are_served_from_memory(clock):
+    upstream = Upstream(last=9)
+    cache = MarketDataCache(upstream.fetch, TokenBucket(60))
+
+    async def run():
+        first = await cache.get("tcs", "1min", outputsize=5)
+        clock[0] += 59
+        return first, await cache.get("TCS", "1min", outputsize=3)
+
+    first, second = asyncio.run(run())
+
+    assert closes(first) == [109.0, 108.0, 107.0, 106.0, 105.0]
+    assert closes(second) == [109.0, 108.0, 107.0]
+    assert upstream.calls == [5]
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_fetches_only_the_delta(clock):
+    upstream = Upstream(last=9)
+    cache = MarketDataCache(upstream.fetch, TokenBucket(60))
+    asyncio.run(cache.get("TCS", "1min", outputsize=5))
+
+    # Two new bars, and the last cached one was still forming
+    upstream.bars[-1] = bar(9, close=150.0)
+    upstream.bars += [bar(10), bar(11)]
+    clock[0] += 120
+    data = asyncio.run(cache.get("TCS", "1min", outputsize=5))
+
+    # Two bar lengths missed, plus the forming bar and one of slack
+    assert upstream.calls == [5, 4]
+    assert closes(data) == [111.0, 110.0, 150.0, 108.0, 107.0]
+    stats = cache.stats()
+    assert (stats["delta_fetches"], stats["full_fetches"]) == (1, 1)
+
+
+def test_long_gap_refetches_everything(clock):
+    upstream = Upstream(last=9)
+    cache = MarketDataCache(upstream.fetch, TokenBucket(60))
+    asyncio.run(cache.get("TCS", "1min", outputsize=5))
+    upstream.bars += [bar(i) for i in range(10, 20)]
+    clock[0] += 600
+
+    data = asyncio.run(cache.get("TCS", "1min", outputsize=5))
+
+    assert upstream.calls == [5, 5]
+    assert closes(data) == [119.0, 118.0, 117.0, 116.0, 115.0]
+    assert cache.stats()["full_fetches"] == 2
+
+
+def test_exhausted_budget_serves_stale_bars(clock):
+    upstream = Upstream(last=9)
+    budget = TokenBucket(60)
+    cache = MarketDataCache(upstream.fetch, budget)
+    asyncio.run(cache.get("TCS", "1min", outputsize=5))
+
+    # No queueing allowed: every further upstream call is refused
+    budget.max_queue = 0
+    clock[0] += 300
+    data = asyncio.run(cache.get("TCS", "1min", outputsize=5))
+
+    assert closes(data)[0] == 109.0
+    assert upstream.calls == [5]
+    assert cache.stats()["stale_served"] == 1
+    # Nothing cached to fall back on
+    with pytest.raises(BudgetExceeded):
+        asyncio.run(cache.get("INFY", "1min", outputsize=5))
+    assert budget.stats()["rejected"] == 2
+
+
+def test_empty_bucket_queues_until_a_token_refills():
+    # 6000 per minute refills a token every 10 ms
+    budget = TokenBucket(6000, capacity=1)
+
+    async def run():
+        await asyncio.gather(*(budget.acquire() for _ in range(3)))
+
+    asyncio.run(run())
+
+    stats = budget.stats()
+    assert (stats["granted"], stats["delayed"], stats["queued"]) == (3, 2, 0)
+
+
+def test_bars_are_warmed_from_the_bar_store(tmp_path):
+    store = BarStore(str(tmp_path))
+    upstream = Upstream(last=9)
+    asyncio.run(
+        MarketDataCache(upstream.fetch, TokenBucket(60), store=store).get(
+            "TCS", "1min", outputsize=5
+        )
+    )
+
+    async def unreachable(symbol, interval, outputsize):
+        raise AssertionError("fetched upstream")
+
+    # A restarted process: nothing in memory, bars on disk
+    cache = MarketDataCache(unreachable, TokenBucket(60), store=store)
+    data = asyncio.run(cache.get("TCS", "1min", outputsize=5))
+
+    assert data["values"] == list(reversed(upstream.bars[-5:]))
+    stats = cache.stats()
+    assert (stats["warm_loads"], stats["hits"]) == (1, 1)
+    store.close()
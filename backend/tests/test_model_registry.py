@@ -0,0 +1,96 @@
+import threading
+
+import numpy as np
+
+import model_registry
+from ml_scoring import merge_registry_stats
+from model_registry import IsolationForestRegistry
+
+X = np.zeros((10, 3))
+
+
+class FakeModel:
+    fits = 0
+
+    def fit(self, X_train):
+        FakeModel.fits += 1
+        self.fit_number = FakeModel.fits
+
+    def decision_function(self, X_test):
+        return np.array([-0.25])
+
+
+def make_registry(**kwargs):
+    return IsolationForestRegistry(model_factory=FakeModel, **kwargs)
+
+
+def test_least_recently_used_model_is_evicted():
+    registry = make_registry(max_models=2)
+    a = registry.get_model("A", X)
+    registry.get_model("B", X)
+    assert registry.get_model("A", X) is a
+    registry.get_model("C", X)
+
+    assert list(registry._models) == ["A", "C"]
+    stats = registry.stats()
+    assert (stats["misses"], stats["hits"], stats["evictions"]) == (3, 1, 1)
+    assert registry.get_model("B", X) is not None
+    assert registry.stats()["misses"] == 4
+
+
+def test_refit_after_retrain_bars():
+    registry = make_registry(retrain_after_bars=3)
+    first = registry.get_model("A", X)
+    assert registry.get_model("A", X, new_bars=2) is first
+    second = registry.get_model("A", X, new_bars=1)
+
+    assert second is not first
+    assert registry.get_model("A", X, new_bars=2) is second
+    assert registry.stats()["retrains"] == 1
+
+
+def test_refit_after_retrain_seconds(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(model_registry.time, "time", lambda: clock[0])
+    registry = make_registry(retrain_after_seconds=900)
+    first = registry.get_model("A", X)
+    clock[0] += 899
+    assert registry.get_model("A", X) is first
+    clock[0] += 1
+    second = registry.get_model("A", X)
+
+    assert second is not first
+    clock[0] += 899
+    assert registry.get_model("A", X) is second
+
+
+def test_score_and_merged_stats():
+    registry = make_registry()
+    score, is_anomaly = registry.score("A", X, X[:1])
+    assert (score, is_anomaly) == (0.25, True)
+
+    merged = merge_registry_stats([registry.stats(), registry.stats()])
+    assert merged["misses"] == 2 and merged["score_count"] == 2
+    assert merged["hit_rate"] == 0.0
+
+
+def test_threads_share_one_registry():
+    registry = make_registry(max_models=8, retrain_after_bars=5)
+    keys = [f"S{i}" for i in range(16)]
+
+    def work(offset):
+        for i in range(200):
+            registry.score(keys[(i + offset) % len(keys)], X, X[:1], new_bars=1)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = registry.stats()
+    assert len(registry) == 8
+    assert stats["score_count"] == 1600
+    assert stats["hits"] + stats["misses"] + stats["retrains"] == 1600
+    # Two first requests for one key may both fit; only one is cached
+    assert stats["misses"] - stats["evictions"] >= 8
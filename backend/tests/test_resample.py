@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from bar_store import bars_from_closes
+from resample import BarResampler, MultiTimeframeDetector
+
+T0 = 1772442000  # on an hour boundary
+
+
+def random_walk(n: int, seed: int, base: float = 1000.0, start: int = T0):
+    rng = np.random.default_rng(seed)
+    ts = [start + 60 * i for i in range(n)]
+    prices = (base * np.exp(np.cumsum(rng.normal(0, 0.001, n)))).tolist()
+    volumes = rng.integers(1000, 5000, n).tolist()
+    return bars_from_closes(ts, prices, volumes)
+
+
+def ready(frames):
+    return {tf: s for tf, s in frames.scores().items() if s["ready"]}
+
+
+def test_resampler_builds_ohlcv_bars():
+    resampler = BarResampler(300)
+    assert resampler.update(T0, 10, 12, 9, 11, 100) is None
+    assert resampler.update(T0 + 60, 11, 15, 10, 14, 50) is None
+    # The forming minute is sent again with new values: it replaces the old
+    assert resampler.update(T0 + 60, 11, 13, 8, 12, 70) is None
+    assert resampler.update(T0 + 240, 12, 12, 11, 11, 10) is None
+    assert resampler.update(T0 + 300, 11, 11, 11, 11, 5) == (
+        T0,
+        10,
+        13,
+        8,
+        11,
+        180,
+    )
+    # Late bar of a period already handed on
+    assert resampler.update(T0 + 120, 1, 1, 1, 1, 1) is None
+
+
+def test_incremental_sync_matches_one_pass():
+    bars = random_walk(4000, seed=1)
+    once = MultiTimeframeDetector()
+    once.sync(bars)
+    polled = MultiTimeframeDetector()
+    for end in range(200, len(bars) + 1, 37):
+        polled.sync(bars[max(0, end - 200) : end])
+    polled.sync(bars[-200:])
+    assert polled.reseeds == 0
+    assert ready(polled) == ready(once)
+    assert set(ready(once)) == {"5min", "15min", "1h"}
+
+
+def test_forming_bar_revision_is_not_a_new_history():
+    bars = random_walk(600, seed=2)
+    frames = MultiTimeframeDetector()
+    frames.sync(bars)
+    revised = bars.copy()
+    revised[-1]["close"] *= 1.01
+    revised[-1]["volume"] += 500
+    frames.sync(revised)
+    assert frames.reseeds == 0
+    expected = MultiTimeframeDetector()
+    expected.sync(revised)
+    assert frames.scores() == expected.scores()
+
+
+def test_regenerated_history_reseeds():
+    # Mock data: every poll is a new random walk over the same timestamps
+    frames = MultiTimeframeDetector()
+    frames.sync(random_walk(4000, seed=3, base=800))
+    regenerated = random_walk(4000, seed=4, base=1500)
+    frames.sync(regenerated)
+    assert frames.reseeds == 1
+    fresh = MultiTimeframeDetector()
+    fresh.sync(regenerated)
+    assert frames.scores() == fresh.scores()
+
+
+def test_unrelated_polls_are_not_spliced():
+    frames = MultiTimeframeDetector()
+    end = T0 + 200 * 60
+    for poll in range(40):
+        base = 800 + (poll * 97) % 700
+        bars = random_walk(200, seed=poll, base=base, start=end - 200 * 60)
+        frames.sync(bars)
+        end += 60
+        # Scores describe this poll's walk only, never a splice of several
+        fresh = MultiTimeframeDetector()
+        fresh.sync(bars)
+        assert frames.scores() == fresh.scores()
+        assert "1h" not in ready(frames)
+    assert frames.reseeds == 39
+
+
+def test_history_bars_cover_the_slowest_window():
+    frames = MultiTimeframeDetector()
+    assert frames.history_bars == 3600
+    frames.sync(random_walk(frames.history_bars, seed=5))
+    assert frames.scores()["1h"]["bars"] == pytest.approx(59, abs=1)
@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pytest
+
+from scan import score_matrix, split_by_length, stack_windows
+
+SPAN = 12
+
+
+def assert_close(actual, expected):
+    if math.isnan(expected):
+        assert math.isnan(actual)
+    else:
+        assert actual == pytest.approx(expected, rel=1e-8, abs=1e-8)
+
+
+def check_rows(main, P, V):
+    scores = score_matrix(P, V, span=SPAN)
+    for i in range(P.shape[0]):
+        prices, volumes = P[i].tolist(), V[i].tolist()
+        ewma_score, ewma_value = main.compute_ewma_anomaly(prices, span=SPAN)
+        vol_zscore, vol_ratio = main.compute_volume_anomaly(volumes)
+        momentum, short_momentum = main.compute_price_momentum_anomaly(prices)
+        assert_close(scores["ewma_score"][i], ewma_score)
+        assert_close(scores["ewma_value"][i], ewma_value)
+        assert_close(scores["volume_zscore"][i], vol_zscore)
+        assert_close(scores["volume_ratio"][i], vol_ratio)
+        assert_close(scores["momentum_score"][i], momentum)
+        assert_close(scores["short_momentum"][i], short_momentum)
+    return scores
+
+
+def random_batch(rows: int, bars: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    P = 500 * np.exp(np.cumsum(rng.normal(0, 0.004, (rows, bars)), axis=1))
+    V = rng.integers(10000, 90000, (rows, bars)).astype(float)
+    return P.round(2), V
+
+
+@pytest.mark.parametrize("bars", [2, 5, 20, 60, 390])
+def test_matches_pandas(main, bars):
+    P, V = random_batch(8, bars, seed=bars)
+    check_rows(main, P, V)
+
+
+def test_flat_series(main):
+    P, V = np.full((1, 390), 100.0), np.full((1, 390), 1000.0)
+    scores = check_rows(main, P, V)
+    assert scores["ewma_score"][0] == 0.0
+
+
+def test_flat_row_in_batch(main):
+    P, V = random_batch(50, 60, seed=7)
+    P[17] = 2500.0
+    scores = check_rows(main, P, V)
+    assert scores["ewma_score"][17] == 0.0
+
+
+def test_stack_and_split():
+    series = [[1.0] * 70, [2.0] * 60, [3.0] * 10, []]
+    full, short = split_by_length([len(s) for s in series], 60)
+    assert (full, short) == ([0, 1], [2])
+    assert stack_windows([series[i] for i in full], 60).shape == (2, 60)
@@ -0,0 +1,56 @@
+from social_ingest import IngestPipeline, SocialSignalStore, parse_messages
+
+NOW = 1_780_000_000.0
+
+
+def parse(record):
+    return list(parse_messages([record], NOW))[0]
+
+
+def test_symbols_string_is_one_symbol():
+    msg = parse({"text": "buy now", "symbols": "TCS"})
+    assert msg["symbols"] == ["TCS"]
+
+
+def test_symbols_must_be_strings_in_a_list():
+    assert parse({"text": "buy", "symbols": ["TCS", 5, None]})["symbols"] == ["TCS"]
+    assert parse({"text": "buy", "symbols": {"TCS": 1}})["symbols"] == []
+
+
+def test_timestamps():
+    assert parse({"text": "buy"})["ts"] == NOW
+    assert parse({"text": "buy", "timestamp": 1_700_000_000})["ts"] == 1_700_000_000
+    iso = parse({"text": "buy", "timestamp": "2026-03-02T09:15:00+00:00"})
+    assert iso["ts"] == 1772442900.0
+    for bad in ({"at": 1}, [1, 2], "yesterday", float("inf")):
+        assert parse({"text": "buy", "timestamp": bad}) == {
+            "rejected": True,
+            "bad_timestamp": True,
+        }
+
+
+def test_bad_records_do_not_fail_the_batch():
+    pipeline = IngestPipeline(
+        SocialSignalStore(),
+        analyze=lambda text: {
+            "sentiment_score": 0.0,
+            "manipulation_confidence": 0.0,
+            "keywords_detected": [],
+        },
+        trust=lambda handle, text: {"score": 50, "registered": False},
+    )
+    result = pipeline.ingest(
+        [
+            {"text": "$TCS to the moon", "handle": "a", "timestamp": NOW},
+            {"text": "$TCS again", "handle": "b", "timestamp": {"bad": 1}},
+            {"text": "no symbol here", "handle": "c"},
+            {"text": "", "handle": "d"},
+            {"text": "quiet", "handle": "e", "symbols": "INFY"},
+        ]
+    )
+    assert result["received"] == 5
+    assert result["rejected"] == 2
+    assert result["bad_timestamps"] == 1
+    assert result["without_entities"] == 1
+    assert result["signals_stored"] == 2
+    assert pipeline.stats()["bad_timestamps"] == 1
@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_main_loads_no_heavy_dependencies():
+    # A fresh interpreter, since this one has numpy from other tests
+    code = (
+        "import sys, main; "
+        "print(sorted({'numpy', 'pandas', 'sklearn', 'sqlalchemy'} & set(sys.modules)))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code],
+        cwd=BACKEND,
+        env=os.environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,158 @@
+import asyncio
+import datetime
+import multiprocessing
+
+from state import SqliteAlertStore, SqliteModelStore, SqliteThreatAggregates
+
+BASE = datetime.datetime(2026, 3, 2, 9, 15)
+
+
+def make_alert(i: int, worker: int = 0):
+    return {
+        # Every worker raises the same bar under its own id
+        "id": f"w{worker}-{i:05d}",
+        "symbol": f"SYM{i % 7}.NSE",
+        "interval": "1min",
+        "time": (BASE + datetime.timedelta(minutes=i)).isoformat(),
+        "source_handle": "pump_vip",
+        "severity_level": i % 5,
+        "created_at": (BASE + datetime.timedelta(seconds=i)).isoformat(),
+    }
+
+
+def _worker(path, worker, count, barrier, results):
+    store = SqliteAlertStore(path)
+    barrier.wait()
+    # Overlapping shares: each alert is raised by two of the three workers
+    added = sum(
+        store.add(make_alert(i, worker)) for i in range(count) if i % 3 != worker
+    )
+    barrier.wait()
+    results.put(
+        {
+            "worker": worker,
+            "added": added,
+            "count": len(store),
+            "bars": sorted(a["time"] for a in store.query(limit=10 * count)),
+            "symbol_counts": store.symbol_counts(),
+            "recent": [(s, a["id"]) for s, a in store.recent_rows(50)],
+        }
+    )
+    store.close()
+
+
+def test_workers_share_one_consistent_store(tmp_path):
+    path, workers, count = str(tmp_path / "state.db"), 3, 300
+    SqliteAlertStore(path).close()
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(path, w, count, barrier, results))
+        for w in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    outputs = [results.get(timeout=120) for _ in procs]
+    for proc in procs:
+        proc.join(timeout=30)
+        assert proc.exitcode == 0
+
+    # Each bar stored once, by whichever worker got there first
+    assert sum(out["added"] for out in outputs) == count
+    first = outputs[0]
+    assert first["count"] == count
+    assert first["bars"] == sorted(make_alert(i)["time"] for i in range(count))
+    for out in outputs[1:]:
+        for key in ("count", "bars", "symbol_counts", "recent"):
+            assert out[key] == first[key]
+
+
+def test_version_changes_on_writes_from_other_connections(tmp_path):
+    path = str(tmp_path / "state.db")
+    mine, other = SqliteAlertStore(path), SqliteAlertStore(path)
+    before = mine.version()
+    other.add(make_alert(0))
+    assert mine.version() != before
+    before = mine.version()
+    mine.add(make_alert(1))
+    assert mine.version() != before
+    assert mine.version() == mine.version()
+    mine.close()
+    other.close()
+
+
+def test_added_after_tails_every_writer(tmp_path):
+    path = str(tmp_path / "state.db")
+    mine, other = SqliteAlertStore(path), SqliteAlertStore(path)
+    cursor = mine.last_rowid()
+    other.add(make_alert(0, worker=1))
+    mine.add(make_alert(1))
+    other.add(make_alert(2, worker=1))
+    rows = mine.added_after(cursor)
+    assert [a["id"] for _, a in rows] == ["w1-00000", "w0-00001", "w1-00002"]
+    assert mine.added_after(rows[-1][0]) == []
+    assert mine.added_after(cursor, limit=2) == rows[:2]
+    mine.close()
+    other.close()
+
+
+def test_threat_aggregates_follow_other_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    mine, other = SqliteAlertStore(path), SqliteAlertStore(path)
+    aggregates = SqliteThreatAggregates(mine, lambda alert: 1.0)
+    now = datetime.datetime(2026, 3, 2, 10, 0).timestamp()
+    assert aggregates.threat(now)["recent_alerts"] == 0
+    other.add(make_alert(0, worker=1))
+    assert aggregates.threat(now)["recent_alerts"] == 1
+    assert aggregates.leaderboard(5, now) == [("SYM0.NSE", 1)]
+    mine.close()
+    other.close()
+
+
+def test_model_store_keeps_the_newer_fit(tmp_path):
+    models = SqliteModelStore(str(tmp_path / "state.db"))
+    models.put(("AAA", "1min"), {"fit": 1}, fitted_at=100.0)
+    models.put(("AAA", "1min"), {"fit": 0}, fitted_at=50.0)
+    assert models.get(("AAA", "1min")) == ({"fit": 1}, 100.0)
+    assert models.get(("BBB", "1min")) is None
+
+
+def test_stream_tail_publishes_other_workers_alerts(main, monkeypatch, tmp_path):
+    path = str(tmp_path / "state.db")
+    store, other = SqliteAlertStore(path), SqliteAlertStore(path)
+    monkeypatch.setattr(main, "STATE_BACKEND", "sqlite")
+    monkeypatch.setattr(main, "alerts", store)
+    monkeypatch.setattr(
+        main,
+        "threat_aggregates",
+        SqliteThreatAggregates(store, main.alert_threat_score),
+    )
+    monkeypatch.setattr(main, "STREAM_TAIL_SECONDS", 0.01)
+
+    async def run():
+        sub = main.broadcaster.subscribe()
+        tail = asyncio.create_task(main.tail_shared_alerts())
+        try:
+            await asyncio.sleep(0.05)
+            other.add({**make_alert(0, worker=1), "id": "from-other-worker"})
+            main.record_alert({**make_alert(1), "id": "raised-here"})
+            await asyncio.sleep(0.1)
+            events = []
+            while True:
+                message = await sub.next(timeout=0.05)
+                if message is None:
+                    return events
+                events.append(message)
+        finally:
+            tail.cancel()
+            main.broadcaster.unsubscribe(sub)
+
+    events = asyncio.run(run())
+    alert_ids = [e[1] for e in events if e[0] == "alert"]
+    # The local alert is published once, directly; the other worker's once,
+    # by the tail
+    assert len(alert_ids) == 2
+    assert sum("raised-here" in data for data in alert_ids) == 1
+    assert sum("from-other-worker" in data for data in alert_ids) == 1
+    store.close()
+    other.close()
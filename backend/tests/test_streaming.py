@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+import pytest
+
+from streaming import StreamingAnomalyDetector
+
+WINDOW = 60
+SPAN = 12
+
+
+def random_bars(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    prices = (1000 * np.exp(np.cumsum(rng.normal(0, 0.005, n)))).round(2).tolist()
+    volumes = rng.integers(50000, 200000, n).tolist()
+    timestamps = [f"t{i:05d}" for i in range(n)]
+    return timestamps, prices, volumes
+
+
+def reference(main, prices, volumes):
+    """The pandas detectors over the detector's trailing window"""
+    p, v = prices[-WINDOW:], volumes[-WINDOW:]
+    ewma = main.compute_ewma_anomaly(p, span=SPAN)
+    volume = main.compute_volume_anomaly(v)
+    momentum = main.compute_price_momentum_anomaly(p)
+    return ewma + volume + momentum
+
+
+def streaming(detector):
+    return (
+        detector.ewma_anomaly()
+        + detector.volume_anomaly()
+        + detector.momentum_anomaly()
+    )
+
+
+def assert_close(actual, expected):
+    for a, e in zip(actual, expected):
+        if math.isnan(e):
+            assert math.isnan(a)
+        else:
+            assert a == pytest.approx(e, rel=1e-8, abs=1e-8)
+
+
+def test_matches_pandas_bar_by_bar(main):
+    timestamps, prices, volumes = random_bars(400)
+    detector = StreamingAnomalyDetector(window=WINDOW, span=SPAN)
+    for i in range(len(prices)):
+        detector.update(prices[i], volumes[i], timestamps[i])
+        if i >= 1:
+            assert_close(
+                streaming(detector), reference(main, prices[: i + 1], volumes[: i + 1])
+            )
+
+
+@pytest.mark.parametrize("n", [2, 5, 19, 20, 21, 59])
+def test_short_series(main, n):
+    timestamps, prices, volumes = random_bars(n, seed=n)
+    detector = StreamingAnomalyDetector(window=WINDOW, span=SPAN)
+    detector.sync(timestamps, prices, volumes)
+    assert_close(streaming(detector), reference(main, prices, volumes))
+
+
+@pytest.mark.parametrize("n", [30, 60, 390])
+def test_flat_series(main, n):
+    # Halted or circuit-locked symbols: nothing moves, nothing is anomalous
+    timestamps = [f"t{i:05d}" for i in range(n)]
+    prices, volumes = [100.0] * n, [1000] * n
+    detector = StreamingAnomalyDetector(window=WINDOW, span=SPAN)
+    detector.sync(timestamps, prices, volumes)
+    expected = reference(main, prices, volumes)
+    assert_close(streaming(detector), expected)
+    assert expected[0] == 0.0
+
+
+def test_sync_ingests_only_new_bars(main):
+    timestamps, prices, volumes = random_bars(300, seed=3)
+    detector = StreamingAnomalyDetector(window=WINDOW, span=SPAN)
+    assert detector.sync(timestamps[:200], prices[:200], volumes[:200]) == WINDOW
+    assert detector.sync(timestamps[50:250], prices[50:250], volumes[50:250]) == 50
+    assert_close(streaming(detector), reference(main, prices[:250], volumes[:250]))
+
+
+def test_sync_reseeds_when_history_changed(main):
+    timestamps, prices, volumes = random_bars(200, seed=4)
+    detector = StreamingAnomalyDetector(window=WINDOW, span=SPAN)
+    detector.sync(timestamps, prices, volumes)
+    # Same timestamps, different data: the last ingested bar no longer matches
+    _, other, other_volumes = random_bars(200, seed=5)
+    assert detector.sync(timestamps, other, other_volumes) == WINDOW
+    assert_close(streaming(detector), reference(main, other, other_volumes))
+
+
+def test_per_symbol_detectors_are_bounded(main, monkeypatch):
+    from collections import OrderedDict
+
+    monkeypatch.setattr(main, "DETECTOR_CACHE_SIZE", 2)
+    monkeypatch.setattr(main, "detectors", OrderedDict())
+    monkeypatch.setattr(main, "timeframe_detectors", OrderedDict())
+    monkeypatch.setattr(main, "bar_store", None)
+    stamps = ["2026-03-02 09:15:00", "2026-03-02 09:16:00"]
+
+    first = main.get_detector("aaa", "1min")
+    for symbol in ("AAA", "BBB", "AAA", "CCC"):
+        main.get_detector(symbol, "1min")
+        main.sync_timeframes(symbol, stamps, [1.0, 1.1], [10, 20])
+
+    # BBB was least recently used
+    assert list(main.detectors) == [("AAA", "1min"), ("CCC", "1min")]
+    assert list(main.timeframe_detectors) == ["AAA", "CCC"]
+    assert main.get_detector("AAA", "1min") is first
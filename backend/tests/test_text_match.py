@@ -0,0 +1,59 @@
+from risk import analyze_sentiment_and_manipulation, extract_manipulation_keywords
+from text_match import KeywordMatcher
+
+
+def test_find_groups_keywords_by_label_case_insensitively():
+    matcher = KeywordMatcher(
+        {"urgency": ["Now", "urgent"], "greed": ["10x", "now"], "empty": [""]}
+    )
+
+    hits = matcher.find("URGENT: buy NOW for 10X returns")
+
+    assert hits == {"urgency": {"now", "urgent"}, "greed": {"10x", "now"}}
+    assert matcher.keywords == ["now", "urgent", "10x"]
+    assert matcher.find("snow here") == {"greed": {"now"}, "urgency": {"now"}}
+
+
+def test_whole_words_rejects_matches_inside_words():
+    matcher = KeywordMatcher({"urgency": ["now", "pump"]})
+
+    assert matcher.find("I know the pumpkin price") == {"urgency": {"now", "pump"}}
+    assert matcher.find("I know the pumpkin price", whole_words=True) == {}
+    assert matcher.find("pump it now!", whole_words=True) == {
+        "urgency": {"now", "pump"}
+    }
+
+
+def test_finditer_positions_overlaps_and_order():
+    matcher = KeywordMatcher({"a": ["he", "she", "hers"]})
+
+    assert list(matcher.finditer("USHERS")) == [
+        (1, 4, "she"),
+        (2, 4, "he"),
+        (2, 6, "hers"),
+    ]
+    assert list(matcher.finditer("ushers she", whole_words=True)) == [(7, 10, "she")]
+    assert list(matcher.finditer("hehe")) == [(0, 2, "he"), (2, 4, "he")]
+
+
+def test_emoji_keywords_match_inside_words():
+    matcher = KeywordMatcher({"hype": ["🚀", "to the 🌙"]})
+
+    hits = matcher.find("GO🚀🚀 to the 🌙!", whole_words=True)
+
+    assert hits == {"hype": {"🚀", "to the 🌙"}}
+    assert [m[:2] for m in matcher.finditer("GO🚀🚀", whole_words=True)] == [
+        (2, 3),
+        (3, 4),
+    ]
+
+
+def test_risk_keywords_keep_pattern_order():
+    text = "Insider tip: guaranteed returns, BUY NOW! Breaking 🚀"
+
+    keywords = extract_manipulation_keywords(text)
+    analysis = analyze_sentiment_and_manipulation(text)
+
+    assert keywords == ["breaking", "buy now", "guaranteed returns", "insider"]
+    assert analysis["keywords_detected"] == keywords
+    assert analysis["contains_manipulation_keywords"]
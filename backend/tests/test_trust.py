@@ -0,0 +1,69 @@
+from trust import IntermediaryRegistry, TrustService, normalize_handle
+
+
+def test_normalize_handle():
+    for spelling in ("@Verified_Broker", " ＶＥＲＩＦＩＥＤ_broker", "verified_broker"):
+        assert normalize_handle(spelling) == "verified_broker"
+
+
+def test_registry_lookup_ignores_spelling():
+    registry = IntermediaryRegistry({"Verified_Broker": {"name": "VB", "score": 95}})
+    assert "@verified_broker" in registry
+    assert registry.get("ＶＥＲＩＦＩＥＤ_BROKER")["name"] == "VB"
+
+
+def test_score_fn_gets_the_handle_as_posted(main):
+    # The "@" counts towards the length, as it did before normalization
+    assert (
+        "short_handle"
+        not in main.score_trust("@abcd")["credibility_analysis"]["red_flags"]
+    )
+    assert (
+        "short_handle" in main.score_trust("abcd")["credibility_analysis"]["red_flags"]
+    )
+    assert main.score_trust("@Verified_Broker_Official")["registered"] is True
+
+
+def test_results_are_cached_per_handle_and_content():
+    calls = []
+
+    def score_fn(handle, content):
+        calls.append((handle, content))
+        return {"score": len(handle)}
+
+    service = TrustService(IntermediaryRegistry(), score_fn)
+    service.score("@abcd", "buy now")
+    service.score("@abcd", "buy now")
+    service.score("@abcd", "sell now")
+    assert calls == [("@abcd", "buy now"), ("@abcd", "sell now")]
+    assert service.stats()["cache"]["hits"] == 1
+
+
+def test_cache_keys_on_the_content_not_its_hash(monkeypatch):
+    import builtins
+
+    calls = []
+    service = TrustService(
+        IntermediaryRegistry(), lambda h, c: calls.append(c) or {"content": c}
+    )
+    # Even if hash() collided, distinct contents get their own entries
+    monkeypatch.setattr(builtins, "hash", lambda value: 0)
+    assert service.score("@abcd", "buy now")["content"] == "buy now"
+    assert service.score("@abcd", "sell now")["content"] == "sell now"
+    assert calls == ["buy now", "sell now"]
+
+
+def test_verify_entities_scores_each_distinct_handle_once(main, monkeypatch):
+    import asyncio
+
+    calls = []
+    service = TrustService(
+        main.intermediaries, lambda h, c: calls.append(h) or main.compute_trust(h, c)
+    )
+    monkeypatch.setattr(main, "trust_service", service)
+
+    handles = ["@pumper123", "@Verified_Broker_Official", "@pumper123"]
+    results = asyncio.run(main.verify_entities(handles))["results"]
+
+    assert len(results) == 3 and results[0] == results[2]
+    assert calls == ["@pumper123", "@Verified_Broker_Official"]
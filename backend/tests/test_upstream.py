@@ -0,0 +1,127 @@
+import asyncio
+
+import httpx
+import pytest
+
+from upstream import SingleFlight, TwelveDataClient, UpstreamError
+
+
+class MockServer:
+    """Twelve Data stand-in that answers after a delay and records every call"""
+
+    def __init__(self, delay: float = 0.05, status_code: int = 200):
+        self.delay = delay
+        self.status_code = status_code
+        self.calls = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request)
+        await asyncio.sleep(self.delay)
+        params = dict(request.url.params)
+        return httpx.Response(
+            self.status_code, json={"path": request.url.path, "params": params}
+        )
+
+
+def mock_client(server: MockServer) -> TwelveDataClient:
+    client = TwelveDataClient(base_url="https://td.test", api_key="secret")
+    client._client = httpx.AsyncClient(
+        base_url=client.base_url, transport=httpx.MockTransport(server.handler)
+    )
+    return client
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    server = MockServer()
+
+    async def run():
+        client = mock_client(server)
+        results = await asyncio.gather(
+            *(client.time_series("AAA", "1min", 390) for _ in range(10))
+        )
+        await client.aclose()
+        return client, results
+
+    client, results = asyncio.run(run())
+    assert len(server.calls) == 1
+    assert all(r == results[0] for r in results)
+    assert results[0]["params"]["apikey"] == "secret"
+    stats = client.stats()
+    assert stats["requests"] == 1
+    assert stats["coalesced"] == 9
+    assert stats["inflight"] == 0
+
+
+def test_different_requests_are_not_coalesced():
+    server = MockServer()
+
+    async def run():
+        client = mock_client(server)
+        await asyncio.gather(
+            client.time_series("AAA", "1min", 390),
+            client.time_series("AAA", "5min", 390),
+            client.time_series("BBB", "1min", 390),
+            client.symbol_search("AAA"),
+        )
+        await client.aclose()
+
+    asyncio.run(run())
+    assert len(server.calls) == 4
+
+
+def test_sequential_requests_reuse_the_pooled_client():
+    server = MockServer(delay=0)
+
+    async def run():
+        client = mock_client(server)
+        pooled = client.client
+        await client.time_series("AAA", "1min", 390)
+        await client.time_series("AAA", "1min", 390)
+        assert client.client is pooled
+        await client.aclose()
+
+    asyncio.run(run())
+    # Not in flight at the same time, so both reach the server
+    assert len(server.calls) == 2
+
+
+def test_error_status_raises_for_every_waiter():
+    server = MockServer(status_code=429)
+
+    async def run():
+        client = mock_client(server)
+        results = await asyncio.gather(
+            *(client.time_series("AAA", "1min", 390) for _ in range(3)),
+            return_exceptions=True,
+        )
+        await client.aclose()
+        return client, results
+
+    client, results = asyncio.run(run())
+    assert len(server.calls) == 1
+    assert all(isinstance(r, UpstreamError) for r in results)
+    assert results[0].status_code == 429
+    assert client.stats()["errors"] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "bars"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "bars"
+    assert len(calls) == 1
+    assert flight.inflight() == 0
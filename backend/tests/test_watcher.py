@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from watcher import SymbolWatcher
+
+
+class UnknownSymbol(Exception):
+    pass
+
+
+def make_watcher(**kwargs):
+    calls = []
+
+    async def detect(symbol, interval):
+        calls.append(symbol)
+        if symbol == "BAD":
+            raise UnknownSymbol(symbol)
+        return {"symbol": symbol}
+
+    return SymbolWatcher(detect, lambda interval: 60, **kwargs), calls
+
+
+def test_latest_runs_the_first_read_once():
+    watcher, calls = make_watcher()
+
+    async def run():
+        first = await asyncio.gather(*(watcher.latest("tcs") for _ in range(3)))
+        return first, await watcher.latest("TCS")
+
+    first, again = asyncio.run(run())
+
+    assert first == [{"symbol": "tcs"}] * 3
+    assert again == {"symbol": "tcs"}
+    assert calls == ["tcs"]
+
+
+def test_full_watchlist_returns_none():
+    watcher, calls = make_watcher(max_symbols=1)
+
+    async def run():
+        await watcher.latest("TCS")
+        return await watcher.latest("INFY")
+
+    assert asyncio.run(run()) is None
+    assert calls == ["TCS"]
+    assert len(watcher) == 1
+
+
+def test_failed_first_run_raises_and_frees_the_slot():
+    watcher, calls = make_watcher(max_symbols=1)
+
+    with pytest.raises(UnknownSymbol):
+        asyncio.run(watcher.latest("BAD"))
+
+    assert len(watcher) == 0
+    assert watcher.stats()["errors"] == 1
+    assert asyncio.run(watcher.latest("TCS")) == {"symbol": "TCS"}
+
+
+def test_failed_first_run_of_a_pinned_symbol_keeps_it():
+    watcher, calls = make_watcher()
+    watcher.watch("BAD")
+
+    with pytest.raises(UnknownSymbol):
+        asyncio.run(watcher.latest("BAD"))
+
+    assert watcher.entries()[0]["last_error"] == "BAD"
@@ -0,0 +1,90 @@
+import time
+
+from coordination import CoordinationGraph
+from near_duplicates import NearDuplicateIndex
+
+TEMPLATE = "RELIANCE to {} by Friday!!! Join the VIP group for the entry call"
+
+
+def test_coordination_burst_and_cluster():
+    graph = CoordinationGraph(window_seconds=3600, burst_seconds=300)
+    now = time.time()
+    for i, handle in enumerate(("a", "b", "c")):
+        graph.add(handle, "RELIANCE.NSE", now - 30 + i, "Telegram")
+    graph.add("c", "TCS", now, "X")
+    result = graph.analyze("reliance", now=now)
+    assert result["burst_handles"] == 3
+    assert result["coordinated"] is True
+    assert result["cluster_handles"] == 3
+    assert result["cluster_symbols"] == 2
+    assert result["cluster_channels"] == 2
+
+
+def test_coordination_late_messages():
+    graph = CoordinationGraph(window_seconds=3600, burst_seconds=300)
+    now = time.time()
+    graph.add("a", "RELIANCE", now - 10)
+    # Late, but inside the window: kept in the graph, outside the burst
+    graph.add("b", "RELIANCE", now - 1200)
+    # Already outside the window: ignored
+    graph.add("c", "RELIANCE", now - 7200)
+    result = graph.analyze("RELIANCE", now=now)
+    assert result["cluster_handles"] == 2
+    assert result["burst_handles"] == 1
+    assert result["timing_spread_seconds"] == 0.0
+    stats = graph.stats()
+    assert stats["events"] == 2
+    assert stats["late_messages"] == 1
+    # The late message expires with the newer one that arrived before it
+    graph.analyze("RELIANCE", now=now + 3600)
+    assert graph.stats()["events"] == 0
+
+
+def test_coordination_future_timestamp_does_not_block_expiry():
+    graph = CoordinationGraph(window_seconds=3600)
+    now = time.time()
+    graph.add("skewed", "RELIANCE", now + 86400)
+    graph.add("a", "RELIANCE", now)
+    graph.analyze("RELIANCE", now=now + 3700)
+    assert graph.stats()["events"] == 0
+
+
+def test_near_duplicates_cluster_templates():
+    index = NearDuplicateIndex(window_seconds=3600)
+    for i, target in enumerate((2800, 2950, 3100, 3300)):
+        index.add(TEMPLATE.format(target), ["RELIANCE.NSE"], ts=100.0 + i, now=110.0)
+    index.add("Quarterly results are due next week", ["RELIANCE"], 105.0, 110.0)
+    summary = index.symbol_summary("RELIANCE", min_size=3, now=110.0)
+    assert summary["clusters"] == 1
+    assert summary["largest_cluster"] == 4
+
+
+def test_near_duplicates_late_batch_keeps_live_messages():
+    index = NearDuplicateIndex(window_seconds=600)
+    for i in range(3):
+        index.add(TEMPLATE.format(3000 + i), ["RELIANCE"], ts=1000.0 + i, now=1000.0)
+    # A delayed batch of older copies, replayed with its own event time
+    for i in range(3):
+        index.add(TEMPLATE.format(2000 + i), ["RELIANCE"], ts=500.0 + i, now=500.0)
+    assert index.stats()["late_messages"] == 3
+    summary = index.symbol_summary("RELIANCE", min_size=3, now=1000.0)
+    assert summary["largest_cluster"] == 6
+    # Outside the window already: not indexed
+    assert index.add(TEMPLATE.format(1), ["RELIANCE"], ts=100.0, now=1000.0) == 0
+    assert index.symbol_summary("RELIANCE", min_size=1, now=1700.0)["messages"] == 0
+    assert index.stats()["messages"] == 0
+
+
+def test_coordination_late_message_does_not_stretch_the_burst():
+    graph = CoordinationGraph(window_seconds=3600, burst_seconds=300)
+    now = time.time()
+    graph.add("a", "RELIANCE", now - 100)
+    # Late, inside the burst window, behind a newer message
+    graph.add("b", "RELIANCE", now - 290)
+    graph.add("c", "RELIANCE", now)
+    assert graph.analyze("RELIANCE", now=now)["timing_spread_seconds"] == 290.0
+    # 20s on, the late message has left the burst though it arrived second
+    result = graph.analyze("RELIANCE", now=now + 20)
+    assert result["burst_handles"] == 2
+    assert result["timing_spread_seconds"] == 100.0
+    assert graph.stats()["events"] == 3
@@ -0,0 +1,70 @@
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive matcher over a set of labelled keywords, with the
+    keywords lower-cased and deduplicated once up front.
+
+    Each keyword is checked with CPython's substring search. For the
+    dictionaries this is used with (tens of keywords against messages of a
+    few hundred characters) that beats a per-character automaton written in
+    Python, which only pulls ahead at about 150 keywords. Company names are
+    matched per token by EntityIndex instead.
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable[str]]):
+        """keywords maps a label (e.g. "urgency") to the keywords under it"""
+        self.labels: Dict[str, Set[str]] = {}
+        for label, words in keywords.items():
+            for word in words:
+                word = word.lower()
+                if word:
+                    self.labels.setdefault(word, set()).add(label)
+        self.keywords: List[str] = list(self.labels)
+
+    def finditer(
+        self, text: str, whole_words: bool = False
+    ) -> Iterator[Tuple[int, int, str]]:
+        """
+        (start, end, keyword) for every match in the lower-cased text,
+        overlapping ones included, ordered by start
+        """
+        text = text.lower()
+        matches = []
+        for word in self.keywords:
+            start = text.find(word)
+            while start >= 0:
+                end = start + len(word)
+                if not whole_words or self._on_boundaries(text, word, start, end):
+                    matches.append((start, end, word))
+                start = text.find(word, start + 1)
+        matches.sort()
+        return iter(matches)
+
+    @staticmethod
+    def _on_boundaries(text: str, word: str, start: int, end: int) -> bool:
+        # Only word characters at the keyword's own edges need a boundary,
+        # so emoji keywords still match inside words
+        if _is_word_char(word[0]) and start > 0 and _is_word_char(text[start - 1]):
+            return False
+        if _is_word_char(word[-1]) and end < len(text) and _is_word_char(text[end]):
+            return False
+        return True
+
+    def find(self, text: str, whole_words: bool = False) -> Dict[str, Set[str]]:
+        """Distinct keywords found in text, grouped by label"""
+        if whole_words:
+            words = {word for _, _, word in self.finditer(text, whole_words)}
+        else:
+            text = text.lower()
+            words = {word for word in self.keywords if word in text}
+        hits: Dict[str, Set[str]] = {}
+        for word in words:
+            for label in self.labels[word]:
+                hits.setdefault(label, set()).add(word)
+        return hits
@@ -0,0 +1,175 @@
+import csv
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+# CSV columns accepted for the handle and the entity name
+HANDLE_COLUMNS = ("handle", "Handle", "username")
+NAME_COLUMNS = ("name", "Name", "Intermediary Name", "entity")
+
+
+def normalize_handle(handle: str) -> str:
+    """@Verified_Broker, ＶＥＲＩＦＩＥＤ_broker and verified_broker are one handle"""
+    return unicodedata.normalize("NFKC", handle).strip().lstrip("@").lower()
+
+
+class IntermediaryRegistry:
+    """
+    Registered market intermediaries keyed by normalized social handle.
+    Lookups are a single dict probe, so the full SEBI intermediary list
+    (tens of thousands of entries) costs nothing extra per call.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict]] = None):
+        self._entries: Dict[str, Dict] = {}
+        for handle, entry in (entries or {}).items():
+            self.add(handle, entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, handle: str) -> bool:
+        return normalize_handle(handle) in self._entries
+
+    def add(self, handle: str, entry: Dict):
+        key = normalize_handle(handle)
+        if key:
+            self._entries[key] = entry
+
+    def get(self, handle: str) -> Optional[Dict]:
+        return self._entries.get(normalize_handle(handle))
+
+    def load_csv(self, path: str) -> int:
+        """
+        Add entries from a CSV with handle, name, type and score columns;
+        any other columns are kept on the entry. Returns the rows loaded.
+        """
+        loaded = 0
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                row = {(k or "").strip(): (v or "").strip() for k, v in row.items()}
+                handle = next((row[c] for c in HANDLE_COLUMNS if row.get(c)), None)
+                if not handle:
+                    continue
+                name = next((row[c] for c in NAME_COLUMNS if row.get(c)), handle)
+                try:
+                    score = int(float(row.get("score") or 90))
+                except ValueError:
+                    score = 90
+                extra = {
+                    k: v
+                    for k, v in row.items()
+                    if v and k not in HANDLE_COLUMNS + NAME_COLUMNS + ("score",)
+                }
+                self.add(
+                    handle,
+                    {
+                        **extra,
+                        "name": name,
+                        "type": row.get("type") or "intermediary",
+                        "score": score,
+                    },
+                )
+                loaded += 1
+        return loaded
+
+
+class TTLCache:
+    """LRU cache whose entries also expire `ttl_seconds` after being set"""
+
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = 100000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Shared by the event loop and the ingestion worker thread
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, self._MISSING)
+            if item is self._MISSING or item[0] < time.monotonic():
+                if item is not self._MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TrustService:
+    """
+    Memoized trust scoring. Results of `score_fn(handle, content)` are cached
+    per (handle, SHA-1 digest of content); the digest keeps keys small for
+    long messages without the collisions of hash(). Pump campaigns repeat
+    both, so most inbound messages are a cache hit. Cached results are
+    shared and must not be mutated.
+
+    score_fn gets the handle as posted: registry lookups normalize it
+    themselves, while the handle heuristics (length, digits) score the raw
+    spelling, so "@abcd" is not a short handle.
+    """
+
+    def __init__(
+        self,
+        registry: IntermediaryRegistry,
+        score_fn: Callable[[str, str], Dict],
+        max_entries: int = 100000,
+        ttl_seconds: float = 3600,
+    ):
+        self.registry = registry
+        self.score_fn = score_fn
+        self.cache = TTLCache(max_entries, ttl_seconds)
+
+    def score(self, handle: str, content: str = "") -> Dict:
+        handle = handle or ""
+        digest = hashlib.sha1(content.encode()).digest() if content else b""
+        key = (handle, digest)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.score_fn(handle, content)
+            self.cache.set(key, result)
+        return result
+
+    def score_many(self, handles: Iterable[str]) -> Dict[str, Dict]:
+        """Scores of distinct handles, each looked up once"""
+        return {handle: self.score(handle) for handle in dict.fromkeys(handles)}
+
+    def invalidate(self):
+        """Drop cached results, e.g. after the registry was reloaded"""
+        self.cache.clear()
+
+    def stats(self) -> Dict:
+        return {"registry_entries": len(self.registry), "cache": self.cache.stats()}
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class UpstreamError(Exception):
+    """Non-200 response from the market data API"""
+
+    def __init__(self, status_code: int, path: str):
+        super().__init__(f"{path} returned HTTP {status_code}")
+        self.status_code = status_code
+        self.path = path
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one in-flight call"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]):
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            # shield so one cancelled waiter does not cancel everyone's call
+            return await asyncio.shield(fut)
+
+        self.leaders += 1
+        fut = asyncio.ensure_future(fn())
+        self._inflight[key] = fut
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            if fut.done():
+                self._inflight.pop(key, None)
+            else:
+                fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+class TwelveDataClient:
+    """
+    Application-lifetime client for the Twelve Data REST API.
+
+    A single pooled httpx.AsyncClient (HTTP/2 when h2 is installed) is shared
+    by every request, and identical concurrent requests are coalesced into
+    one upstream call.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://api.twelvedata.com",
+        api_key: str = "",
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client: Optional[httpx.AsyncClient] = None
+        self._flight = SingleFlight()
+
+        self.requests = 0
+        self.errors = 0
+        self.latency_seconds = 0.0
+        self.latency_max = 0.0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the client binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url, limits=self.limits, http2=self.http2
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get_json(self, path: str, params: Dict, timeout: float):
+        start = time.perf_counter()
+        try:
+            r = await self.client.get(
+                path, params={**params, "apikey": self.api_key}, timeout=timeout
+            )
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.requests += 1
+            self.latency_seconds += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+        if r.status_code != 200:
+            self.errors += 1
+            raise UpstreamError(r.status_code, path)
+        return r.json()
+
+    async def get_json(self, path: str, params: Dict, timeout: float = 20):
+        key = (path, tuple(sorted(params.items())))
+        return await self._flight.do(key, lambda: self._get_json(path, params, timeout))
+
+    async def time_series(self, symbol: str, interval: str, outputsize: int):
+        params = {
+            "symbol": symbol,
+            "interval": interval,
+            "outputsize": outputsize,
+            "format": "JSON",
+        }
+        return await self.get_json("/time_series", params, timeout=20)
+
+    async def symbol_search(self, query: str):
+        return await self.get_json("/symbol_search", {"symbol": query}, timeout=10)
+
+    def stats(self) -> Dict:
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "requests": self.requests,
+            "errors": self.errors,
+            "coalesced": self._flight.coalesced,
+            "inflight": self._flight.inflight(),
+            "avg_latency_ms": (
+                round(self.latency_seconds / self.requests * 1000, 3)
+                if self.requests
+                else 0.0
+            ),
+            "max_latency_ms": round(self.latency_max * 1000, 3),
+        }
@@ -0,0 +1,227 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from upstream import SingleFlight
+
+
+class _Watch:
+    __slots__ = (
+        "symbol",
+        "interval",
+        "period",
+        "pinned",
+        "next_run",
+        "last_read",
+        "running",
+        "result",
+        "last_run",
+        "runs",
+        "errors",
+        "last_error",
+        "failure",
+    )
+
+    def __init__(self, symbol: str, interval: str, period: float, pinned: bool):
+        self.symbol = symbol
+        self.interval = interval
+        self.period = period
+        self.pinned = pinned
+        self.next_run = 0.0
+        self.last_read = time.monotonic()
+        self.running = False
+        self.result: Any = None
+        self.last_run: Optional[float] = None
+        self.runs = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        # Exception of the latest run, None once a run succeeds
+        self.failure: Optional[Exception] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "period_seconds": self.period,
+            "pinned": self.pinned,
+            "last_run": self.last_run,
+            "next_run_in": round(max(0.0, self.next_run - time.monotonic()), 3),
+            "runs": self.runs,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class SymbolWatcher:
+    """
+    Background scheduler that runs `detect(symbol, interval)` for every
+    watched symbol once per poll period, with jitter so symbols do not fire
+    in lockstep, and at most `max_concurrency` runs at a time. Readers get
+    the latest result instead of triggering detection themselves.
+
+    Pinned symbols stay watched until removed. Symbols added on first read
+    are dropped again after `idle_seconds` without a reader.
+    """
+
+    def __init__(
+        self,
+        detect: Callable[[str, str], Awaitable[Any]],
+        period_for: Callable[[str], float],
+        max_concurrency: int = 8,
+        max_symbols: int = 200,
+        jitter: float = 0.1,
+        idle_seconds: float = 900,
+    ):
+        self.detect = detect
+        self.period_for = period_for
+        self.max_symbols = max_symbols
+        self.jitter = jitter
+        self.idle_seconds = idle_seconds
+        self._watches: Dict[Tuple[str, str], _Watch] = {}
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._flight = SingleFlight()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+
+        self.runs = 0
+        self.errors = 0
+        self.reads = 0
+        self.stale_reads = 0
+
+    def __len__(self):
+        return len(self._watches)
+
+    @staticmethod
+    def _key(symbol: str, interval: str) -> Tuple[str, str]:
+        return symbol.strip().upper(), interval
+
+    def watch(self, symbol: str, interval: str = "1min", pinned: bool = True) -> bool:
+        """Add a symbol; False if the watchlist is full"""
+        key = self._key(symbol, interval)
+        entry = self._watches.get(key)
+        if entry is not None:
+            entry.pinned = entry.pinned or pinned
+            return True
+        if len(self._watches) >= self.max_symbols:
+            return False
+        period = self.period_for(interval)
+        entry = _Watch(symbol.strip(), interval, period, pinned)
+        # Spread first runs so a restart does not poll every symbol at once
+        entry.next_run = time.monotonic() + random.uniform(0, self.jitter * period)
+        self._watches[key] = entry
+        self._wake.set()
+        return True
+
+    def unwatch(self, symbol: str, interval: str = "1min") -> bool:
+        return self._watches.pop(self._key(symbol, interval), None) is not None
+
+    def entries(self) -> List[Dict]:
+        return [w.to_dict() for w in self._watches.values()]
+
+    async def latest(self, symbol: str, interval: str = "1min") -> Any:
+        """
+        Most recent result for a symbol, watching it if it is not yet.
+        Only the very first read of a symbol waits for a detection run.
+        Returns None when the watchlist is full. If that first run fails,
+        its exception is raised and a symbol watched only for this read is
+        dropped again, so a bad symbol does not hold a watchlist slot.
+        """
+        key = self._key(symbol, interval)
+        entry = self._watches.get(key)
+        if entry is None:
+            if not self.watch(symbol, interval, pinned=False):
+                return None
+            entry = self._watches[key]
+        entry.last_read = time.monotonic()
+        self.reads += 1
+        if entry.result is None:
+            self.stale_reads += 1
+            await self.run_now(entry)
+            if entry.result is None and entry.failure is not None:
+                if not entry.pinned:
+                    self._watches.pop(key, None)
+                raise entry.failure
+        return entry.result
+
+    async def run_now(self, entry: _Watch):
+        # Concurrent first readers share the one run
+        await self._flight.do(
+            self._key(entry.symbol, entry.interval), lambda: self._run_one(entry)
+        )
+
+    async def _run_one(self, entry: _Watch):
+        entry.running = True
+        try:
+            async with self._sem:
+                entry.result = await self.detect(entry.symbol, entry.interval)
+            entry.failure = None
+            entry.last_run = time.time()
+            entry.runs += 1
+            self.runs += 1
+        except Exception as e:
+            entry.failure = e
+            entry.errors += 1
+            entry.last_error = str(e) or type(e).__name__
+            self.errors += 1
+            print(f"Watcher error for {entry.symbol}: {e}")
+        finally:
+            entry.running = False
+            spread = random.uniform(-self.jitter, self.jitter)
+            entry.next_run = time.monotonic() + entry.period * (1 + spread)
+
+    def _expire_idle(self, now: float):
+        idle = [
+            key
+            for key, w in self._watches.items()
+            if not w.pinned and now - w.last_read > self.idle_seconds
+        ]
+        for key in idle:
+            del self._watches[key]
+
+    async def _loop(self):
+        while True:
+            now = time.monotonic()
+            self._expire_idle(now)
+            next_due = now + 60
+            for entry in list(self._watches.values()):
+                if entry.running:
+                    continue
+                if entry.next_run <= now:
+                    task = asyncio.create_task(self.run_now(entry))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+                    # Rescheduled when the run finishes
+                    entry.next_run = now + entry.period
+                next_due = min(next_due, entry.next_run)
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(0.05, next_due - now))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        tasks = list(self._running)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "symbols": len(self._watches),
+            "pinned": sum(1 for w in self._watches.values() if w.pinned),
+            "running": sum(1 for w in self._watches.values() if w.running),
+            "runs": self.runs,
+            "errors": self.errors,
+            "reads": self.reads,
+            "reads_waiting_first_run": self.stale_reads,
+        }
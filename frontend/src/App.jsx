@@ -38,6 +38,7 @@ function App() {
 	const [loading, setLoading] = useState(false);
 	const [error, setError] = useState(null);
 	const [isAutoRefresh, setIsAutoRefresh] = useState(true);
+	const [streamConnected, setStreamConnected] = useState(false);
 
 	// Investigation hub state
 	const [invSymbol, setInvSymbol] = useState("");
@@ -62,16 +63,20 @@ function App() {
 			);
 			setData(res.data);
 
-			const [alertRes, threatRes, lbRes] = await Promise.all([
-				axios.get("http://127.0.0.1:8000/alerts?limit=50"),
-				axios.get("http://127.0.0.1:8000/threat_score"),
-				axios.get("http://127.0.0.1:8000/leaderboard"),
-			]);
+			// Alerts, threat score and leaderboard are pushed over /stream;
+			// only poll them while the stream is unavailable
+			if (!streamConnected) {
+				const [alertRes, threatRes, lbRes] = await Promise.all([
+					axios.get("http://127.0.0.1:8000/alerts?limit=50"),
+					axios.get("http://127.0.0.1:8000/threat_score"),
+					axios.get("http://127.0.0.1:8000/leaderboard"),
+				]);
 
-			setAlerts(alertRes.data || []);
-			setLiveAlerts(alertRes.data?.slice(0, 10) || []);
-			setThreat(threatRes.data || { score: 0, level: "Low" });
-			setLeaderboard((lbRes.data && lbRes.data.top) || []);
+				setAlerts(alertRes.data || []);
+				setLiveAlerts(alertRes.data?.slice(0, 10) || []);
+				setThreat(threatRes.data || { score: 0, level: "Low" });
+				setLeaderboard((lbRes.data && lbRes.data.top) || []);
+			}
 		} catch (error) {
 			console.error("Error fetching:", error);
 			setError(
@@ -88,7 +93,35 @@ function App() {
 			const id = setInterval(() => fetchAll(symbol), 10000);
 			return () => clearInterval(id);
 		}
-	}, [symbol, isAutoRefresh]);
+	}, [symbol, isAutoRefresh, streamConnected]);
+
+	// Live alert feed, threat score and leaderboard pushed by the backend
+	useEffect(() => {
+		const source = new EventSource("http://127.0.0.1:8000/stream");
+
+		source.onopen = () => setStreamConnected(true);
+		source.onerror = () => setStreamConnected(false);
+
+		source.addEventListener("alerts", (e) => {
+			const initial = JSON.parse(e.data) || [];
+			setAlerts(initial);
+			setLiveAlerts(initial.slice(0, 10));
+		});
+		source.addEventListener("alert", (e) => {
+			const alert = JSON.parse(e.data);
+			setAlerts((prev) => [alert, ...prev].slice(0, 50));
+			setLiveAlerts((prev) => [alert, ...prev].slice(0, 10));
+		});
+		source.addEventListener("threat_score", (e) => {
+			setThreat(JSON.parse(e.data) || { score: 0, level: "Low" });
+		});
+		source.addEventListener("leaderboard", (e) => {
+			const board = JSON.parse(e.data);
+			setLeaderboard((board && board.top) || []);
+		});
+
+		return () => source.close();
+	}, []);
 
 	useEffect(() => {
 		if (data && data.recent_prices && data.timestamps) {